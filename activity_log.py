@@ -0,0 +1,167 @@
+"""
+Buffered activity-log writer for SecurePass
+
+Activity events are queued in memory and written in batches instead of
+one INSERT plus commit per event. Pending events are flushed:
+
+- inside the caller's own transaction, right before it commits, so a
+  password change and its log row share one fsync
+- by a background thread when the queue reaches a size limit or the
+  oldest event reaches an age limit
+- unconditionally on close
+
+A failed background flush keeps its events queued for the next attempt
+and is reported through the logging module.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityLogWriter:
+    def __init__(self, connect, flush_size=50, flush_interval=2.0):
+        # connect() returns a new sqlite3 connection for the flusher thread
+        self.connect = connect
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Flush statistics
+        self.flush_count = 0
+        self.events_flushed = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def append(self, action: str, details: str = ""):
+        """Queue an event, stamped now in the same format as CURRENT_TIMESTAMP"""
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            self._pending.append((action, details, timestamp, time.monotonic()))
+            if len(self._pending) >= self.flush_size:
+                self._wake.set()
+
+    def pending_count(self) -> int:
+        """Number of queued events not yet written"""
+        with self._lock:
+            return len(self._pending)
+
+    def drain_into(self, cursor, extra=()):
+        """Insert all queued events plus any extra (action, details) pairs (caller commits)
+
+        Returns the drained queued events so the caller can requeue them
+        if its commit fails. Extra events belong to the caller's
+        transaction and are not requeued.
+        """
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            events, self._pending = self._pending, []
+        rows = [event[:3] for event in events] + [(action, details, timestamp) for action, details in extra]
+        if rows:
+            try:
+                cursor.executemany(
+                    'INSERT INTO activity_log (action, details, timestamp) VALUES (?, ?, ?)', rows
+                )
+            except Exception:
+                self.requeue(events)
+                raise
+        return events
+
+    def requeue(self, events):
+        """Put events back at the front of the queue after a failed commit"""
+        if events:
+            with self._lock:
+                self._pending = list(events) + self._pending
+
+    def record_flush(self, events):
+        """Update flush latency counters once events are committed"""
+        if not events:
+            return
+        now = time.monotonic()
+        latencies = [now - event[3] for event in events]
+        with self._lock:
+            self.flush_count += 1
+            self.events_flushed += len(events)
+            self.total_latency += sum(latencies)
+            self.max_latency = max(self.max_latency, max(latencies))
+
+    def flush(self, conn):
+        """Write and commit all queued events on the given connection"""
+        events = self.drain_into(conn.cursor())
+        if not events:
+            return 0
+        try:
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            self.requeue(events)
+            raise
+        self.record_flush(events)
+        return len(events)
+
+    def get_stats(self) -> dict:
+        """Return flush counters, including average and worst queue latency"""
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'flushes': self.flush_count,
+                'events_flushed': self.events_flushed,
+                'avg_latency': self.total_latency / self.events_flushed if self.events_flushed else 0.0,
+                'max_latency': self.max_latency
+            }
+
+    def start(self):
+        """Start the background flusher thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="securepass-activity-log", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background flusher thread; queued events stay queued"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join()
+        self._thread = None
+
+    def _next_wait(self) -> float:
+        """Seconds until the oldest queued event reaches the age trigger"""
+        with self._lock:
+            if not self._pending:
+                return self.flush_interval
+            return max(0.0, self.flush_interval - (time.monotonic() - self._pending[0][3]))
+
+    def _due(self) -> bool:
+        """Whether the size or age trigger has fired"""
+        with self._lock:
+            if not self._pending:
+                return False
+            return (len(self._pending) >= self.flush_size or
+                    time.monotonic() - self._pending[0][3] >= self.flush_interval)
+
+    def _run(self):
+        """Background loop flushing on size/time triggers with its own connection"""
+        conn = self.connect(timeout=30)
+        try:
+            while not self._stop.is_set():
+                self._wake.wait(self._next_wait())
+                self._wake.clear()
+                if self._stop.is_set():
+                    break
+                if self._due():
+                    try:
+                        self.flush(conn)
+                    except sqlite3.Error:
+                        logger.exception("Activity log flush failed; events stay queued")
+        finally:
+            conn.close()
@@ -0,0 +1,166 @@
+"""
+Streaming .spx backup container for SecurePass
+
+A streaming backup is a short plaintext header followed by a sequence of
+independently authenticated, length-prefixed AES-GCM chunks:
+
+    MAGIC (4) | version (1) | file id (16)
+    [length (4) | nonce (12) | ciphertext + tag] ...
+
+Each chunk is bound to its position and to whether it is the last chunk
+through the associated data, so chunks cannot be reordered, dropped or
+truncated without detection. Chunk 0 holds a JSON header, the following
+chunks hold JSON arrays of entries, and the final chunk holds a JSON
+trailer with the total entry count.
+
+Legacy backups (a JSON object wrapping one Fernet token) do not start
+with MAGIC and are handled by DatabaseManager directly.
+"""
+
+import json
+import os
+import struct
+
+MAGIC = b"SPXS"
+STREAM_VERSION = 2
+FILE_ID_SIZE = 16
+NONCE_SIZE = 12
+HEADER_SIZE = len(MAGIC) + 1 + FILE_ID_SIZE
+MAX_CHUNK_SIZE = 64 * 1024 * 1024  # Refuse absurd lengths from corrupted files
+
+
+class BackupFormatError(Exception):
+    """Raised when a streaming backup is malformed or fails authentication"""
+
+
+def is_stream_backup(file_path: str) -> bool:
+    """Check whether a file uses the streaming chunked container"""
+    with open(file_path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_file_id(file_obj) -> bytes:
+    """Read the random file id from a streaming backup header"""
+    prefix = file_obj.read(HEADER_SIZE)
+    if len(prefix) != HEADER_SIZE or prefix[:len(MAGIC)] != MAGIC:
+        raise BackupFormatError("Not a streaming SecurePass backup")
+    return prefix[len(MAGIC) + 1:]
+
+
+def _chunk_aad(file_id: bytes, index: int, final: bool) -> bytes:
+    """Associated data binding a chunk to its file, position and finality"""
+    return file_id + struct.pack('>QB', index, 1 if final else 0)
+
+
+class ChunkWriter:
+    """Write a streaming backup incrementally, one encrypted chunk at a time"""
+
+    def __init__(self, file_obj, cipher, header: dict):
+        self.file = file_obj
+        self.cipher = cipher
+        self.file_id = os.urandom(FILE_ID_SIZE)
+        self.index = 0
+        self.count = 0
+        self.file.write(MAGIC + bytes([STREAM_VERSION]) + self.file_id)
+        self._write_chunk(json.dumps(header).encode('utf-8'), final=False)
+
+    def _write_chunk(self, payload: bytes, final: bool):
+        """Encrypt and append a single chunk"""
+        nonce = os.urandom(NONCE_SIZE)
+        sealed = nonce + self.cipher.encrypt(nonce, payload, _chunk_aad(self.file_id, self.index, final))
+        self.file.write(struct.pack('>I', len(sealed)))
+        self.file.write(sealed)
+        self.index += 1
+
+    def write_entries(self, entries):
+        """Append one chunk holding a list of entry dicts"""
+        if not entries:
+            return
+        self._write_chunk(json.dumps(entries).encode('utf-8'), final=False)
+        self.count += len(entries)
+
+    def finish(self):
+        """Write the authenticated trailer that marks the backup complete"""
+        self._write_chunk(json.dumps({'count': self.count}).encode('utf-8'), final=True)
+
+
+class ChunkReader:
+    """Read and authenticate a streaming backup chunk by chunk"""
+
+    def __init__(self, file_obj, cipher):
+        self.file = file_obj
+        self.cipher = cipher
+        prefix = self.file.read(HEADER_SIZE)
+        if len(prefix) != HEADER_SIZE or prefix[:len(MAGIC)] != MAGIC:
+            raise BackupFormatError("Not a streaming SecurePass backup")
+        if prefix[len(MAGIC)] != STREAM_VERSION:
+            raise BackupFormatError(f"Unsupported backup version: {prefix[len(MAGIC)]}")
+        self.file_id = prefix[len(MAGIC) + 1:]
+        self.index = 0
+        self.header = json.loads(self._read_chunk(final=False))
+        self.trailer = None
+
+    def _read_sealed(self) -> bytes:
+        """Read the next length-prefixed sealed chunk from disk"""
+        length_bytes = self.file.read(4)
+        if len(length_bytes) != 4:
+            raise BackupFormatError("Backup is truncated")
+        (length,) = struct.unpack('>I', length_bytes)
+        if length <= NONCE_SIZE or length > MAX_CHUNK_SIZE:
+            raise BackupFormatError(f"Invalid chunk length at chunk {self.index}")
+        sealed = self.file.read(length)
+        if len(sealed) != length:
+            raise BackupFormatError("Backup is truncated")
+        return sealed
+
+    def _open(self, sealed: bytes, final: bool) -> bytes:
+        """Authenticate and decrypt a sealed chunk, or raise InvalidTag"""
+        return self.cipher.decrypt(sealed[:NONCE_SIZE], sealed[NONCE_SIZE:],
+                                   _chunk_aad(self.file_id, self.index, final))
+
+    def _read_chunk(self, final: bool) -> bytes:
+        """Read and decrypt the next chunk with a known finality"""
+        try:
+            payload = self._open(self._read_sealed(), final)
+        except BackupFormatError:
+            raise
+        except Exception:
+            raise BackupFormatError(f"Chunk {self.index} failed authentication")
+        self.index += 1
+        return payload
+
+    def skip_chunk(self):
+        """Skip over the next chunk without decrypting it"""
+        length_bytes = self.file.read(4)
+        if len(length_bytes) != 4:
+            raise BackupFormatError("Backup is truncated")
+        (length,) = struct.unpack('>I', length_bytes)
+        self.file.seek(length, os.SEEK_CUR)
+        self.index += 1
+
+    def iter_chunks(self, start=1):
+        """Yield (chunk index, list of entries) until the authenticated trailer
+
+        Entry chunks before index start are skipped unread, which lets an
+        interrupted import resume where it left off.
+        """
+        while self.index < start:
+            self.skip_chunk()
+        while True:
+            index = self.index
+            sealed = self._read_sealed()
+            # Entry chunks and the trailer differ only in their AAD flag
+            try:
+                payload = self._open(sealed, final=False)
+            except Exception:
+                try:
+                    payload = self._open(sealed, final=True)
+                except Exception:
+                    raise BackupFormatError(f"Chunk {index} failed authentication")
+                self.index += 1
+                self.trailer = json.loads(payload)
+                if self.file.read(1):
+                    raise BackupFormatError("Unexpected data after backup trailer")
+                return
+            self.index += 1
+            yield index, json.loads(payload)
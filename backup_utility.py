@@ -5,11 +5,85 @@ Creates timestamped backups of the password database
 """
 
 import os
-import shutil
+import sqlite3
+import time
 from datetime import datetime
 import argparse
 
-def create_backup(source_db="passwords.db", backup_dir="backups"):
+from config import BACKUP_DIRECTORY, BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP
+
+def backup_path_for(backup_dir=BACKUP_DIRECTORY):
+    """Timestamped path for a new backup in backup_dir"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(backup_dir, f"passwords_backup_{timestamp}.db")
+
+def backup_database(source_db, backup_path, pages_per_step=BACKUP_PAGES_PER_STEP,
+                    step_sleep=BACKUP_STEP_SLEEP, progress_callback=None):
+    """Snapshot a live database with the SQLite online backup API
+    
+    Copies pages_per_step pages at a time and pauses step_sleep seconds
+    between steps, so the running application keeps its write access.
+    The result is a consistent snapshot. For WAL vaults it is taken as
+    of the start of the copy. For rollback-journal databases, SQLite
+    restarts the copy whenever another connection writes to the source.
+    progress_callback(pages_done, pages_total) is called after each step.
+    The snapshot is written next to backup_path and renamed into place,
+    so a failed or cancelled backup leaves no partial file behind.
+    """
+    partial_path = backup_path + ".partial"
+    
+    def step_done(status, remaining, total):
+        if progress_callback:
+            progress_callback(total - remaining, total)
+        if remaining and step_sleep:
+            time.sleep(step_sleep)
+    
+    if not os.path.exists(source_db):
+        raise FileNotFoundError(f"Database file '{source_db}' not found")
+    
+    source = sqlite3.connect(source_db)
+    try:
+        # In WAL mode an open read transaction pins one snapshot for the
+        # whole copy without blocking writers, so their commits cannot
+        # force the copy to restart
+        if source.execute('PRAGMA journal_mode').fetchone()[0] == 'wal':
+            source.execute('BEGIN')
+            source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+        
+        target = sqlite3.connect(partial_path)
+        try:
+            source.backup(target, pages=pages_per_step, progress=step_done)
+        finally:
+            target.close()
+        os.replace(partial_path, backup_path)
+    finally:
+        source.close()
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return backup_path
+
+def restore_database(backup_file, target_db):
+    """Copy a backup over target_db with the SQLite online backup API
+    
+    The target is first switched out of WAL mode, which checkpoints any
+    pending WAL frames and removes its -wal and -shm files. Copying the
+    file over a WAL database instead would leave those stale files next
+    to the restored pages and corrupt it on the next open.
+    """
+    source = sqlite3.connect(backup_file)
+    try:
+        target = sqlite3.connect(target_db)
+        try:
+            if target.execute('PRAGMA journal_mode=DELETE').fetchone()[0] == 'wal':
+                raise RuntimeError(f"'{target_db}' is in use; close SecurePass before restoring")
+            source.backup(target)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+def create_backup(source_db="passwords.db", backup_dir=BACKUP_DIRECTORY,
+                  pages_per_step=BACKUP_PAGES_PER_STEP, step_sleep=BACKUP_STEP_SLEEP):
     """Create a timestamped backup of the password database"""
     
     # Check if source database exists
@@ -23,13 +97,11 @@ def create_backup(source_db="passwords.db", backup_dir="backups"):
         print(f"📁 Created backup directory: {backup_dir}")
     
     # Generate timestamp for backup filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_filename = f"passwords_backup_{timestamp}.db"
-    backup_path = os.path.join(backup_dir, backup_filename)
+    backup_path = backup_path_for(backup_dir)
     
     try:
-        # Copy the database file
-        shutil.copy2(source_db, backup_path)
+        # Snapshot the database, safe even while SecurePass is running
+        backup_database(source_db, backup_path, pages_per_step, step_sleep)
         
         # Get file sizes
         original_size = os.path.getsize(source_db)
@@ -46,7 +118,7 @@ def create_backup(source_db="passwords.db", backup_dir="backups"):
         print(f"❌ Backup failed: {str(e)}")
         return False
 
-def list_backups(backup_dir="backups"):
+def list_backups(backup_dir=BACKUP_DIRECTORY):
     """List all available backups"""
     
     if not os.path.exists(backup_dir):
@@ -96,14 +168,15 @@ def restore_backup(backup_file, target_db="passwords.db"):
             return False
     
     try:
-        # Create a backup of current database before restoring
+        # Create a backup of current database before restoring, including
+        # commits still in its WAL
         if os.path.exists(target_db):
             backup_current = f"{target_db}.pre_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            shutil.copy2(target_db, backup_current)
+            backup_database(target_db, backup_current, pages_per_step=-1, step_sleep=0)
             print(f"💾 Current database backed up to: {backup_current}")
         
         # Restore the backup
-        shutil.copy2(backup_file, target_db)
+        restore_database(backup_file, target_db)
         
         print(f"✅ Database restored successfully!")
         print(f"   From: {backup_file}")
@@ -121,10 +194,14 @@ def main():
                        help="Action to perform")
     parser.add_argument("--source", default="passwords.db", 
                        help="Source database file (default: passwords.db)")
-    parser.add_argument("--backup-dir", default="backups", 
-                       help="Backup directory (default: backups)")
+    parser.add_argument("--backup-dir", default=BACKUP_DIRECTORY, 
+                       help=f"Backup directory (default: {BACKUP_DIRECTORY})")
     parser.add_argument("--backup-file", 
                        help="Specific backup file to restore")
+    parser.add_argument("--pages-per-step", type=int, default=BACKUP_PAGES_PER_STEP,
+                       help=f"Pages copied per backup step, -1 for all at once (default: {BACKUP_PAGES_PER_STEP})")
+    parser.add_argument("--step-sleep", type=float, default=BACKUP_STEP_SLEEP,
+                       help=f"Seconds to pause between backup steps (default: {BACKUP_STEP_SLEEP})")
     
     args = parser.parse_args()
     
@@ -132,7 +209,7 @@ def main():
     print("=" * 40)
     
     if args.action == "create":
-        create_backup(args.source, args.backup_dir)
+        create_backup(args.source, args.backup_dir, args.pages_per_step, args.step_sleep)
     
     elif args.action == "list":
         list_backups(args.backup_dir)
@@ -0,0 +1,286 @@
+"""
+Offline breached-password lookups for SecurePass
+
+Checks passwords against a local copy of a breach corpus (such as the
+Have I Been Pwned SHA-1 or NTLM dump) without sending anything over the
+network. build_breach_db.py converts the text dump into this compact
+binary file:
+
+    MAGIC (8) | version (1) | hash type (1) | reserved (2) | record count (8)
+    fanout: 65537 x uint64, first record index for each 2-byte digest prefix
+    records: digest (20 bytes SHA-1 / 16 bytes NTLM) | breach count (uint32) ...
+
+Records are sorted by digest. The file is memory-mapped rather than
+read, so a lookup only touches the fanout entry for the digest's prefix
+and the few pages visited by a binary search within that prefix range.
+A multi-gigabyte corpus answers in microseconds and only the pages used
+stay in memory.
+
+An optional Bloom filter (<file>.bloom) sits in front of the search.
+Most passwords are not in the corpus, and for those the filter answers
+after reading k bits without touching the sorted file at all.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+
+MAGIC = b"SPBREACH"
+BREACH_VERSION = 1
+HASH_SHA1 = 1
+HASH_NTLM = 2
+HASH_TYPES = {'sha1': HASH_SHA1, 'ntlm': HASH_NTLM}
+DIGEST_SIZES = {HASH_SHA1: 20, HASH_NTLM: 16}
+HEADER = struct.Struct('<8sBB2xQ')
+FANOUT_ENTRIES = 65537
+FANOUT = struct.Struct(f'<{FANOUT_ENTRIES}Q')
+COUNT = struct.Struct('<I')
+MAX_COUNT = 0xFFFFFFFF
+DATA_OFFSET = HEADER.size + FANOUT.size
+
+BLOOM_MAGIC = b"SPBLOOM1"
+BLOOM_HEADER = struct.Struct('<8sQB7x')  # magic, bit count, hash count
+BLOOM_SUFFIX = ".bloom"
+
+
+class BreachFormatError(Exception):
+    """Raised when a breach database or Bloom filter file is malformed"""
+
+
+def sha1_digest(password: str) -> bytes:
+    """SHA-1 of the UTF-8 password, as used by the HIBP SHA-1 dump"""
+    return hashlib.sha1(password.encode('utf-8')).digest()
+
+
+def ntlm_digest(password: str) -> bytes:
+    """NTLM hash (MD4 of the UTF-16LE password), as used by the HIBP NTLM dump"""
+    data = password.encode('utf-16-le')
+    try:
+        return hashlib.new('md4', data).digest()
+    except ValueError:
+        # OpenSSL 3 ships MD4 only in the legacy provider
+        return _md4(data)
+
+
+def _md4(data: bytes) -> bytes:
+    """Pure Python MD4 (RFC 1320) for builds without it in hashlib"""
+    mask = 0xFFFFFFFF
+
+    def rotate(x, n):
+        x &= mask
+        return ((x << n) | (x >> (32 - n))) & mask
+
+    length = len(data)
+    data += b'\x80' + b'\x00' * ((55 - length) % 64) + struct.pack('<Q', length * 8)
+    h = [0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476]
+
+    for offset in range(0, len(data), 64):
+        x = struct.unpack_from('<16I', data, offset)
+        a, b, c, d = h
+        for i in range(16):
+            k, s = i, (3, 7, 11, 19)[i % 4]
+            a, b, c, d = d, rotate(a + ((b & c) | (~b & d)) + x[k], s), b, c
+        for i in range(16):
+            k, s = (i % 4) * 4 + i // 4, (3, 5, 9, 13)[i % 4]
+            a, b, c, d = d, rotate(a + ((b & c) | (b & d) | (c & d)) + x[k] + 0x5A827999, s), b, c
+        for i in range(16):
+            k = (0, 8, 4, 12, 2, 10, 6, 14, 1, 9, 5, 13, 3, 11, 7, 15)[i]
+            s = (3, 9, 11, 15)[i % 4]
+            a, b, c, d = d, rotate(a + (b ^ c ^ d) + x[k] + 0x6ED9EBA1, s), b, c
+        h = [(value + added) & mask for value, added in zip(h, (a, b, c, d))]
+
+    return struct.pack('<4I', *h)
+
+
+DIGEST_FUNCTIONS = {HASH_SHA1: sha1_digest, HASH_NTLM: ntlm_digest}
+
+
+def _bloom_positions(digest: bytes, bits: int, hashes: int):
+    """Bit positions for a digest by double hashing; digests are already uniform"""
+    h1 = int.from_bytes(digest[:8], 'little')
+    h2 = int.from_bytes(digest[8:16], 'little') | 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+
+def bloom_parameters(count: int, fp_rate: float) -> tuple:
+    """Bit and hash counts for a Bloom filter of count items at a false-positive rate"""
+    count = max(1, count)
+    bits = max(64, math.ceil(-count * math.log(fp_rate) / (math.log(2) ** 2)))
+    hashes = max(1, round(bits / count * math.log(2)))
+    return bits, hashes
+
+
+class BreachWriter:
+    """Write a breach database from digests supplied in ascending order"""
+
+    def __init__(self, file_obj, hash_type: int):
+        if hash_type not in DIGEST_SIZES:
+            raise ValueError(f"Unknown hash type: {hash_type}")
+        self.file = file_obj
+        self.hash_type = hash_type
+        self.digest_size = DIGEST_SIZES[hash_type]
+        self.count = 0
+        self._prefix_counts = [0] * (FANOUT_ENTRIES - 1)
+        self._last = None
+        # Header and fanout are rewritten by close() once the counts are known
+        self.file.write(b'\x00' * DATA_OFFSET)
+
+    def add(self, digest: bytes, count: int = 1):
+        """Append one record; digests must be unique and strictly ascending"""
+        if len(digest) != self.digest_size:
+            raise BreachFormatError(f"Expected {self.digest_size}-byte digests, got {len(digest)}")
+        if self._last is not None and digest <= self._last:
+            raise BreachFormatError("Digests must be written in ascending order without duplicates")
+        self.file.write(digest + COUNT.pack(min(count, MAX_COUNT)))
+        self._prefix_counts[int.from_bytes(digest[:2], 'big')] += 1
+        self._last = digest
+        self.count += 1
+
+    def close(self):
+        """Write the header and fanout table"""
+        fanout = [0]
+        for prefix_count in self._prefix_counts:
+            fanout.append(fanout[-1] + prefix_count)
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, BREACH_VERSION, self.hash_type, self.count))
+        self.file.write(FANOUT.pack(*fanout))
+        self.file.seek(0, os.SEEK_END)
+
+
+def build_bloom_filter(db_path: str, fp_rate: float, bloom_path: str = None) -> str:
+    """Write a Bloom filter for every digest in a breach database"""
+    bloom_path = bloom_path or db_path + BLOOM_SUFFIX
+    with BreachDatabase(db_path, use_bloom=False) as breach_db:
+        bits, hashes = bloom_parameters(breach_db.count, fp_rate)
+        array = bytearray((bits + 7) // 8)
+        for digest in breach_db.iter_digests():
+            for position in _bloom_positions(digest, bits, hashes):
+                array[position >> 3] |= 1 << (position & 7)
+
+    with open(bloom_path, 'wb') as f:
+        f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, bits, hashes))
+        f.write(array)
+    return bloom_path
+
+
+def _map_file(path: str):
+    """Memory-map a whole file read-only"""
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class BreachDatabase:
+    """Read-only, memory-mapped view of a breach database"""
+
+    def __init__(self, path: str, use_bloom: bool = True):
+        self.path = path
+        self._map = _map_file(path)
+        if len(self._map) < DATA_OFFSET:
+            self._map.close()
+            raise BreachFormatError("Breach database is truncated")
+
+        magic, version, self.hash_type, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != BREACH_VERSION or self.hash_type not in DIGEST_SIZES:
+            self._map.close()
+            raise BreachFormatError("Not a SecurePass breach database")
+        self.digest_size = DIGEST_SIZES[self.hash_type]
+        self.record_size = self.digest_size + COUNT.size
+        if len(self._map) != DATA_OFFSET + self.count * self.record_size:
+            self._map.close()
+            raise BreachFormatError("Breach database size does not match its record count")
+        self.digest = DIGEST_FUNCTIONS[self.hash_type]
+
+        self._bloom = None
+        bloom_path = path + BLOOM_SUFFIX
+        if use_bloom and os.path.exists(bloom_path):
+            self._bloom = _map_file(bloom_path)
+            magic, self._bloom_bits, self._bloom_hashes = BLOOM_HEADER.unpack_from(self._bloom, 0)
+            if magic != BLOOM_MAGIC or len(self._bloom) != BLOOM_HEADER.size + (self._bloom_bits + 7) // 8:
+                self.close()
+                raise BreachFormatError("Bloom filter file is malformed")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def has_bloom_filter(self) -> bool:
+        return self._bloom is not None
+
+    def check(self, password: str) -> int:
+        """Return how often a password appears in the corpus (0 if never)"""
+        return self.lookup_digest(self.digest(password))
+
+    def lookup_digest(self, digest: bytes) -> int:
+        """Return the breach count stored for a digest (0 if absent)"""
+        if self._bloom is not None:
+            bloom, bits = self._bloom, self._bloom_bits
+            position = int.from_bytes(digest[:8], 'little') % bits
+            step = (int.from_bytes(digest[8:16], 'little') | 1) % bits
+            for _ in range(self._bloom_hashes):
+                if not bloom[BLOOM_HEADER.size + (position >> 3)] & (1 << (position & 7)):
+                    return 0
+                position = (position + step) % bits
+
+        prefix = int.from_bytes(digest[:2], 'big')
+        low, high = struct.unpack_from('<2Q', self._map, HEADER.size + prefix * 8)
+        mapped = self._map
+        size = self.digest_size
+        while low < high:
+            middle = (low + high) // 2
+            offset = DATA_OFFSET + middle * self.record_size
+            stored = mapped[offset:offset + size]
+            if stored < digest:
+                low = middle + 1
+            elif stored > digest:
+                high = middle
+            else:
+                return COUNT.unpack_from(mapped, offset + size)[0]
+        return 0
+
+    def iter_digests(self):
+        """Yield every stored digest in order"""
+        for offset in range(DATA_OFFSET, len(self._map), self.record_size):
+            yield self._map[offset:offset + self.digest_size]
+
+    def close(self):
+        if self._bloom is not None:
+            self._bloom.close()
+            self._bloom = None
+        if not self._map.closed:
+            self._map.close()
+
+
+_open_databases = {}
+_open_lock = threading.Lock()
+
+
+def get_breach_database(path: str):
+    """Open the breach database at path once per file version, or None if there is none
+
+    A missing file is not remembered, so a database installed later is
+    picked up on the next call. A file that cannot be opened is
+    remembered by its mtime and raises BreachFormatError until it is
+    replaced, instead of being parsed again on every call.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _open_lock:
+        cached = _open_databases.get(path)
+        if cached is None or cached[0] != mtime:
+            try:
+                cached = (mtime, BreachDatabase(path), None)
+            except (OSError, ValueError, BreachFormatError) as e:
+                cached = (mtime, None, str(e))
+            _open_databases[path] = cached
+        _, breach_db, error = cached
+    if error is not None:
+        raise BreachFormatError(f"Cannot read breach database '{path}': {error}")
+    return breach_db
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Breach database builder for SecurePass
+Converts a text breach dump (HASH:COUNT per line, as published by Have I
+Been Pwned) into the compact memory-mapped format read by breach_check.py
+"""
+
+import argparse
+import heapq
+import os
+import tempfile
+import time
+
+from breach_check import (BreachWriter, BreachFormatError, build_bloom_filter,
+                          DIGEST_SIZES, HASH_TYPES, BLOOM_SUFFIX)
+from config import BREACH_DATABASE, BREACH_BLOOM_FP_RATE
+
+SORT_CHUNK_RECORDS = 2_000_000  # Records sorted in memory per run before merging
+
+
+def parse_line(line: str, digest_size: int):
+    """Parse 'HEX[:COUNT]' into (digest, count), or None for blank lines"""
+    line = line.strip()
+    if not line:
+        return None
+    hex_digest, _, count = line.partition(':')
+    digest = bytes.fromhex(hex_digest)
+    if len(digest) != digest_size:
+        raise BreachFormatError(f"Unexpected hash length in line: {line[:60]}")
+    return digest, int(count) if count else 1
+
+
+def detect_hash_type(path: str) -> int:
+    """Guess the hash type from the length of the first hash in the dump"""
+    with open(path, 'r') as f:
+        for line in f:
+            hex_length = len(line.strip().partition(':')[0])
+            if hex_length:
+                for hash_type, size in DIGEST_SIZES.items():
+                    if hex_length == size * 2:
+                        return hash_type
+                break
+    raise BreachFormatError("Could not detect the hash type; pass --type")
+
+
+def _write_run(records, directory: str, record_size: int) -> str:
+    """Sort one run of records and spill it to a temporary file"""
+    records.sort()
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".run")
+    with os.fdopen(fd, 'wb') as f:
+        for digest, count in records:
+            f.write(digest + count.to_bytes(record_size - len(digest), 'little'))
+    return path
+
+
+def _read_run(path: str, digest_size: int):
+    """Yield (digest, count) records back from a spilled run"""
+    record_size = digest_size + 8
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(record_size * 4096)
+            if not block:
+                return
+            for offset in range(0, len(block), record_size):
+                yield (block[offset:offset + digest_size],
+                       int.from_bytes(block[offset + digest_size:offset + record_size], 'little'))
+
+
+def sorted_records(dump_path: str, digest_size: int, chunk_records: int, temp_dir: str):
+    """Yield the dump's records sorted by digest, merging duplicates
+
+    Dumps that are already sorted still go through this; each run is then
+    sorted in a single pass and the merge is a straight concatenation.
+    Runs are spilled to disk so memory stays bounded by chunk_records.
+    """
+    runs = []
+    records = []
+    with open(dump_path, 'r') as f:
+        for line in f:
+            record = parse_line(line, digest_size)
+            if record is None:
+                continue
+            records.append(record)
+            if len(records) >= chunk_records:
+                runs.append(_write_run(records, temp_dir, digest_size + 8))
+                records = []
+
+    try:
+        if runs:
+            if records:
+                runs.append(_write_run(records, temp_dir, digest_size + 8))
+            merged = heapq.merge(*(_read_run(path, digest_size) for path in runs))
+        else:
+            records.sort()
+            merged = iter(records)
+
+        current, total = None, 0
+        for digest, count in merged:
+            if digest == current:
+                total += count
+                continue
+            if current is not None:
+                yield current, total
+            current, total = digest, count
+        if current is not None:
+            yield current, total
+    finally:
+        for path in runs:
+            os.remove(path)
+
+
+def build(dump_path: str, output_path: str, hash_type: int, chunk_records=SORT_CHUNK_RECORDS) -> int:
+    """Convert a text dump into a breach database and return its record count"""
+    temp_dir = os.path.dirname(os.path.abspath(output_path))
+    partial_path = output_path + ".partial"
+    with open(partial_path, 'wb') as f:
+        writer = BreachWriter(f, hash_type)
+        for digest, count in sorted_records(dump_path, DIGEST_SIZES[hash_type], chunk_records, temp_dir):
+            writer.add(digest, count)
+        writer.close()
+    os.replace(partial_path, output_path)
+    return writer.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SecurePass Breach Database Builder")
+    parser.add_argument("dump", help="Text dump with one HASH[:COUNT] per line")
+    parser.add_argument("--output", "-o", default=BREACH_DATABASE,
+                       help=f"Output file (default: {BREACH_DATABASE})")
+    parser.add_argument("--type", choices=HASH_TYPES,
+                       help="Hash type of the dump (default: detected from the first line)")
+    parser.add_argument("--bloom", action="store_true",
+                       help="Also write a Bloom filter to speed up lookups of unbreached passwords")
+    parser.add_argument("--fp-rate", type=float, default=BREACH_BLOOM_FP_RATE,
+                       help=f"Bloom filter false-positive rate (default: {BREACH_BLOOM_FP_RATE})")
+    parser.add_argument("--chunk-records", type=int, default=SORT_CHUNK_RECORDS,
+                       help=f"Records sorted in memory at a time (default: {SORT_CHUNK_RECORDS})")
+
+    args = parser.parse_args()
+    if not 0 < args.fp_rate < 1:
+        parser.error("--fp-rate must be between 0 and 1")
+
+    try:
+        hash_type = HASH_TYPES[args.type] if args.type else detect_hash_type(args.dump)
+
+        print("🛡️ SecurePass Breach Database Builder")
+        print("=" * 50)
+        start = time.perf_counter()
+        count = build(args.dump, args.output, hash_type, args.chunk_records)
+        print(f"✅ Wrote {count} hashes to {args.output} in {time.perf_counter() - start:.1f}s")
+
+        stale_bloom = args.output + BLOOM_SUFFIX
+        if args.bloom:
+            start = time.perf_counter()
+            bloom_path = build_bloom_filter(args.output, args.fp_rate)
+            print(f"✅ Wrote Bloom filter to {bloom_path} in {time.perf_counter() - start:.1f}s")
+        elif os.path.exists(stale_bloom):
+            # A filter from an older corpus would hide newly added hashes
+            os.remove(stale_bloom)
+            print(f"🗑️ Removed outdated Bloom filter {stale_bloom}")
+    except (OSError, ValueError, BreachFormatError) as e:
+        print(f"❌ Build failed: {e}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
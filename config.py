@@ -6,21 +6,44 @@ AUTHOR = "User"
 # Database Configuration
 DATABASE_NAME = "passwords.db"
 BACKUP_EXTENSION = ".spx"
+DEFAULT_STORAGE_PROFILE = "balanced"  # One of: durable, balanced, fast
+BACKUP_DIRECTORY = "backups"
+BACKUP_PAGES_PER_STEP = 256  # Database pages copied per online backup step
+BACKUP_STEP_SLEEP = 0.005  # Seconds to pause between backup steps so writers can run
 
 # Security Configuration
 DEFAULT_AUTO_LOCK_MINUTES = 5
 MIN_MASTER_PASSWORD_LENGTH = 8
-ENCRYPTION_ITERATIONS = 100000
+ENCRYPTION_ITERATIONS = 100000  # Minimum PBKDF2 iterations
+KDF_ALGORITHM = "scrypt"  # KDF calibrated for new vaults: scrypt, bcrypt or pbkdf2-sha256
+KDF_TARGET_SECONDS = 0.5  # Unlock latency the KDF cost is calibrated to
+BREACH_DATABASE = "breached_passwords.bin"  # Optional offline breach corpus, see build_breach_db.py
+BREACH_BLOOM_FP_RATE = 0.001  # False-positive rate of the optional breach Bloom filter
+
+# Decryption Engine
+DECRYPT_CHUNK_SIZE = 500  # Rows fetched and decrypted per batch
+MIGRATION_BATCH_SIZE = 200  # Rows converted per row-format migration batch
+IMPORT_BATCH_SIZE = 1000  # Entries encrypted and inserted per bulk import batch
+
+# Vault Health Audit
+HEALTH_AUDIT_WORKERS = 4  # Processes rating passwords in parallel
+HEALTH_AUDIT_BATCH_SIZE = 250  # Passwords sent to a worker process at a time
+PASSWORD_MAX_AGE_DAYS = 365  # Passwords not changed for longer are flagged as old
 
 # UI Configuration
 DEFAULT_WINDOW_SIZE = "900x700"
 MIN_WINDOW_SIZE = "800x600"
 DEFAULT_THEME = "light"
+TREE_WINDOW_SIZE = 500  # Password list rows materialized per scroll window
+SEARCH_DEBOUNCE_MS = 150  # Typing pause before a search runs
 
 # Password Generator Defaults
 DEFAULT_PASSWORD_LENGTH = 16
 MIN_PASSWORD_LENGTH = 8
 MAX_PASSWORD_LENGTH = 64
+PASSPHRASE_WORDLIST = "wordlist.spw"  # Packed wordlist for passphrases, see wordlist.py
 
 # Activity Log
 MAX_LOG_ENTRIES = 1000
+LOG_FLUSH_SIZE = 50  # Queued events that trigger a background flush
+LOG_FLUSH_INTERVAL = 2.0  # Seconds a queued event may wait before flushing
@@ -3,31 +3,97 @@ import json
 import os
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 import base64
+import hashlib
+import hmac
+import struct
+import threading
 import bcrypt
 from datetime import datetime
+import kdf
+from activity_log import ActivityLogWriter
+from fuzzy_index import FuzzyIndex, GRAM as FUZZY_GRAM
+import strength_estimator
+from backup_format import ChunkWriter, ChunkReader, is_stream_backup, read_file_id
+from config import (DECRYPT_CHUNK_SIZE, MIGRATION_BATCH_SIZE, IMPORT_BATCH_SIZE,
+                    LOG_FLUSH_SIZE, LOG_FLUSH_INTERVAL, DEFAULT_STORAGE_PROFILE,
+                    KDF_ALGORITHM, KDF_TARGET_SECONDS)
+
+# Row storage formats
+# v1: each field is a separately base64-wrapped Fernet token in its own column
+# v2: all fields sealed together in a single AES-GCM envelope stored as a BLOB
+# v3: service/username in one envelope, password/notes in a second one, so
+#     listings never decrypt the secrets
+ROW_FORMAT_V1 = 1
+ROW_FORMAT_V2 = 2
+ROW_FORMAT_V3 = 3
+ENVELOPE_NONCE_SIZE = 12
+ENVELOPE_AAD = b"securepass-row-v2"
+LISTING_AAD = b"securepass-row-v3-listing"
+SECRET_AAD = b"securepass-row-v3-secret"
+EXPORT_INFO = b"securepass-export-v2"
+KEK_INFO = b"securepass-key-encryption-key"
+AUTH_INFO = b"securepass-auth-verifier"
+FINGERPRINT_INFO = b"securepass-reuse-fingerprint"
+FINGERPRINT_SIZE = 16
+WRAP_AAD = b"securepass-data-key"
+ENTRY_COLUMNS = ('id, service, username, password, notes, created_at, updated_at, format_version, envelope, '
+                 'secret_envelope')
+# Same row shape without the v1 secret columns or the v3 secret envelope,
+# for metadata-only listings
+LISTING_COLUMNS = "id, service, username, '', '', created_at, updated_at, format_version, envelope, NULL"
+
+# SQLite storage profiles applied to every connection. All use WAL so
+# readers never block the writer; they trade durability on power loss
+# (synchronous) against write latency, and memory for read speed.
+STORAGE_PROFILES = {
+    'durable': {
+        'description': "Full fsync on every commit",
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'mmap_size': 0,
+        'cache_size': -2000,  # KiB when negative
+        'temp_store': 'DEFAULT'
+    },
+    'balanced': {
+        'description': "WAL with fsync at checkpoints",
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 64 * 1024 * 1024,
+        'cache_size': -16000,
+        'temp_store': 'MEMORY'
+    },
+    'fast': {
+        'description': "No fsync; recent writes may be lost on power failure",
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,
+        'temp_store': 'MEMORY'
+    }
+}
 
 class SecurityManager:
     def __init__(self, db_path="passwords.db"):
         self.db_path = db_path
         self.key = None
         self.fernet = None
+        self.row_cipher = None
+        self.export_cipher = None
+        self.fingerprint_hmac = None
+        self.kek = None
         
     def generate_salt(self):
         """Generate a random salt for password hashing"""
         return os.urandom(32)
     
-    def derive_key_from_password(self, password: str, salt: bytes) -> bytes:
-        """Derive encryption key from master password"""
-        password_bytes = password.encode('utf-8')
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password_bytes))
+    def derive_key_from_password(self, password: str, salt: bytes,
+                                 algorithm: str = kdf.LEGACY_ALGORITHM, params: dict = None) -> bytes:
+        """Derive encryption key from master password with the vault's KDF"""
+        params = params or kdf.LEGACY_PARAMS
+        key = base64.urlsafe_b64encode(kdf.derive(algorithm, params, password, salt))
         return key
     
     def hash_master_password(self, password: str) -> tuple:
@@ -41,9 +107,79 @@ class SecurityManager:
         return bcrypt.checkpw(password.encode('utf-8'), hashed)
     
     def setup_encryption(self, master_password: str, salt: bytes):
-        """Setup encryption with master password"""
-        self.key = self.derive_key_from_password(master_password, salt)
+        """Setup encryption keyed directly by the master password (pre-envelope vaults)"""
+        self.set_data_key(self.derive_key_from_password(master_password, salt))
+    
+    def set_data_key(self, key: bytes):
+        """Install a data-encryption key and derive the per-purpose subkeys"""
+        self.key = key
         self.fernet = Fernet(self.key)
+        self.row_cipher = AESGCM(self.derive_subkey(self.key, ENVELOPE_AAD))
+        self.export_cipher = AESGCM(self.derive_subkey(self.key, EXPORT_INFO))
+        self.fingerprint_hmac = hmac.new(self.derive_subkey(self.key, FINGERPRINT_INFO), digestmod=hashlib.sha256)
+    
+    def clear_keys(self):
+        """Forget the data key, its subkeys and the key-encryption key"""
+        self.key = None
+        self.fernet = None
+        self.row_cipher = None
+        self.export_cipher = None
+        self.fingerprint_hmac = None
+        self.kek = None
+    
+    def generate_data_key(self) -> bytes:
+        """Generate a random data-encryption key"""
+        return Fernet.generate_key()
+    
+    def derive_kek(self, password_key: bytes) -> bytes:
+        """Derive the key-encryption key from a password-derived key"""
+        return self.derive_subkey(password_key, KEK_INFO)
+    
+    def derive_verifier(self, password_key: bytes) -> bytes:
+        """Derive the stored authentication verifier from a password-derived key"""
+        return hashlib.sha256(self.derive_subkey(password_key, AUTH_INFO)).digest()
+    
+    def derive_unlock_keys(self, password: str, salt: bytes,
+                           algorithm: str = kdf.LEGACY_ALGORITHM, params: dict = None) -> tuple:
+        """Run the password KDF once and split it into (verifier, kek, password_key)
+        
+        The verifier and the key-encryption key come from independent HKDF
+        expansions of the same stretched key, so storing the verifier
+        reveals nothing about the KEK and unlock needs a single KDF pass.
+        """
+        password_key = self.derive_key_from_password(password, salt, algorithm, params)
+        return self.derive_verifier(password_key), self.derive_kek(password_key), password_key
+    
+    def check_verifier(self, verifier: bytes, stored: bytes) -> bool:
+        """Constant-time comparison of a derived verifier with the stored one"""
+        return hmac.compare_digest(verifier, stored)
+    
+    def wrap_key(self, kek: bytes, key: bytes) -> bytes:
+        """Encrypt a data key under a key-encryption key"""
+        nonce = os.urandom(ENVELOPE_NONCE_SIZE)
+        return nonce + AESGCM(kek).encrypt(nonce, key, WRAP_AAD)
+    
+    def unwrap_key(self, kek: bytes, wrapped: bytes) -> bytes:
+        """Decrypt a wrapped data key, raising InvalidTag on a wrong key"""
+        return AESGCM(kek).decrypt(wrapped[:ENVELOPE_NONCE_SIZE], wrapped[ENVELOPE_NONCE_SIZE:], WRAP_AAD)
+    
+    def derive_subkey(self, key: bytes, info: bytes) -> bytes:
+        """Derive an independent purpose-specific key from the Fernet key"""
+        hkdf = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=info,
+        )
+        return hkdf.derive(base64.urlsafe_b64decode(key))
+    
+    def password_fingerprint(self, password: str) -> bytes:
+        """Keyed fingerprint of a password, equal only for equal passwords under the same data key"""
+        if not self.fingerprint_hmac:
+            raise ValueError("Encryption not initialized")
+        mac = self.fingerprint_hmac.copy()
+        mac.update(password.encode('utf-8'))
+        return mac.digest()[:FINGERPRINT_SIZE]
     
     def encrypt_data(self, data: str) -> str:
         """Encrypt string data"""
@@ -59,17 +195,66 @@ class SecurityManager:
         encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode('utf-8'))
         decrypted = self.fernet.decrypt(encrypted_bytes)
         return decrypted.decode('utf-8')
+    
+    def encrypt_entry(self, fields, aad: bytes = ENVELOPE_AAD) -> bytes:
+        """Seal a sequence of string fields into one binary envelope"""
+        if not self.row_cipher:
+            raise ValueError("Encryption not initialized")
+        payload = bytearray()
+        for field in fields:
+            encoded = field.encode('utf-8')
+            payload += struct.pack('>I', len(encoded))
+            payload += encoded
+        nonce = os.urandom(ENVELOPE_NONCE_SIZE)
+        return nonce + self.row_cipher.encrypt(nonce, bytes(payload), aad)
+    
+    def decrypt_entry(self, envelope: bytes, aad: bytes = ENVELOPE_AAD) -> tuple:
+        """Open a binary envelope and return its string fields"""
+        if not self.row_cipher:
+            raise ValueError("Encryption not initialized")
+        nonce = envelope[:ENVELOPE_NONCE_SIZE]
+        payload = self.row_cipher.decrypt(nonce, envelope[ENVELOPE_NONCE_SIZE:], aad)
+        fields = []
+        offset = 0
+        while offset < len(payload):
+            (length,) = struct.unpack_from('>I', payload, offset)
+            offset += 4
+            fields.append(payload[offset:offset + length].decode('utf-8'))
+            offset += length
+        return tuple(fields)
+    
+    def encrypt_row(self, fields) -> tuple:
+        """Seal (service, username, password, notes) as v3 (listing, secret) envelopes"""
+        return self.encrypt_entry(fields[:2], LISTING_AAD), self.encrypt_entry(fields[2:], SECRET_AAD)
 
 class DatabaseManager:
-    def __init__(self, db_path="passwords.db", security_manager=None):
+    def __init__(self, db_path="passwords.db", security_manager=None,
+                 decrypt_chunk_size=DECRYPT_CHUNK_SIZE):
         self.db_path = db_path
         self.security = security_manager
         self.conn = None
+        # Held by whichever thread is using self.conn (see task_runner.TaskRunner)
+        self.conn_lock = threading.RLock()
+        self.decrypt_chunk_size = max(1, decrypt_chunk_size)
+        self._migration_thread = None
+        self._migration_stop = threading.Event()
+        self._migration_error = None
+        # Session cache of decrypted entries keyed by id, None until warmed
+        self._entry_cache = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Ranked trigram index over the cached listing, None while locked
+        self.fuzzy_index = None
+        self.storage_profile = DEFAULT_STORAGE_PROFILE
+        self.key_version = 0
         self.init_database()
+        self.activity_log = ActivityLogWriter(self.connect, LOG_FLUSH_SIZE, LOG_FLUSH_INTERVAL)
+        self.activity_log.start()
     
     def init_database(self):
         """Initialize the database with required tables"""
-        self.conn = sqlite3.connect(self.db_path)
+        # The GUI runs database work on a task thread, serialized by conn_lock
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         cursor = self.conn.cursor()
         
         # Master password table
@@ -95,6 +280,45 @@ class DatabaseManager:
             )
         ''')
         
+        # Envelope keys: the data key is wrapped by a password-derived key,
+        # with an optional pending key while a rotation is in progress
+        self._ensure_column(cursor, 'master_auth', 'auth_verifier', 'BLOB')
+        self._ensure_column(cursor, 'master_auth', 'kdf_algorithm', 'TEXT')
+        self._ensure_column(cursor, 'master_auth', 'kdf_params', 'TEXT')
+        self._ensure_column(cursor, 'master_auth', 'wrapped_key', 'BLOB')
+        self._ensure_column(cursor, 'master_auth', 'key_version', 'INTEGER NOT NULL DEFAULT 0')
+        self._ensure_column(cursor, 'master_auth', 'pending_wrapped_key', 'BLOB')
+        self._ensure_column(cursor, 'master_auth', 'pending_key_version', 'INTEGER')
+        
+        self._ensure_column(cursor, 'passwords', 'format_version', 'INTEGER NOT NULL DEFAULT 1')
+        self._ensure_column(cursor, 'passwords', 'envelope', 'BLOB')
+        self._ensure_column(cursor, 'passwords', 'secret_envelope', 'BLOB')
+        self._ensure_column(cursor, 'passwords', 'key_version', 'INTEGER NOT NULL DEFAULT 0')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_passwords_format ON passwords(format_version)')
+        
+        # Keyed password fingerprints for reuse detection, NULL until computed
+        self._ensure_column(cursor, 'passwords', 'fingerprint', 'BLOB')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_passwords_fingerprint ON passwords(fingerprint)')
+        
+        # Older versions kept a keyed n-gram search index here. Unlocked
+        # searches always run on the session cache, so it was never read,
+        # and its token frequencies revealed which trigrams are common
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='search_index'")
+        drop_search_index = cursor.fetchone() is not None
+        if drop_search_index:
+            cursor.execute('DROP TABLE search_index')
+        
+        # Progress of interrupted streaming imports, keyed by backup file id
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS import_checkpoints (
+                file_id TEXT PRIMARY KEY,
+                file_path TEXT,
+                next_chunk INTEGER NOT NULL,
+                entries_done INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
         # Settings table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS settings (
@@ -113,42 +337,333 @@ class DatabaseManager:
             )
         ''')
         
+        if drop_search_index:
+            cursor.execute("DELETE FROM settings WHERE key='search_index_check'")
         self.conn.commit()
+        if drop_search_index:
+            # Rewrite the file so the dropped tokens do not linger in free pages
+            self.conn.execute('VACUUM')
+        
+        # Apply the vault's storage profile before any real work happens
+        cursor.execute("SELECT value FROM settings WHERE key='storage_profile'")
+        row = cursor.fetchone()
+        if row and row[0] in STORAGE_PROFILES:
+            self.storage_profile = row[0]
+        self._apply_storage_profile(self.conn)
+    
+    def connect(self, timeout: float = 5.0):
+        """Open an extra connection configured with the vault's storage profile"""
+        conn = sqlite3.connect(self.db_path, timeout=timeout)
+        self._apply_storage_profile(conn)
+        return conn
     
-    def set_master_password(self, password: str):
-        """Set initial master password"""
-        hashed, salt = self.security.hash_master_password(password)
+    def _apply_storage_profile(self, conn):
+        """Set journal, sync, mmap and cache pragmas for the current profile"""
+        profile = STORAGE_PROFILES[self.storage_profile]
+        conn.execute(f"PRAGMA journal_mode={profile['journal_mode']}")
+        conn.execute(f"PRAGMA synchronous={profile['synchronous']}")
+        conn.execute(f"PRAGMA mmap_size={int(profile['mmap_size'])}")
+        conn.execute(f"PRAGMA cache_size={int(profile['cache_size'])}")
+        conn.execute(f"PRAGMA temp_store={profile['temp_store']}")
+    
+    def get_storage_profile(self) -> str:
+        """Name of the storage profile in use for this vault"""
+        return self.storage_profile
+    
+    def set_storage_profile(self, name: str):
+        """Persist a storage profile for this vault and apply it immediately
+        
+        Background connections opened later pick it up as well; ones that
+        are already open keep their settings until they reconnect.
+        """
+        if name not in STORAGE_PROFILES:
+            raise ValueError(f"Unknown storage profile: {name}")
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES ('storage_profile', ?)", (name,)
+        )
+        self._commit("Storage profile changed", f"Profile: {name}")
+        self.storage_profile = name
+        self._apply_storage_profile(self.conn)
+    
+    def _ensure_column(self, cursor, table: str, column: str, definition: str):
+        """Add a column to an existing table if an older schema lacks it"""
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    
+    def set_master_password(self, password: str, kdf_algorithm: str = None, kdf_params: dict = None):
+        """Set initial master password and create a random data key
+        
+        Without explicit KDF settings the configured KDF is calibrated to
+        KDF_TARGET_SECONDS on this machine.
+        """
+        kdf_algorithm = kdf_algorithm or KDF_ALGORITHM
+        kdf_params = kdf_params or kdf.calibrate(kdf_algorithm, KDF_TARGET_SECONDS)
         encryption_salt = self.security.generate_salt()
+        verifier, kek, _ = self.security.derive_unlock_keys(password, encryption_salt,
+                                                            kdf_algorithm, kdf_params)
+        data_key = self.security.generate_data_key()
         
         cursor = self.conn.cursor()
         cursor.execute('DELETE FROM master_auth')  # Remove any existing
         cursor.execute(
-            'INSERT INTO master_auth (password_hash, salt) VALUES (?, ?)',
-            (hashed, encryption_salt)
+            'INSERT INTO master_auth (salt, auth_verifier, kdf_algorithm, kdf_params, wrapped_key, key_version) '
+            'VALUES (?, ?, ?, ?, ?, 0)',
+            (encryption_salt, verifier, kdf_algorithm, json.dumps(kdf_params),
+             self.security.wrap_key(kek, data_key))
         )
-        self.conn.commit()
         
         # Setup encryption
-        self.security.setup_encryption(password, encryption_salt)
-        self.log_activity("Master password set", "Initial setup")
+        self.security.kek = kek
+        self.security.set_data_key(data_key)
+        self.key_version = 0
+        # Rows of a new vault are fingerprinted as they are written
+        cursor.execute(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES ('fingerprint_check', ?)",
+            (self._fingerprint_check(),)
+        )
+        self._commit("Master password set", "Initial setup")
+        self._entry_cache = {}
+        self.start_fuzzy_index_build()
     
-    def verify_master_password(self, password: str) -> bool:
-        """Verify master password and setup encryption"""
+    def _authenticate(self, password: str):
+        """Check a master password with a single KDF pass
+        
+        Returns (kek, password_key, auth_row) on success or None. Vaults
+        still using a bcrypt hash plus a separate PBKDF2 are checked the
+        old way once and then switched to the single-KDF verifier, reusing
+        the PBKDF2 output that unlocking computes anyway. Vaults without a
+        stored KDF setting get the legacy one pinned.
+        """
         cursor = self.conn.cursor()
-        cursor.execute('SELECT password_hash, salt FROM master_auth LIMIT 1')
-        result = cursor.fetchone()
+        cursor.execute('''
+            SELECT password_hash, salt, auth_verifier, kdf_algorithm, kdf_params,
+                   wrapped_key, key_version, pending_wrapped_key
+            FROM master_auth LIMIT 1
+        ''')
+        row = cursor.fetchone()
+        if not row:
+            return None
+        (password_hash, salt, auth_verifier, kdf_algorithm, kdf_params,
+         wrapped_key, key_version, pending_wrapped_key) = row
+        kdf_algorithm = kdf_algorithm or kdf.LEGACY_ALGORITHM
+        kdf_params = json.loads(kdf_params) if kdf_params else kdf.LEGACY_PARAMS
+        
+        if auth_verifier is None:
+            if not self.security.verify_master_password(password, password_hash):
+                return None
+            verifier, kek, password_key = self.security.derive_unlock_keys(password, salt,
+                                                                           kdf_algorithm, kdf_params)
+            cursor.execute(
+                'UPDATE master_auth SET auth_verifier=?, password_hash=NULL, kdf_algorithm=?, kdf_params=?',
+                (verifier, kdf_algorithm, json.dumps(kdf_params))
+            )
+            self._commit("Unlock scheme upgraded", "Single-KDF verifier replaces bcrypt hash")
+        else:
+            verifier, kek, password_key = self.security.derive_unlock_keys(password, salt,
+                                                                           kdf_algorithm, kdf_params)
+            if not self.security.check_verifier(verifier, auth_verifier):
+                return None
         
+        return kek, password_key, {
+            'salt': salt,
+            'kdf_algorithm': kdf_algorithm,
+            'kdf_params': kdf_params,
+            'wrapped_key': wrapped_key,
+            'key_version': key_version,
+            'pending_wrapped_key': pending_wrapped_key
+        }
+    
+    def verify_master_password(self, password: str) -> bool:
+        """Verify master password and setup encryption"""
+        result = self._authenticate(password)
         if not result:
+            self.log_activity("Failed login attempt", "Invalid master password")
             return False
         
-        hashed, salt = result
-        if self.security.verify_master_password(password, hashed):
-            self.security.setup_encryption(password, salt)
-            self.log_activity("Successful login", "Master password verified")
-            return True
+        kek, password_key, auth = result
+        self._unlock_data_key(kek, password_key, auth['wrapped_key'], auth['key_version'])
+        if auth['pending_wrapped_key'] is not None:
+            # A data key rotation was interrupted, finish it first
+            self.rotate_data_key()
+        if self._entry_cache is None:
+            self.list_entries()
+        self.start_fuzzy_index_build()
+        self.log_activity("Successful login", "Master password verified")
+        return True
+    
+    def _unlock_data_key(self, kek: bytes, password_key: bytes, wrapped_key, key_version: int):
+        """Unwrap the data key, upgrading vaults keyed directly by the password"""
+        if wrapped_key is None:
+            # Older vaults used the password-derived key as the data key;
+            # keep it (so existing rows stay readable) and wrap it from now on
+            data_key = password_key
+            cursor = self.conn.cursor()
+            cursor.execute('UPDATE master_auth SET wrapped_key=?',
+                           (self.security.wrap_key(kek, data_key),))
+            self._commit("Envelope key enabled", "Data key wrapped by master password")
         else:
-            self.log_activity("Failed login attempt", "Invalid master password")
+            data_key = self.security.unwrap_key(kek, wrapped_key)
+        
+        self.security.kek = kek
+        self.security.set_data_key(data_key)
+        self.key_version = key_version
+    
+    def change_master_password(self, current_password: str, new_password: str,
+                               kdf_algorithm: str = None, kdf_params: dict = None) -> bool:
+        """Change the master password by re-wrapping the data key
+        
+        Stored entries, fingerprints and existing backups are
+        untouched because the data key itself does not change. The KDF
+        setting is kept unless a new one is given. Returns False if
+        current_password is wrong.
+        """
+        return self._rewrap_data_key(current_password, new_password, kdf_algorithm, kdf_params,
+                                     "Master password changed", "Data key re-wrapped",
+                                     "Failed master password change")
+    
+    def _rewrap_data_key(self, current_password, new_password, kdf_algorithm, kdf_params,
+                         action, details, failed_action) -> bool:
+        """Wrap the data key under keys derived from new_password and log action (or failed_action)"""
+        result = self._authenticate(current_password)
+        if not result:
+            self.log_activity(failed_action, "Invalid current password")
             return False
+        
+        old_kek, password_key, auth = result
+        if auth['wrapped_key'] is None:
+            self._unlock_data_key(old_kek, password_key, None, auth['key_version'])
+            data_key = self.security.key
+        else:
+            data_key = self.security.unwrap_key(old_kek, auth['wrapped_key'])
+        
+        kdf_algorithm = kdf_algorithm or auth['kdf_algorithm']
+        kdf_params = kdf_params or auth['kdf_params']
+        new_salt = self.security.generate_salt()
+        new_verifier, new_kek, _ = self.security.derive_unlock_keys(new_password, new_salt,
+                                                                    kdf_algorithm, kdf_params)
+        
+        new_pending = None
+        if auth['pending_wrapped_key'] is not None:
+            new_pending = self.security.wrap_key(
+                new_kek, self.security.unwrap_key(old_kek, auth['pending_wrapped_key']))
+        
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'UPDATE master_auth SET password_hash=NULL, salt=?, auth_verifier=?, kdf_algorithm=?, '
+            'kdf_params=?, wrapped_key=?, pending_wrapped_key=?',
+            (new_salt, new_verifier, kdf_algorithm, json.dumps(kdf_params),
+             self.security.wrap_key(new_kek, data_key), new_pending)
+        )
+        self._commit(action, details)
+        self.security.kek = new_kek
+        return True
+    
+    def get_kdf_settings(self) -> tuple:
+        """Return the vault's (KDF algorithm, parameters)"""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT kdf_algorithm, kdf_params FROM master_auth LIMIT 1')
+        row = cursor.fetchone()
+        if not row or not row[0]:
+            return kdf.LEGACY_ALGORITHM, dict(kdf.LEGACY_PARAMS)
+        return row[0], json.loads(row[1])
+    
+    def set_kdf_settings(self, password: str, kdf_algorithm: str, kdf_params: dict) -> bool:
+        """Re-derive the unlock keys with a new KDF setting; False if password is wrong"""
+        return self._rewrap_data_key(password, password, kdf_algorithm, kdf_params,
+                                     "KDF settings changed", kdf.describe(kdf_algorithm, kdf_params),
+                                     "Failed KDF settings change")
+    
+    def rotate_data_key(self, progress_callback=None, batch_size=MIGRATION_BATCH_SIZE) -> int:
+        """Re-encrypt every entry under a fresh data key
+        
+        The new key is stored wrapped in master_auth as a pending key
+        before any row is touched. Rows are then re-encrypted in batches,
+        each committed with the row's key_version set to the pending
+        version, which doubles as the checkpoint. If the process dies
+        part way, the next unlock calls this again and it continues with
+        the rows still on the old key. Backups exported under the old
+        key can no longer be imported afterwards.
+        
+        If a batch fails, the rows already rewritten are under the new key
+        while this session still holds the old one, so the session is
+        locked and its keys dropped before the error is raised; unlocking
+        again resumes the rotation.
+        
+        Returns the number of rows re-encrypted by this call.
+        """
+        self.stop_background_migration()
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT key_version, pending_wrapped_key, pending_key_version FROM master_auth LIMIT 1')
+        key_version, pending_wrapped_key, pending_version = cursor.fetchone()
+        
+        if pending_wrapped_key is None:
+            new_key = self.security.generate_data_key()
+            pending_version = key_version + 1
+            cursor.execute(
+                'UPDATE master_auth SET pending_wrapped_key=?, pending_key_version=?',
+                (self.security.wrap_key(self.security.kek, new_key), pending_version)
+            )
+            self._commit("Data key rotation started", f"Key version: {pending_version}")
+        else:
+            new_key = self.security.unwrap_key(self.security.kek, pending_wrapped_key)
+        
+        new_security = SecurityManager(self.db_path)
+        new_security.set_data_key(new_key)
+        
+        done = 0
+        try:
+            cursor.execute('SELECT COUNT(*) FROM passwords WHERE key_version != ?', (pending_version,))
+            total = cursor.fetchone()[0]
+            while True:
+                cursor.execute('''
+                    SELECT id, service, username, password, notes, format_version, envelope, secret_envelope
+                    FROM passwords WHERE key_version != ? LIMIT ?
+                ''', (pending_version, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+            
+                updates = []
+                for id_, service, username, password, notes, format_version, envelope, secret_envelope in rows:
+                    fields = self._decrypt_fields(format_version, envelope, secret_envelope,
+                                                  (service, username, password, notes))
+                    updates.append((ROW_FORMAT_V3, *new_security.encrypt_row(fields), pending_version,
+                                    new_security.password_fingerprint(fields[2]), id_))
+                cursor.executemany('''
+                    UPDATE passwords
+                    SET service='', username='', password='', notes='', format_version=?, envelope=?,
+                        secret_envelope=?, key_version=?, fingerprint=?
+                    WHERE id=?
+                ''', updates)
+                self._commit()
+            
+                done += len(updates)
+                if progress_callback:
+                    progress_callback(done, total)
+        
+            cursor.execute('''
+                UPDATE master_auth
+                SET wrapped_key=pending_wrapped_key, key_version=pending_key_version,
+                    pending_wrapped_key=NULL, pending_key_version=NULL
+            ''')
+            # Every row was re-fingerprinted with the new key as it was rewritten
+            cursor.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES ('fingerprint_check', ?)",
+                (self._fingerprint_check(new_security),)
+            )
+            self._commit("Data key rotated", f"Key version: {pending_version}, Rows re-encrypted: {done}")
+        except Exception as e:
+            self.conn.rollback()
+            self.lock()
+            self.security.clear_keys()
+            raise RuntimeError(f"Data key rotation stopped after {done} entries and the vault was locked: "
+                               f"{str(e) or type(e).__name__}") from e
+        
+        self.security.set_data_key(new_key)
+        self.key_version = pending_version
+        return done
     
     def has_master_password(self) -> bool:
         """Check if master password is set"""
@@ -157,100 +672,502 @@ class DatabaseManager:
         return cursor.fetchone()[0] > 0
     
     def add_password(self, service: str, username: str, password: str, notes: str = ""):
-        """Add new password entry"""
-        encrypted_service = self.security.encrypt_data(service)
-        encrypted_username = self.security.encrypt_data(username)
-        encrypted_password = self.security.encrypt_data(password)
-        encrypted_notes = self.security.encrypt_data(notes)
+        """Add new password entry and return it as a listing entry"""
+        envelope, secret_envelope = self.security.encrypt_row((service, username, password, notes))
         
         cursor = self.conn.cursor()
         cursor.execute('''
-            INSERT INTO passwords (service, username, password, notes)
-            VALUES (?, ?, ?, ?)
-        ''', (encrypted_service, encrypted_username, encrypted_password, encrypted_notes))
+            INSERT INTO passwords (service, username, password, notes, format_version, envelope, secret_envelope,
+                                   key_version, fingerprint)
+            VALUES ('', '', '', '', ?, ?, ?, ?, ?)
+        ''', (ROW_FORMAT_V3, envelope, secret_envelope, self.key_version,
+              self.security.password_fingerprint(password)))
+        id_ = cursor.lastrowid
+        cursor.execute('SELECT created_at, updated_at FROM passwords WHERE id=?', (id_,))
+        created_at, updated_at = cursor.fetchone()
         
-        self.conn.commit()
-        self.log_activity("Password added", f"Service: {service}")
-        return cursor.lastrowid
+        self._commit("Password added", f"Service: {service}")
+        entry = self._listing_entry(id_, service, username, created_at, updated_at)
+        self._cache_entry(entry)
+        return entry
     
     def get_all_passwords(self):
-        """Get all password entries"""
+        """Get all password entries, including decrypted passwords and notes"""
         cursor = self.conn.cursor()
-        cursor.execute('SELECT id, service, username, password, notes, created_at, updated_at FROM passwords')
-        results = cursor.fetchall()
+        cursor.execute(f'SELECT {ENTRY_COLUMNS} FROM passwords ORDER BY id')
         
         decrypted_results = []
-        for row in results:
-            id_, service, username, password, notes, created_at, updated_at = row
-            decrypted_results.append({
-                'id': id_,
-                'service': self.security.decrypt_data(service),
-                'username': self.security.decrypt_data(username),
-                'password': self.security.decrypt_data(password),
-                'notes': self.security.decrypt_data(notes),
-                'created_at': created_at,
-                'updated_at': updated_at
-            })
+        for chunk in self._decrypt_chunks(cursor):
+            decrypted_results.extend(chunk)
         
         return decrypted_results
     
+    def iter_password_chunks(self):
+        """Yield chunks of fully decrypted entries, so callers never hold the whole vault"""
+        cursor = self.conn.cursor()
+        cursor.execute(f'SELECT {ENTRY_COLUMNS} FROM passwords ORDER BY id')
+        yield from self._decrypt_chunks(cursor)
+    
+    def find_breached_passwords(self, breach_db, progress_callback=None):
+        """Check every stored password against an offline breach database
+        
+        Rows are decrypted a chunk at a time and each password is dropped
+        as soon as it has been looked up. Returns the breached entries as
+        listing entries with an added breach_count.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM passwords')
+        total = cursor.fetchone()[0]
+        cursor.execute(f'SELECT {ENTRY_COLUMNS} FROM passwords ORDER BY id')
+        
+        breached = []
+        done = 0
+        for chunk in self._decrypt_chunks(cursor):
+            for entry in chunk:
+                breach_count = breach_db.check(entry['password'])
+                if breach_count:
+                    listing = self._listing_entry(entry['id'], entry['service'], entry['username'],
+                                                  entry['created_at'], entry['updated_at'])
+                    listing['breach_count'] = breach_count
+                    breached.append(listing)
+            done += len(chunk)
+            if progress_callback:
+                progress_callback(done, total)
+        
+        self.log_activity("Breach check", f"Checked: {done}, Breached: {len(breached)}")
+        return breached
+    
+    def list_entries(self):
+        """Get all entries with only the listing columns decrypted
+        
+        Returned dicts carry id, service, username and timestamps. Use
+        get_secret() to fetch the password and notes of a single entry.
+        """
+        if self._entry_cache is not None:
+            self.cache_hits += 1
+            return list(self._entry_cache.values())
+        
+        self.cache_misses += 1
+        cursor = self.conn.cursor()
+        cursor.execute(f'SELECT {LISTING_COLUMNS} FROM passwords ORDER BY id')
+        
+        entries = []
+        for chunk in self._decrypt_chunks(cursor, secrets=False):
+            entries.extend(chunk)
+        
+        self._entry_cache = {entry['id']: entry for entry in entries}
+        return entries
+    
+    def get_secret(self, id_: int):
+        """Decrypt the password and notes of one entry on demand"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'SELECT password, notes, format_version, envelope, secret_envelope FROM passwords WHERE id=?', (id_,)
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        password, notes, format_version, envelope, secret_envelope = row
+        if format_version == ROW_FORMAT_V3:
+            password, notes = self.security.decrypt_entry(secret_envelope, SECRET_AAD)
+        elif format_version == ROW_FORMAT_V2:
+            password, notes = self.security.decrypt_entry(envelope)[2:4]
+        else:
+            password, notes = self._decrypt_fields(format_version, None, None, (password, notes))
+        return {'password': password, 'notes': notes}
+    
+    def _listing_entry(self, id_: int, service: str, username: str, created_at, updated_at) -> dict:
+        """Build the listing-entry dict returned by list_entries and the write methods"""
+        return {
+            'id': id_,
+            'service': service,
+            'username': username,
+            'created_at': created_at,
+            'updated_at': updated_at
+        }
+    
+    def _cache_entry(self, entry: dict):
+        """Store a freshly written entry in the session cache and fuzzy index"""
+        if self._entry_cache is None:
+            return
+        self._entry_cache[entry['id']] = entry
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.add(entry['id'], entry['service'], entry['username'])
+    
+    def clear_cache(self):
+        """Drop all decrypted entries held by the session cache and the fuzzy index"""
+        if self._entry_cache is not None:
+            self._entry_cache.clear()
+        self._entry_cache = None
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.clear()
+        self.fuzzy_index = None
+    
+    def start_fuzzy_index_build(self):
+        """Build the ranked fuzzy index from the listing cache on a background thread
+        
+        Searches fall back to substring matching until the build finishes;
+        writes made meanwhile are applied to the index as usual.
+        """
+        if self._entry_cache is None:
+            self.list_entries()
+        index = FuzzyIndex()
+        self.fuzzy_index = index
+        threading.Thread(target=index.build, args=(list(self._entry_cache.values()),),
+                         name="securepass-fuzzy-index", daemon=True).start()
+    
+    def fuzzy_index_ready(self) -> bool:
+        """Whether ranked fuzzy search is available"""
+        return self.fuzzy_index is not None and self.fuzzy_index.ready
+    
+    def fuzzy_search(self, query: str, limit: int = None):
+        """Ranked [(entry, score)] matches from the fuzzy index, best first"""
+        if not self.fuzzy_index_ready():
+            return []
+        return [(self._entry_cache[entry_id], score)
+                for entry_id, score in self.fuzzy_index.search(query, limit)
+                if entry_id in self._entry_cache]
+    
+    def get_cache_stats(self) -> dict:
+        """Return session cache hit/miss counters"""
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'entries': len(self._entry_cache) if self._entry_cache is not None else 0
+        }
+    
+    def _decrypt_row(self, row, secrets=True):
+        """Decrypt a single password row into an entry dict
+        
+        With secrets=False only service and username are decrypted and
+        password/notes are left out; v3 rows keep their secret envelope
+        sealed.
+        """
+        (id_, service, username, password, notes, created_at, updated_at,
+         format_version, envelope, secret_envelope) = row
+        if not secrets:
+            service, username = self._decrypt_fields(format_version, envelope, None, (service, username),
+                                                     secrets=False)[:2]
+            return self._listing_entry(id_, service, username, created_at, updated_at)
+        
+        service, username, password, notes = self._decrypt_fields(
+            format_version, envelope, secret_envelope, (service, username, password, notes))
+        return {
+            'id': id_,
+            'service': service,
+            'username': username,
+            'password': password,
+            'notes': notes,
+            'created_at': created_at,
+            'updated_at': updated_at
+        }
+    
+    def _decrypt_fields(self, format_version, envelope, secret_envelope, columns, secrets=True):
+        """Decrypt entry fields stored in any row format
+        
+        With secrets=False the caller only needs service and username,
+        and the secret envelope of a v3 row is not opened.
+        """
+        if format_version == ROW_FORMAT_V3:
+            fields = self.security.decrypt_entry(envelope, LISTING_AAD)
+            if secrets:
+                fields += self.security.decrypt_entry(secret_envelope, SECRET_AAD)
+            return fields
+        if format_version == ROW_FORMAT_V2:
+            return self.security.decrypt_entry(envelope)
+        return tuple(self.security.decrypt_data(column) for column in columns)
+    
+    def _decrypt_batch(self, rows, secrets=True):
+        """Decrypt a batch of password rows"""
+        return [self._decrypt_row(row, secrets) for row in rows]
+    
+    def _decrypt_chunks(self, cursor, secrets=True):
+        """Fetch rows from cursor in chunks and yield decrypted chunks in order
+        
+        Decryption stays on the calling thread: AES-GCM and Fernet hold
+        the GIL for small fields, so a thread pool measured slower than
+        serial decryption.
+        """
+        while True:
+            rows = cursor.fetchmany(self.decrypt_chunk_size)
+            if not rows:
+                return
+            yield self._decrypt_batch(rows, secrets)
+    
     def search_passwords(self, query: str):
-        """Search passwords by service or username"""
-        all_passwords = self.get_all_passwords()
-        query_lower = query.lower()
+        """Search entries by service or username (listing columns only)
         
+        Once the fuzzy index is built, results are ranked best first and
+        tolerate typos; before that they are exact substring matches over
+        the session cache.
+        """
+        if len(query) >= FUZZY_GRAM and self.fuzzy_index_ready():
+            return [entry for entry, _ in self.fuzzy_search(query)]
+        return self.filter_entries(self.list_entries(), query)
+    
+    def filter_entries(self, entries, query: str):
+        """Entries whose service or username contains query (case-insensitive)"""
+        query_lower = query.lower()
         filtered = []
-        for entry in all_passwords:
+        for entry in entries:
             if (query_lower in entry['service'].lower() or 
                 query_lower in entry['username'].lower()):
                 filtered.append(entry)
         
         return filtered
     
+    def _fingerprint_check(self, security=None) -> str:
+        """Fingerprint of the current fingerprint key, used to detect key changes"""
+        return (security or self.security).password_fingerprint("\x00check").hex()
+    
+    def ensure_fingerprints(self, progress_callback=None, batch_size=MIGRATION_BATCH_SIZE) -> int:
+        """Compute fingerprints for rows that have none, in committed batches
+        
+        New and updated rows get their fingerprint on write, so this only
+        has work to do for rows written before fingerprints existed, or
+        after the fingerprint key changed. Returns the number of rows
+        fingerprinted.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT value FROM settings WHERE key='fingerprint_check'")
+        row = cursor.fetchone()
+        if not row or row[0] != self._fingerprint_check():
+            cursor.execute('UPDATE passwords SET fingerprint=NULL')
+            cursor.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES ('fingerprint_check', ?)",
+                (self._fingerprint_check(),)
+            )
+            self._commit()
+        
+        cursor.execute('SELECT COUNT(*) FROM passwords WHERE fingerprint IS NULL')
+        total = cursor.fetchone()[0]
+        done = 0
+        while done < total:
+            cursor.execute(f'SELECT {ENTRY_COLUMNS} FROM passwords WHERE fingerprint IS NULL LIMIT ?',
+                           (batch_size,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            cursor.executemany(
+                'UPDATE passwords SET fingerprint=? WHERE id=?',
+                [(self.security.password_fingerprint(entry['password']), entry['id'])
+                 for entry in self._decrypt_batch(rows)]
+            )
+            self._commit()
+            done += len(rows)
+            if progress_callback:
+                progress_callback(done, total)
+        return done
+    
+    def find_reused_passwords(self, progress_callback=None):
+        """Group entries that share a password, without decrypting any of them
+        
+        One pass over the stored fingerprints groups ids through a dict;
+        names come from the listing cache. Returns clusters (lists of
+        listing entries) of two or more entries, largest first.
+        """
+        self.ensure_fingerprints(progress_callback)
+        
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT id, fingerprint FROM passwords WHERE fingerprint IS NOT NULL')
+        groups = {}
+        for id_, fingerprint in cursor:
+            groups.setdefault(fingerprint, []).append(id_)
+        
+        reused = [ids for ids in groups.values() if len(ids) > 1]
+        if not reused:
+            return []
+        
+        entries = {entry['id']: entry for entry in self.list_entries()}
+        clusters = [sorted((entries[id_] for id_ in ids if id_ in entries),
+                           key=lambda entry: (entry['service'].lower(), entry['id']))
+                    for ids in reused]
+        clusters.sort(key=lambda cluster: (-len(cluster), cluster[0]['service'].lower()))
+        return clusters
+    
     def update_password(self, id_: int, service: str, username: str, password: str, notes: str = ""):
-        """Update existing password entry"""
-        encrypted_service = self.security.encrypt_data(service)
-        encrypted_username = self.security.encrypt_data(username)
-        encrypted_password = self.security.encrypt_data(password)
-        encrypted_notes = self.security.encrypt_data(notes)
+        """Update existing password entry; returns the updated listing entry or None"""
+        envelope, secret_envelope = self.security.encrypt_row((service, username, password, notes))
         
         cursor = self.conn.cursor()
         cursor.execute('''
             UPDATE passwords 
-            SET service=?, username=?, password=?, notes=?, updated_at=CURRENT_TIMESTAMP
+            SET service='', username='', password='', notes='', format_version=?, envelope=?, secret_envelope=?,
+                key_version=?, fingerprint=?, updated_at=CURRENT_TIMESTAMP
             WHERE id=?
-        ''', (encrypted_service, encrypted_username, encrypted_password, encrypted_notes, id_))
+        ''', (ROW_FORMAT_V3, envelope, secret_envelope, self.key_version,
+              self.security.password_fingerprint(password), id_))
+        row = None
+        if cursor.rowcount:
+            cursor.execute('SELECT created_at, updated_at FROM passwords WHERE id=?', (id_,))
+            row = cursor.fetchone()
+        if not row:
+            # End the implicit transaction the no-op UPDATE opened
+            self.conn.rollback()
+            return None
         
-        self.conn.commit()
-        self.log_activity("Password updated", f"ID: {id_}, Service: {service}")
-        return cursor.rowcount > 0
+        self._commit("Password updated", f"ID: {id_}, Service: {service}")
+        entry = self._listing_entry(id_, service, username, *row)
+        self._cache_entry(entry)
+        return entry
     
     def delete_password(self, id_: int):
-        """Delete password entry"""
-        # Get service name for logging before deletion
+        """Delete password entry; returns the removed listing entry or None
+        
+        The service name for the log comes from the session cache, or else
+        from the row read just before it is deleted.
+        """
         cursor = self.conn.cursor()
-        cursor.execute('SELECT service FROM passwords WHERE id=?', (id_,))
-        result = cursor.fetchone()
+        cursor.execute(
+            'SELECT service, username, format_version, envelope, created_at, updated_at FROM passwords WHERE id=?',
+            (id_,)
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        
+        entry = self._entry_cache.get(id_) if self._entry_cache is not None else None
+        if entry is not None:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+            service, username = self._decrypt_fields(row[2], row[3], None, row[:2], secrets=False)[:2]
+            entry = self._listing_entry(id_, service, username, row[4], row[5])
         
-        if result:
-            service = self.security.decrypt_data(result[0])
+        try:
             cursor.execute('DELETE FROM passwords WHERE id=?', (id_,))
-            self.conn.commit()
-            self.log_activity("Password deleted", f"ID: {id_}, Service: {service}")
-            return True
-        return False
+            self._commit("Password deleted", f"ID: {id_}, Service: {entry['service']}")
+        except Exception:
+            self.conn.rollback()
+            raise
+        
+        # Only evict once the row is really gone
+        if self._entry_cache is not None:
+            self._entry_cache.pop(id_, None)
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.remove(id_)
+        return entry
     
-    def log_activity(self, action: str, details: str = ""):
-        """Log activity to database"""
+    def count_legacy_rows(self) -> int:
+        """Count password rows stored in a format older than v3"""
         cursor = self.conn.cursor()
-        cursor.execute(
-            'INSERT INTO activity_log (action, details) VALUES (?, ?)',
-            (action, details)
+        cursor.execute('SELECT COUNT(*) FROM passwords WHERE format_version < ?', (ROW_FORMAT_V3,))
+        return cursor.fetchone()[0]
+    
+    def migrate_legacy_rows(self, conn=None, batch_size=MIGRATION_BATCH_SIZE) -> int:
+        """Convert one batch of v1 and v2 rows to the split v3 envelopes
+        
+        Each batch is committed on its own so the vault stays usable while a
+        migration is running. Rows changed concurrently are skipped because
+        the UPDATE only matches rows that are still in their old format.
+        Returns the number of rows converted.
+        """
+        conn = conn or self.conn
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, service, username, password, notes, format_version, envelope
+            FROM passwords WHERE format_version < ? LIMIT ?
+        ''', (ROW_FORMAT_V3, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            return 0
+        
+        updates = []
+        for id_, service, username, password, notes, format_version, envelope in rows:
+            fields = self._decrypt_fields(format_version, envelope, None, (service, username, password, notes))
+            updates.append((ROW_FORMAT_V3, *self.security.encrypt_row(fields), id_, format_version))
+        
+        cursor.executemany('''
+            UPDATE passwords
+            SET service='', username='', password='', notes='', format_version=?, envelope=?, secret_envelope=?
+            WHERE id=? AND format_version=?
+        ''', updates)
+        conn.commit()
+        return len(updates)
+    
+    def start_background_migration(self, batch_size=MIGRATION_BATCH_SIZE):
+        """Start migrating v1 and v2 rows to v3 on a background thread"""
+        if self._migration_thread and self._migration_thread.is_alive():
+            return False
+        if not self.count_legacy_rows():
+            return False
+        
+        self._migration_stop.clear()
+        self._migration_error = None
+        self._migration_thread = threading.Thread(
+            target=self._run_migration, args=(batch_size,),
+            name="securepass-migration", daemon=True
         )
-        self.conn.commit()
+        self._migration_thread.start()
+        return True
+    
+    def stop_background_migration(self):
+        """Stop a running background migration after its current batch"""
+        self._migration_stop.set()
+        if self._migration_thread and self._migration_thread.is_alive():
+            self._migration_thread.join()
+        self._migration_thread = None
+    
+    def wait_for_migration(self):
+        """Block until the background migration ends, re-raising its failure
+        
+        Rows it had not reached stay in their old, still readable format
+        and are picked up by the next migration.
+        """
+        thread = self._migration_thread
+        if thread:
+            thread.join()
+        error = self._migration_error
+        if error:
+            raise RuntimeError(f"Row format migration failed: {str(error) or type(error).__name__}") from error
+    
+    def _run_migration(self, batch_size):
+        """Background migration loop using its own connection"""
+        conn = self.connect(timeout=30)
+        migrated = 0
+        try:
+            while not self._migration_stop.is_set():
+                converted = self.migrate_legacy_rows(conn, batch_size)
+                if not converted:
+                    break
+                migrated += converted
+            conn.execute(
+                'INSERT INTO activity_log (action, details) VALUES (?, ?)',
+                ("Row format migration", f"Rows converted to v3: {migrated}")
+            )
+            conn.commit()
+        except Exception as e:
+            self._migration_error = e
+            self.log_activity("Row format migration failed", f"Rows converted to v3: {migrated}, Error: {str(e)}")
+        finally:
+            conn.close()
+    
+    def log_activity(self, action: str, details: str = ""):
+        """Queue an activity log event for the next batched flush"""
+        self.activity_log.append(action, details)
+    
+    def _commit(self, action: str = None, details: str = ""):
+        """Commit the current transaction together with pending log events
+        
+        An optional action/details pair is logged as part of this
+        transaction, so it is only recorded if the commit succeeds.
+        """
+        extra = [(action, details)] if action else []
+        events = self.activity_log.drain_into(self.conn.cursor(), extra)
+        try:
+            self.conn.commit()
+        except Exception:
+            self.activity_log.requeue(events)
+            raise
+        self.activity_log.record_flush(events)
+    
+    def get_log_stats(self) -> dict:
+        """Return activity log writer counters (pending events, flush latency)"""
+        return self.activity_log.get_stats()
     
     def get_activity_log(self, limit: int = 50):
         """Get recent activity log"""
+        self.activity_log.flush(self.conn)
         cursor = self.conn.cursor()
         cursor.execute(
             'SELECT action, details, timestamp FROM activity_log ORDER BY timestamp DESC LIMIT ?',
@@ -259,56 +1176,212 @@ class DatabaseManager:
         return cursor.fetchall()
     
     def export_data(self, file_path: str):
-        """Export encrypted data to file"""
-        passwords = self.get_all_passwords()
-        # Re-encrypt for export (passwords are already decrypted in get_all_passwords)
-        export_data = {
-            'passwords': [],
-            'exported_at': datetime.now().isoformat()
-        }
-        
-        for entry in passwords:
-            export_data['passwords'].append({
-                'service': entry['service'],
-                'username': entry['username'],
-                'password': entry['password'],
-                'notes': entry['notes'],
-                'created_at': entry['created_at'],
-                'updated_at': entry['updated_at']
-            })
+        """Export encrypted data to a streaming chunked backup file
         
-        encrypted_export = self.security.encrypt_data(json.dumps(export_data))
-        
-        with open(file_path, 'w') as f:
-            json.dump({'data': encrypted_export}, f)
+        Entries are read from a cursor and written one encrypted chunk at a
+        time, so memory use depends on the chunk size rather than the vault
+        size. The file is written next to the target and moved into place
+        only once the trailer has been written.
+        """
+        temp_path = file_path + '.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                cursor = self.conn.cursor()
+                cursor.execute('SELECT COUNT(*) FROM passwords')
+                writer = ChunkWriter(f, self.security.export_cipher, {
+                    'exported_at': datetime.now().isoformat(),
+                    'count': cursor.fetchone()[0]
+                })
+                cursor.execute(f'SELECT {ENTRY_COLUMNS} FROM passwords ORDER BY id')
+                for chunk in self._decrypt_chunks(cursor):
+                    writer.write_entries([{
+                        'service': entry['service'],
+                        'username': entry['username'],
+                        'password': entry['password'],
+                        'notes': entry['notes'],
+                        'created_at': entry['created_at'],
+                        'updated_at': entry['updated_at']
+                    } for entry in chunk])
+                writer.finish()
+            os.replace(temp_path, file_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
         
         self.log_activity("Data exported", f"File: {file_path}")
     
-    def import_data(self, file_path: str):
-        """Import encrypted data from file"""
+    def read_backup_entries(self, file_path: str):
+        """Yield lists of entries from a streaming or legacy backup file"""
+        if is_stream_backup(file_path):
+            with open(file_path, 'rb') as f:
+                reader = ChunkReader(f, self.security.export_cipher)
+                for _, entries in reader.iter_chunks():
+                    yield entries
+            return
+        
+        # Legacy format: one Fernet token wrapping the whole export
+        with open(file_path, 'r') as f:
+            encrypted_data = json.load(f)
+        yield json.loads(self.security.decrypt_data(encrypted_data['data']))['passwords']
+    
+    def import_data(self, file_path: str, progress_callback=None):
+        """Import encrypted data from file
+        
+        Streaming backups are imported chunk by chunk and can be resumed
+        after an interruption; legacy backups are imported in one
+        transaction. Returns the number of entries imported by this call.
+        """
         try:
-            with open(file_path, 'r') as f:
-                encrypted_data = json.load(f)
-            
-            decrypted_data = json.loads(self.security.decrypt_data(encrypted_data['data']))
-            
-            imported_count = 0
-            for entry in decrypted_data['passwords']:
-                self.add_password(
-                    entry['service'],
-                    entry['username'],
-                    entry['password'],
-                    entry.get('notes', '')
-                )
-                imported_count += 1
-            
-            self.log_activity("Data imported", f"File: {file_path}, Entries: {imported_count}")
-            return imported_count
+            if is_stream_backup(file_path):
+                return self._import_stream(file_path, progress_callback)
+            entries = [entry for chunk in self.read_backup_entries(file_path) for entry in chunk]
+            return self.bulk_add_passwords(entries, progress_callback, source=f"File: {file_path}")
         except Exception as e:
             self.log_activity("Import failed", f"File: {file_path}, Error: {str(e)}")
             raise e
     
+    def _import_stream(self, file_path: str, progress_callback=None):
+        """Import a streaming backup, committing each chunk with a checkpoint
+        
+        Every entry chunk is authenticated, inserted and recorded in
+        import_checkpoints within one transaction. If the import stops
+        part way (crash, corrupted chunk), importing the same file again
+        skips the chunks already committed and carries on from there.
+        """
+        with open(file_path, 'rb') as f:
+            reader = ChunkReader(f, self.security.export_cipher)
+            file_id = reader.file_id.hex()
+            total = reader.header.get('count', 0)
+            
+            checkpoint = self._get_checkpoint(file_id)
+            next_chunk, done = checkpoint if checkpoint else (1, 0)
+            imported = 0
+            if progress_callback and done:
+                progress_callback(done, total)
+            
+            cursor = self.conn.cursor()
+            for index, entries in reader.iter_chunks(start=next_chunk):
+                try:
+                    ids = self._insert_batch(cursor, entries)
+                    done += len(entries)
+                    cursor.execute('''
+                        INSERT OR REPLACE INTO import_checkpoints
+                            (file_id, file_path, next_chunk, entries_done, updated_at)
+                        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    ''', (file_id, file_path, index + 1, done))
+                    self._commit()
+                except Exception:
+                    self.conn.rollback()
+                    raise
+                
+                imported += len(entries)
+                if self._entry_cache is not None and entries:
+                    self._cache_inserted(cursor, ids, entries)
+                if progress_callback:
+                    progress_callback(done, total)
+            
+            if reader.trailer.get('count') != done:
+                raise ValueError(f"Backup declares {reader.trailer.get('count')} entries "
+                                 f"but {done} were imported")
+        
+        cursor.execute('DELETE FROM import_checkpoints WHERE file_id=?', (file_id,))
+        self._commit("Data imported", f"File: {file_path}, Entries: {done}" +
+                     (f", Resumed after: {done - imported}" if checkpoint else ""))
+        return imported
+    
+    def _get_checkpoint(self, file_id: str):
+        """Return (next_chunk, entries_done) for an unfinished import, or None"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'SELECT next_chunk, entries_done FROM import_checkpoints WHERE file_id=?', (file_id,)
+        )
+        return cursor.fetchone()
+    
+    def get_import_checkpoint(self, file_path: str):
+        """Return the resume checkpoint for a streaming backup file, or None"""
+        if not is_stream_backup(file_path):
+            return None
+        with open(file_path, 'rb') as f:
+            file_id = read_file_id(f).hex()
+        checkpoint = self._get_checkpoint(file_id)
+        if not checkpoint:
+            return None
+        return {'next_chunk': checkpoint[0], 'entries_done': checkpoint[1]}
+    
+    def bulk_add_passwords(self, entries, progress_callback=None, batch_size=IMPORT_BATCH_SIZE,
+                           source="Bulk import"):
+        """Add many entries in a single transaction
+        
+        Entries are dicts with service, username, password and optional
+        notes. Batches are encrypted and inserted inside one
+        transaction; nothing is committed until every batch succeeds, and
+        a single summary row is written to the activity log. On failure
+        the whole import is rolled back. progress_callback(done, total)
+        is called after each batch.
+        """
+        entries = list(entries)
+        total = len(entries)
+        cursor = self.conn.cursor()
+        ids = []
+        done = 0
+        
+        try:
+            for start in range(0, total, batch_size):
+                ids.extend(self._insert_batch(cursor, entries[start:start + batch_size]))
+                
+                done = min(total, start + batch_size)
+                if progress_callback:
+                    progress_callback(done, total)
+            
+            self._commit("Data imported", f"{source}, Entries: {total}")
+        except Exception:
+            self.conn.rollback()
+            raise
+        
+        if self._entry_cache is not None and total:
+            self._cache_inserted(cursor, ids, entries)
+        return total
+    
+    def _insert_batch(self, cursor, entries) -> list:
+        """Encrypt and insert a batch of entries (caller commits); returns their ids in order"""
+        ids = []
+        for entry in entries:
+            fields = (entry['service'], entry['username'], entry['password'], entry.get('notes', ''))
+            envelope, secret_envelope = self.security.encrypt_row(fields)
+            cursor.execute('''
+                INSERT INTO passwords (service, username, password, notes, format_version, envelope,
+                                       secret_envelope, key_version, fingerprint)
+                VALUES ('', '', '', '', ?, ?, ?, ?, ?)
+            ''', (ROW_FORMAT_V3, envelope, secret_envelope, self.key_version,
+                  self.security.password_fingerprint(fields[2])))
+            ids.append(cursor.lastrowid)
+        return ids
+    
+    def _cache_inserted(self, cursor, ids, entries):
+        """Add freshly inserted entries, in the order of their ids, to the session cache"""
+        cursor.execute('SELECT id, created_at, updated_at FROM passwords WHERE id BETWEEN ? AND ?',
+                       (min(ids), max(ids)))
+        timestamps = {id_: (created_at, updated_at) for id_, created_at, updated_at in cursor.fetchall()}
+        for id_, entry in zip(ids, entries):
+            self._cache_entry(self._listing_entry(id_, entry['service'], entry['username'], *timestamps[id_]))
+    
+    def lock(self):
+        """Stop background work and wipe decrypted session state"""
+        self.stop_background_migration()
+        self.clear_cache()
+        strength_estimator.clear_cache()
+        self.activity_log.flush(self.conn)
+    
     def close(self):
         """Close database connection"""
+        self.lock()
+        # Stop the flusher, then write anything it had not picked up yet
+        self.activity_log.stop()
+        if self.conn:
+            self.activity_log.flush(self.conn)
+            # Fold the WAL back into the main file so file-level copies
+            # of passwords.db are complete once the app has exited
+            self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
         if self.conn:
             self.conn.close()
@@ -0,0 +1,255 @@
+"""
+In-memory ranked trigram index for SecurePass search
+
+Holds the decrypted service and username of every entry as trigram
+postings (sorted arrays of entry ids), so it only ever exists while the
+vault is unlocked. An entry matches directly when its service or
+username contains the query; these are ranked by trigram coverage, with
+bonuses for exact, prefix and substring hits on the service name. Only
+when nothing matches directly are typos considered: each query word
+must then be within max_edits(word) edits (insertions, deletions,
+substitutions and swapped neighbours) of the start of a word of the
+entry, and at most MAX_TYPO_RESULTS are returned. The edit budget grows
+with word length, so short queries stay strict and long ones do not
+match every entry that shares a common stem.
+
+Lookups use prefix filtering: an entry that shares enough trigrams with
+the query to be within the edit budget must contain at least one of its
+rarest few trigrams, so only those postings are scanned. The remaining
+trigrams are checked per candidate with a binary search (or by scanning
+their postings when that is cheaper), so lookup cost follows the number
+of likely matches rather than vault size.
+"""
+
+import re
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain
+
+GRAM = 3
+MAX_TYPO_RESULTS = 50
+WORD_SEPARATORS = re.compile(r'[^a-z0-9]+')
+
+
+def _text_grams(text: str) -> set:
+    """Trigrams of a stored field, padded so word edges count"""
+    padded = f" {text.lower()} "
+    return {padded[i:i + GRAM] for i in range(len(padded) - GRAM + 1)}
+
+
+def _query_grams(query: str) -> set:
+    """Trigrams of a query, padded at the start only since queries are usually prefixes"""
+    padded = f" {query.lower()}"
+    return {padded[i:i + GRAM] for i in range(len(padded) - GRAM + 1)}
+
+
+def max_edits(word: str) -> int:
+    """Typos tolerated in a query word: none below 4 characters, then one, and two from 8"""
+    if len(word) < 4:
+        return 0
+    return 1 if len(word) < 8 else 2
+
+
+def _words(text: str) -> tuple:
+    return tuple(word for word in WORD_SEPARATORS.split(text) if word)
+
+
+def _prefix_distance(query: str, text: str, limit: int) -> int:
+    """Edit distance (with adjacent swaps) from query to the closest prefix of text
+
+    Returns limit + 1 as soon as the distance is known to exceed limit.
+    """
+    text = text[:len(query) + limit]
+    if len(text) < len(query) - limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(text) + 1))
+    for i in range(1, len(query) + 1):
+        current = [i] + [0] * len(text)
+        for j in range(1, len(text) + 1):
+            cost = query[i - 1] != text[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and query[i - 1] == text[j - 2] and query[i - 2] == text[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[max(0, len(query) - limit):])
+
+
+def _contains(postings, entry_id: int) -> bool:
+    index = bisect_left(postings, entry_id)
+    return index < len(postings) and postings[index] == entry_id
+
+
+class FuzzyIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ready = False
+        # Set by clear(); a build still running then discards its result
+        self.closed = False
+        self._postings = {}  # trigram -> sorted array of entry ids
+        self._fields = {}  # entry id -> (service, username, words) lowercased
+        # Entries written while a background build is running; the build
+        # must not overwrite them with its older snapshot
+        self._written = set()
+
+    def __len__(self):
+        return len(self._fields)
+
+    def build(self, entries):
+        """Index a snapshot of listing entries (may run on a background thread)"""
+        postings = {}
+        fields = {}
+        for entry in sorted(entries, key=lambda entry: entry['id']):
+            entry_id = entry['id']
+            service, username = entry['service'].lower(), entry['username'].lower()
+            fields[entry_id] = (service, username, _words(service) + _words(username))
+            for gram in _text_grams(entry['service']) | _text_grams(entry['username']):
+                postings.setdefault(gram, array('i')).append(entry_id)
+
+        with self.lock:
+            if self.closed:
+                # The vault was locked while this build ran
+                return
+            # Entries written during the build win over the older snapshot
+            written = {entry_id: self._fields.get(entry_id) for entry_id in self._written}
+            self._postings, self._fields = postings, fields
+            for entry_id, current in written.items():
+                self._remove_locked(entry_id)
+                if current:
+                    self._add_locked(entry_id, *current[:2])
+            self._written.clear()
+            self.ready = True
+
+    def add(self, entry_id: int, service: str, username: str):
+        """Index a new or updated entry"""
+        with self.lock:
+            self._remove_locked(entry_id)
+            self._add_locked(entry_id, service, username)
+            if not self.ready:
+                self._written.add(entry_id)
+
+    def remove(self, entry_id: int):
+        """Drop a deleted entry"""
+        with self.lock:
+            self._remove_locked(entry_id)
+            if not self.ready:
+                self._written.add(entry_id)
+
+    def clear(self):
+        """Discard all indexed plaintext for good, including a build still running"""
+        with self.lock:
+            self._postings = {}
+            self._fields = {}
+            self._written.clear()
+            self.ready = False
+            self.closed = True
+
+    def _add_locked(self, entry_id, service, username):
+        service, username = service.lower(), username.lower()
+        self._fields[entry_id] = (service, username, _words(service) + _words(username))
+        for gram in _text_grams(service) | _text_grams(username):
+            postings = self._postings.get(gram)
+            if postings is None:
+                self._postings[gram] = array('i', [entry_id])
+            elif not postings or postings[-1] < entry_id:
+                postings.append(entry_id)
+            else:
+                insort(postings, entry_id)
+
+    def _remove_locked(self, entry_id):
+        fields = self._fields.pop(entry_id, None)
+        if fields is None:
+            return
+        for gram in _text_grams(fields[0]) | _text_grams(fields[1]):
+            postings = self._postings.get(gram)
+            if postings is None:
+                continue
+            index = bisect_left(postings, entry_id)
+            if index < len(postings) and postings[index] == entry_id:
+                del postings[index]
+            if not postings:
+                del self._postings[gram]
+
+    def search(self, query: str, limit: int = None):
+        """Return [(entry_id, score)] best first for queries of GRAM or more characters"""
+        query = query.lower()
+        grams = _query_grams(query)
+        if len(query) < GRAM or not grams:
+            return []
+        budgets = [(word, max_edits(word)) for word in _words(query)]
+        edits = sum(word_edits for _, word_edits in budgets)
+
+        with self.lock:
+            # A substring hit can only miss the padded leading trigram and
+            # each edit breaks at most GRAM + 1 trigrams (a swap breaks four)
+            min_match = max(1, len(grams) - max(1, (GRAM + 1) * edits))
+            ordered = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))
+            probe, rest = ordered[:len(ordered) - min_match + 1], ordered[len(ordered) - min_match + 1:]
+
+            counts = Counter(chain.from_iterable(self._postings.get(gram, ()) for gram in probe))
+            rest_postings = [self._postings.get(gram, ()) for gram in rest]
+            if len(counts) * len(rest_postings) >= sum(len(postings) for postings in rest_postings):
+                # Scanning the remaining postings is cheaper than a binary search per candidate;
+                # entries found only there stay below min_match
+                counts.update(chain.from_iterable(rest_postings))
+                rest_postings = []
+            results, typos = [], []
+            for entry_id, matched in counts.items():
+                for postings in rest_postings:
+                    if _contains(postings, entry_id):
+                        matched += 1
+                if matched < min_match:
+                    continue
+                service, username, words = self._fields[entry_id]
+                coverage = matched / len(grams)
+                if service == query:
+                    results.append((-(coverage + 3.0), len(service), entry_id))
+                elif service.startswith(query):
+                    results.append((-(coverage + 2.0), len(service), entry_id))
+                elif query in service:
+                    results.append((-(coverage + 1.5), len(service), entry_id))
+                elif query in username:
+                    results.append((-(coverage + 1.0), len(service), entry_id))
+                elif not results and edits:
+                    typos.append((-coverage, len(service), entry_id, words))
+
+            if not results:
+                results = self._typo_matches(query, budgets, typos)
+
+        results.sort()
+        if limit is not None:
+            results = results[:limit]
+        return [(entry_id, -negative_score) for negative_score, _, entry_id in results]
+
+    def _typo_matches(self, query, budgets, candidates):
+        """Best-covered candidates whose words start within each query word's edit budget
+
+        Every query word must match the start of some word of the entry.
+        Candidates are tried best coverage first and the search stops at
+        MAX_TYPO_RESULTS, so a vague query cannot scan the whole vault.
+        """
+        candidates.sort(key=lambda candidate: candidate[:3])
+        distances = {}  # (query word, entry word) -> distance, shared by all candidates
+        results = []
+        for negative_coverage, length, entry_id, words in candidates:
+            total = 0
+            for query_word, word_edits in budgets:
+                best = word_edits + 1
+                for word in words:
+                    key = (query_word, word)
+                    if key not in distances:
+                        distances[key] = _prefix_distance(query_word, word, word_edits)
+                    best = min(best, distances[key])
+                if best > word_edits:
+                    break
+                total += best
+            else:
+                # Typo matches score below 1, under any direct hit
+                score = (1 - total / len(query)) * 0.5 - negative_coverage * 0.5
+                results.append((-score, length, entry_id))
+                if len(results) >= MAX_TYPO_RESULTS:
+                    break
+        return results
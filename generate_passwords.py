@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Bulk password generator for SecurePass
+Mints passwords for provisioning scripts and streams them to stdout or a file
+"""
+
+import argparse
+import sys
+import time
+
+from config import DEFAULT_PASSWORD_LENGTH, MIN_PASSWORD_LENGTH, MAX_PASSWORD_LENGTH
+from password_generator import PasswordGenerator
+
+
+def write_passwords(out, count, policy):
+    """Stream count passwords to a file object, one per line"""
+    for password in PasswordGenerator().generate_many(count, policy):
+        out.write(password + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SecurePass Bulk Password Generator")
+    parser.add_argument("count", type=int, help="Number of passwords to generate")
+    parser.add_argument("--length", type=int, default=DEFAULT_PASSWORD_LENGTH,
+                       help=f"Password length (default: {DEFAULT_PASSWORD_LENGTH})")
+    parser.add_argument("--no-lowercase", action="store_true", help="Leave out lowercase letters")
+    parser.add_argument("--no-uppercase", action="store_true", help="Leave out uppercase letters")
+    parser.add_argument("--no-digits", action="store_true", help="Leave out digits")
+    parser.add_argument("--no-symbols", action="store_true", help="Leave out symbols")
+    parser.add_argument("--allow-ambiguous", action="store_true",
+                       help="Keep ambiguous characters (0, O, l, I)")
+    parser.add_argument("--output", "-o", help="Write to this file instead of stdout")
+
+    args = parser.parse_args()
+    if not MIN_PASSWORD_LENGTH <= args.length <= MAX_PASSWORD_LENGTH:
+        parser.error(f"--length must be between {MIN_PASSWORD_LENGTH} and {MAX_PASSWORD_LENGTH}")
+
+    policy = {
+        'length': args.length,
+        'use_lowercase': not args.no_lowercase,
+        'use_uppercase': not args.no_uppercase,
+        'use_digits': not args.no_digits,
+        'use_symbols': not args.no_symbols,
+        'exclude_ambiguous': not args.allow_ambiguous
+    }
+
+    if not args.output:
+        write_passwords(sys.stdout, args.count, policy)
+        return
+
+    start = time.perf_counter()
+    with open(args.output, 'w') as f:
+        write_passwords(f, args.count, policy)
+    print(f"✅ Generated {args.count} passwords in {time.perf_counter() - start:.2f}s")
+    print(f"   Output: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Password key derivation for SecurePass
+
+Every vault records which KDF stretches its master password and with
+which cost parameters, so the cost can be tuned to the machine the vault
+lives on. Supported algorithms:
+
+- pbkdf2-sha256: iterations
+- scrypt: n (power of two), r, p  (memory-hard, preferred)
+- bcrypt: rounds of bcrypt_pbkdf
+
+Calibration times a cheap probe of each algorithm and scales its cost
+linearly to a target unlock latency, never going below the built-in
+minimums.
+"""
+
+import hashlib
+import math
+import time
+import warnings
+
+import bcrypt
+
+from config import ENCRYPTION_ITERATIONS
+
+KEY_LENGTH = 32
+
+# Setting used by vaults created before the KDF was stored per vault
+LEGACY_ALGORITHM = "pbkdf2-sha256"
+LEGACY_PARAMS = {'iterations': 100000}
+
+# Lowest cost calibration will ever pick for each algorithm
+MIN_PARAMS = {
+    'pbkdf2-sha256': {'iterations': ENCRYPTION_ITERATIONS},
+    'scrypt': {'n': 2 ** 14, 'r': 8, 'p': 1},
+    'bcrypt': {'rounds': 50}
+}
+MAX_SCRYPT_N = 2 ** 20  # 1 GiB of memory with r=8
+
+# Cheap settings timed to estimate the per-unit cost
+PROBE_PARAMS = {
+    'pbkdf2-sha256': {'iterations': 20000},
+    'scrypt': {'n': 2 ** 12, 'r': 8, 'p': 1},
+    'bcrypt': {'rounds': 8}
+}
+
+KDF_ALGORITHMS = tuple(MIN_PARAMS)
+
+
+def _scrypt_maxmem(params: dict) -> int:
+    """Memory limit large enough for the given scrypt parameters"""
+    return 128 * params['r'] * (params['n'] + params['p'] + 2) + 1024 * 1024
+
+
+def derive(algorithm: str, params: dict, password: str, salt: bytes) -> bytes:
+    """Stretch a password into KEY_LENGTH raw bytes"""
+    password_bytes = password.encode('utf-8')
+    if algorithm == 'pbkdf2-sha256':
+        return hashlib.pbkdf2_hmac('sha256', password_bytes, salt, params['iterations'], KEY_LENGTH)
+    if algorithm == 'scrypt':
+        return hashlib.scrypt(password_bytes, salt=salt, n=params['n'], r=params['r'], p=params['p'],
+                              maxmem=_scrypt_maxmem(params), dklen=KEY_LENGTH)
+    if algorithm == 'bcrypt':
+        with warnings.catch_warnings():
+            # bcrypt warns below 50 rounds, which only the calibration probe uses
+            warnings.simplefilter("ignore")
+            return bcrypt.kdf(password_bytes, salt, KEY_LENGTH, params['rounds'])
+    raise ValueError(f"Unknown KDF algorithm: {algorithm}")
+
+
+def time_derivation(algorithm: str, params: dict) -> float:
+    """Seconds taken by one derivation with the given parameters"""
+    start = time.perf_counter()
+    derive(algorithm, params, "calibration-password", b"\x00" * 16)
+    return time.perf_counter() - start
+
+
+def calibrate(algorithm: str, target_seconds: float) -> dict:
+    """Pick the highest cost that stays near target_seconds on this machine"""
+    probe = PROBE_PARAMS[algorithm]
+    scale = target_seconds / max(time_derivation(algorithm, probe), 1e-6)
+    minimum = MIN_PARAMS[algorithm]
+
+    if algorithm == 'pbkdf2-sha256':
+        iterations = int(probe['iterations'] * scale) // 1000 * 1000
+        return {'iterations': max(minimum['iterations'], iterations)}
+    if algorithm == 'scrypt':
+        n = 2 ** int(math.log2(max(1, probe['n'] * scale)))
+        return {'n': min(MAX_SCRYPT_N, max(minimum['n'], n)), 'r': probe['r'], 'p': probe['p']}
+    rounds = int(probe['rounds'] * scale)
+    return {'rounds': max(minimum['rounds'], rounds)}
+
+
+def describe(algorithm: str, params: dict) -> str:
+    """Short human-readable form of a KDF setting"""
+    if algorithm == 'scrypt':
+        memory = 128 * params['r'] * params['n'] // (1024 * 1024)
+        return f"scrypt N=2^{int(math.log2(params['n']))} r={params['r']} p={params['p']} ({memory} MiB)"
+    return f"{algorithm} " + " ".join(f"{key}={value}" for key, value in params.items())
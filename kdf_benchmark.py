@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+KDF calibration tool for SecurePass
+Benchmarks PBKDF2, scrypt and bcrypt on this machine and can apply the
+calibrated setting to a vault
+"""
+
+import argparse
+import getpass
+import os
+
+import kdf
+from config import DATABASE_NAME, KDF_ALGORITHM, KDF_TARGET_SECONDS
+from database import DatabaseManager, SecurityManager
+
+
+def calibrate_all(target_seconds, algorithms=kdf.KDF_ALGORITHMS):
+    """Calibrate each algorithm and time the chosen setting once"""
+    results = []
+    for algorithm in algorithms:
+        params = kdf.calibrate(algorithm, target_seconds)
+        results.append((algorithm, params, kdf.time_derivation(algorithm, params)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SecurePass KDF Calibration")
+    parser.add_argument("--target", type=float, default=KDF_TARGET_SECONDS,
+                       help=f"Target unlock time in seconds (default: {KDF_TARGET_SECONDS})")
+    parser.add_argument("--algorithm", choices=kdf.KDF_ALGORITHMS,
+                       help="Calibrate only this algorithm")
+    parser.add_argument("--apply", metavar="VAULT", nargs="?", const=DATABASE_NAME,
+                       help=f"Store the calibrated setting in a vault (default: {DATABASE_NAME})")
+
+    args = parser.parse_args()
+    algorithms = [args.algorithm] if args.algorithm else list(kdf.KDF_ALGORITHMS)
+
+    print("🔐 SecurePass KDF Calibration")
+    print("=" * 60)
+    print(f"Target unlock time: {args.target * 1000:.0f}ms")
+    print()
+
+    results = calibrate_all(args.target, algorithms)
+    for algorithm, params, elapsed in results:
+        print(f"{kdf.describe(algorithm, params):<40} {elapsed * 1000:>8.1f}ms")
+
+    if not args.apply:
+        return
+
+    algorithm = args.algorithm or KDF_ALGORITHM
+    params = next(params for name, params, _ in results if name == algorithm)
+
+    if not os.path.exists(args.apply):
+        print(f"❌ Vault not found: {args.apply}")
+        return
+
+    db = DatabaseManager(args.apply, SecurityManager(args.apply))
+    try:
+        print()
+        print(f"Current setting: {kdf.describe(*db.get_kdf_settings())}")
+        password = getpass.getpass("Master password: ")
+        if db.set_kdf_settings(password, algorithm, params):
+            print(f"✅ Vault now uses {kdf.describe(algorithm, params)}")
+        else:
+            print("❌ Invalid master password")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
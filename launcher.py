@@ -38,8 +38,8 @@ def check_dependencies():
 
 def check_python_version():
     """Check if Python version is compatible"""
-    if sys.version_info < (3, 7):
-        print("❌ Python 3.7 or higher is required")
+    if sys.version_info < (3, 9):
+        print("❌ Python 3.9 or higher is required")
         print(f"   Current version: {sys.version}")
         return False
     
@@ -1,8 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import pyperclip
-from database import DatabaseManager, SecurityManager
+import kdf
+from database import DatabaseManager, SecurityManager, STORAGE_PROFILES
 from password_generator import PasswordGenerator
+from breach_check import get_breach_database
+import vault_health
+import backup_utility
+from task_runner import TaskRunner
+from virtual_tree import VirtualTreeView
+from search_controller import SearchController
+from config import TREE_WINDOW_SIZE, SEARCH_DEBOUNCE_MS, BREACH_DATABASE, BACKUP_DIRECTORY
+import multiprocessing
+import os
 import threading
 import time
 from datetime import datetime, timedelta
@@ -51,6 +61,16 @@ class PasswordManagerGUI:
         self.security = SecurityManager()
         self.db = DatabaseManager(security_manager=self.security)
         self.password_gen = PasswordGenerator()
+        # Database and crypto work runs off the Tk thread
+        self.tasks = TaskRunner(self.root, self.db.conn_lock,
+                                on_busy=self.set_busy, on_error=self.on_task_error)
+        self._list_task = None
+        # Unlock or vault creation waiting in the task queue
+        self._unlock_task = None
+        self.search_controller = SearchController(self.root, self.tasks, self.db.search_passwords,
+                                                  self.db.filter_entries, self.show_search_results,
+                                                  SEARCH_DEBOUNCE_MS,
+                                                  can_narrow=lambda: not self.db.fuzzy_index_ready())
         
         # State variables
         self.is_locked = True
@@ -58,7 +78,9 @@ class PasswordManagerGUI:
         self.last_activity = time.time()
         self.passwords_data = []
         self.filtered_data = []
+        self.entries_by_id = {}  # Listing entries keyed by id; tree items use the id as iid
         self.current_theme = 'light'  # default theme
+        self.status_var = tk.StringVar()
         
         # Load user preferences
         self.load_user_preferences()
@@ -142,6 +164,18 @@ class PasswordManagerGUI:
         except tk.TclError:
             pass
     
+    def set_busy(self, busy, name=None):
+        """Show or clear the busy indicator while background tasks run"""
+        self.status_var.set(f"⏳ {name}..." if busy else "")
+        try:
+            self.root.config(cursor='watch' if busy else '')
+        except tk.TclError:
+            pass
+    
+    def on_task_error(self, error):
+        """Default error handler for background tasks"""
+        messagebox.showerror("Error", str(error))
+    
     def track_activity(self, event=None):
         """Track user activity for auto-lock"""
         self.last_activity = time.time()
@@ -154,12 +188,21 @@ class PasswordManagerGUI:
         # Schedule next check
         self.root.after(30000, self.check_auto_lock)  # Check every 30 seconds
     
-    def lock_application(self):
+    def lock_application(self, message="Application has been locked due to inactivity."):
         """Lock the application"""
         self.is_locked = True
+        # Drop pending work, then lock once anything still running has stopped
+        self.search_controller.reset()
+        self.tasks.cancel_all()
+        self._unlock_task = None
+        self.tasks.submit(self.db.lock, name="Locking")
+        self.passwords_data = []
+        self.filtered_data = []
+        self.entries_by_id = {}  # Listing entries keyed by id; tree items use the id as iid
         self.clear_main_window()
         self.create_login_screen()
-        messagebox.showinfo("Auto Lock", "Application has been locked due to inactivity.")
+        if message:
+            messagebox.showinfo("Auto Lock", message)
     
     def save_user_preferences(self):
         """Save user preferences to a configuration file"""
@@ -230,8 +273,32 @@ class PasswordManagerGUI:
         form_frame = ttk.Frame(center_frame)
         form_frame.pack(pady=20)
         
-        # Check if master password exists
-        if self.db.has_master_password():
+        # Filled in once the task worker has checked for a master password
+        fields_frame = ttk.Frame(form_frame)
+        fields_frame.pack()
+        
+        # Footer
+        footer_frame = ttk.Frame(main_frame)
+        footer_frame.pack(side='bottom', fill='x', pady=(20, 0))
+        
+        footer_text = ttk.Label(footer_frame, 
+                               text="All data is encrypted and stored locally on your device",
+                               font=('Segoe UI', 9), 
+                               foreground=self.style.current_theme['text_light'])
+        footer_text.pack()
+        
+        ttk.Label(form_frame, textvariable=self.status_var,
+                  foreground=self.style.current_theme['text_light']).pack()
+        
+        self.tasks.submit(self.db.has_master_password, name="Opening vault",
+                          on_success=lambda exists: self.create_login_form(fields_frame, exists))
+    
+    def create_login_form(self, form_frame, has_master_password):
+        """Fill the login screen with the unlock or the setup form"""
+        if not form_frame.winfo_exists():
+            return
+        
+        if has_master_password:
             # Login mode
             ttk.Label(form_frame, text="Enter Master Password:", style='Heading.TLabel').pack(pady=(0, 10))
             
@@ -269,16 +336,6 @@ class PasswordManagerGUI:
             setup_btn = ttk.Button(form_frame, text="Create & Setup", 
                                  command=self.setup_master_password, style='Accent.TButton')
             setup_btn.pack(pady=(0, 10))
-        
-        # Footer
-        footer_frame = ttk.Frame(main_frame)
-        footer_frame.pack(side='bottom', fill='x', pady=(20, 0))
-        
-        footer_text = ttk.Label(footer_frame, 
-                               text="All data is encrypted and stored locally on your device",
-                               font=('Segoe UI', 9), 
-                               foreground=self.style.current_theme['text_light'])
-        footer_text.pack()
     
     def login(self):
         """Handle login process"""
@@ -287,14 +344,44 @@ class PasswordManagerGUI:
         if not password:
             messagebox.showerror("Error", "Please enter your master password")
             return
+        if self._unlock_task:
+            # Already queued behind other work; the status line shows progress
+            return
         
-        if self.db.verify_master_password(password):
-            self.is_locked = False
-            self.track_activity()
-            self.create_main_interface()
-        else:
-            messagebox.showerror("Error", "Invalid master password")
-            self.master_password_var.set("")
+        def unlocked(valid):
+            self._unlock_task = None
+            if valid:
+                self.is_locked = False
+                self.track_activity()
+                self.create_main_interface()
+                # Convert any legacy rows to the compact format in the background
+                self.tasks.submit(self.db.start_background_migration, name="Starting migration",
+                                  on_success=self.watch_migration)
+            else:
+                messagebox.showerror("Error", "Invalid master password")
+                self.master_password_var.set("")
+        
+        def failed(e):
+            self._unlock_task = None
+            self.on_task_error(e)
+        
+        if self.tasks.busy:
+            self.status_var.set("⏳ Unlock queued behind background work...")
+        self._unlock_task = self.tasks.submit(self.db.verify_master_password, password, name="Unlocking",
+                                              on_success=unlocked, on_error=failed)
+    
+    def watch_migration(self, started):
+        """Report a failure of the background row migration once it ends"""
+        if not started:
+            return
+        
+        def failed(e):
+            messagebox.showerror("Migration Failed", f"{str(e)}\n\n"
+                                 "Entries not converted yet stay readable and are converted "
+                                 "the next time you unlock.")
+        
+        # Waiting does not touch the shared connection, so it runs beside the task worker
+        self.tasks.start(self.db.wait_for_migration, name="Converting entries", on_error=failed)
     
     def setup_master_password(self):
         """Setup initial master password"""
@@ -313,14 +400,22 @@ class PasswordManagerGUI:
             messagebox.showerror("Error", "Master password must be at least 8 characters long")
             return
         
-        try:
-            self.db.set_master_password(password)
+        if self._unlock_task:
+            return
+        
+        def created(_):
+            self._unlock_task = None
             self.is_locked = False
             self.track_activity()
             messagebox.showinfo("Success", "Master password created successfully!")
             self.create_main_interface()
-        except Exception as e:
+        
+        def failed(e):
+            self._unlock_task = None
             messagebox.showerror("Error", f"Failed to create master password: {str(e)}")
+        
+        self._unlock_task = self.tasks.submit(self.db.set_master_password, password, name="Creating vault",
+                                              on_success=created, on_error=failed)
     
     def create_main_interface(self):
         """Create the main password manager interface"""
@@ -371,6 +466,10 @@ class PasswordManagerGUI:
         # Lock button
         ttk.Button(controls_frame, text="🔒 Lock", command=self.lock_application).pack(side='right', padx=(10, 0))
         
+        # Busy indicator
+        ttk.Label(title_frame, textvariable=self.status_var,
+                  foreground=self.style.current_theme['text_light']).pack(side='left', padx=(15, 0))
+        
         # Theme toggle
         ttk.Button(controls_frame, text="🌙", command=self.toggle_theme).pack(side='right', padx=(10, 0))
     
@@ -397,7 +496,10 @@ class PasswordManagerGUI:
                   command=self.export_data).pack(fill='x', pady=(0, 5))
         
         ttk.Button(left_frame, text="📥 Import Data", 
-                  command=self.import_data).pack(fill='x', pady=(0, 10))
+                  command=self.import_data).pack(fill='x', pady=(0, 5))
+        
+        ttk.Button(left_frame, text="💾 Backup Database", 
+                  command=self.backup_database).pack(fill='x', pady=(0, 10))
         
         # Separator
         ttk.Separator(left_frame, orient='horizontal').pack(fill='x', pady=15)
@@ -406,6 +508,18 @@ class PasswordManagerGUI:
         ttk.Button(left_frame, text="📋 Activity Log", 
                   command=self.show_activity_log).pack(fill='x', pady=(0, 10))
         
+        # Vault health
+        ttk.Button(left_frame, text="🩺 Vault Health", 
+                  command=self.show_vault_health).pack(fill='x', pady=(0, 10))
+        
+        # Breach check
+        ttk.Button(left_frame, text="🛡️ Breach Check", 
+                  command=self.check_breached_passwords).pack(fill='x', pady=(0, 10))
+        
+        # Reuse check
+        ttk.Button(left_frame, text="🔁 Reused Passwords", 
+                  command=self.show_reused_passwords).pack(fill='x', pady=(0, 10))
+        
         # Settings
         ttk.Button(left_frame, text="⚙️ Settings", 
                   command=self.show_settings).pack(fill='x')
@@ -434,7 +548,9 @@ class PasswordManagerGUI:
         
         # Scrollbar
         scrollbar = ttk.Scrollbar(right_frame, orient='vertical', command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        
+        # Diffed, windowed rendering of the list
+        self.tree_view = VirtualTreeView(self.tree, scrollbar, self.tree_row, TREE_WINDOW_SIZE)
         
         # Pack treeview and scrollbar
         self.tree.pack(side='left', fill='both', expand=True)
@@ -471,37 +587,38 @@ class PasswordManagerGUI:
         self.view_password_details()
     
     def on_search(self, event=None):
-        """Handle search input"""
-        query = self.search_var.get().strip()
-        if query:
-            self.filtered_data = self.db.search_passwords(query)
-        else:
-            self.filtered_data = self.passwords_data
+        """Handle search input (debounced, narrows from the previous results)"""
+        self.search_controller.set_query(self.search_var.get())
+    
+    def show_search_results(self, results):
+        """Show search results, or every entry when the query is empty"""
+        self.filtered_data = self.passwords_data if results is None else results
         self.update_tree_view()
     
     def refresh_password_list(self):
         """Refresh the password list from database"""
-        try:
-            self.passwords_data = self.db.get_all_passwords()
-            self.filtered_data = self.passwords_data
-            self.update_tree_view()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load passwords: {str(e)}")
+        if self._list_task:
+            self._list_task.cancel()
+        
+        def loaded(entries):
+            self.passwords_data = entries
+            self.entries_by_id = {entry['id']: entry for entry in entries}
+            # Earlier search results may be stale now
+            self.search_controller.invalidate()
+        
+        self._list_task = self.tasks.submit(
+            self.db.list_entries, name="Loading passwords", on_success=loaded,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load passwords: {str(e)}"))
     
     def update_tree_view(self):
-        """Update the treeview with current data"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Add items
-        for entry in self.filtered_data:
-            created = entry['created_at'][:10] if entry['created_at'] else 'N/A'
-            updated = entry['updated_at'][:10] if entry['updated_at'] else 'N/A'
-            
-            self.tree.insert('', 'end', 
-                           text=str(entry['id']),
-                           values=(entry['service'], entry['username'], created, updated))
+        """Update the treeview with current data, touching only changed rows"""
+        self.tree_view.set_rows(self.filtered_data)
+    
+    def tree_row(self, entry):
+        """Treeview text and column values for an entry"""
+        created = entry['created_at'][:10] if entry['created_at'] else 'N/A'
+        updated = entry['updated_at'][:10] if entry['updated_at'] else 'N/A'
+        return str(entry['id']), (entry['service'], entry['username'], created, updated)
     
     def get_selected_password(self):
         """Get currently selected password entry"""
@@ -510,13 +627,16 @@ class PasswordManagerGUI:
             messagebox.showwarning("Warning", "Please select a password entry")
             return None
         
-        item = self.tree.item(selection[0])
-        entry_id = int(item['text'])
-        
-        for entry in self.filtered_data:
-            if entry['id'] == entry_id:
-                return entry
-        return None
+        return self.entries_by_id.get(int(selection[0]))
+    
+    def apply_entry_change(self, entry_id, entry=None):
+        """Apply an added, updated (entry given) or deleted (entry None) entry to the store"""
+        if entry is None:
+            self.entries_by_id.pop(entry_id, None)
+        else:
+            self.entries_by_id[entry_id] = entry
+        self.passwords_data = list(self.entries_by_id.values())
+        self.search_controller.invalidate()
     
     def copy_username(self):
         """Copy username to clipboard"""
@@ -529,15 +649,31 @@ class PasswordManagerGUI:
         """Copy password to clipboard"""
         entry = self.get_selected_password()
         if entry:
-            pyperclip.copy(entry['password'])
-            messagebox.showinfo("Copied", f"Password for {entry['service']} copied to clipboard")
+            def copy(secret):
+                pyperclip.copy(secret['password'])
+                messagebox.showinfo("Copied", f"Password for {entry['service']} copied to clipboard")
+            self.with_secret(entry, copy)
+    
+    def with_secret(self, entry, callback):
+        """Decrypt an entry's password and notes in the background, then call callback(secret)"""
+        def fetched(secret):
+            if not secret:
+                messagebox.showerror("Error", "Password entry no longer exists")
+                self.apply_entry_change(entry['id'])
+                return
+            callback(secret)
+        
+        self.tasks.submit(self.db.get_secret, entry['id'], name="Decrypting", on_success=fetched)
     
     def view_password_details(self):
         """Show password details in a dialog"""
         entry = self.get_selected_password()
-        if not entry:
-            return
-        
+        if entry:
+            # Password and notes are only decrypted while the dialog is open
+            self.with_secret(entry, lambda secret: self.show_details_dialog(entry, secret))
+    
+    def show_details_dialog(self, entry, secret):
+        """Details dialog for an entry and its decrypted secret"""
         dialog = tk.Toplevel(self.root)
         dialog.title(f"Password Details - {entry['service']}")
         dialog.geometry("400x300")
@@ -573,28 +709,28 @@ class PasswordManagerGUI:
         
         self.password_visible = tk.BooleanVar()
         password_var = tk.StringVar()
-        password_var.set("*" * len(entry['password']))
+        password_var.set("*" * len(secret['password']))
         
         password_entry = ttk.Entry(password_frame, textvariable=password_var, state='readonly', width=30)
         password_entry.pack(side='left', padx=(0, 5))
         
         def toggle_password():
             if self.password_visible.get():
-                password_var.set(entry['password'])
+                password_var.set(secret['password'])
             else:
-                password_var.set("*" * len(entry['password']))
+                password_var.set("*" * len(secret['password']))
         
         ttk.Checkbutton(password_frame, text="Show", variable=self.password_visible, 
                        command=toggle_password).pack(side='left', padx=(0, 5))
         ttk.Button(password_frame, text="Copy", 
-                  command=lambda: self.copy_to_clipboard(entry['password'])).pack(side='left')
+                  command=lambda: self.copy_to_clipboard(secret['password'])).pack(side='left')
         
         # Notes
-        if entry['notes']:
+        if secret['notes']:
             ttk.Label(main_frame, text="Notes:", font=('Segoe UI', 10, 'bold')).pack(anchor='w', pady=(10, 0))
             notes_text = tk.Text(main_frame, height=3, wrap='word', state='normal')
             notes_text.pack(fill='x', pady=(0, 10))
-            notes_text.insert('1.0', entry['notes'])
+            notes_text.insert('1.0', secret['notes'])
             notes_text.config(state='disabled')
         
         # Dates
@@ -628,7 +764,7 @@ class PasswordManagerGUI:
         """Edit selected password"""
         entry = self.get_selected_password()
         if entry:
-            self.show_password_dialog(entry)
+            self.with_secret(entry, lambda secret: self.show_password_dialog({**entry, **secret}))
     
     def show_password_dialog(self, entry=None):
         """Show add/edit password dialog"""
@@ -724,19 +860,25 @@ class PasswordManagerGUI:
                 messagebox.showerror("Error", "Service, username, and password are required")
                 return
             
-            try:
-                if is_edit:
-                    self.db.update_password(entry['id'], service, username, password, notes)
-                    messagebox.showinfo("Success", "Password updated successfully!")
-                else:
-                    self.db.add_password(service, username, password, notes)
-                    messagebox.showinfo("Success", "Password added successfully!")
-                
+            def saved(saved_entry):
+                if saved_entry is None:
+                    messagebox.showerror("Error", "Password entry no longer exists")
+                    self.apply_entry_change(entry['id'])
+                    return
+                messagebox.showinfo("Success", "Password updated successfully!" if is_edit
+                                    else "Password added successfully!")
                 dialog.destroy()
-                self.refresh_password_list()
-                
-            except Exception as e:
+                self.apply_entry_change(saved_entry['id'], saved_entry)
+            
+            def failed(e):
                 messagebox.showerror("Error", f"Failed to save password: {str(e)}")
+            
+            if is_edit:
+                self.tasks.submit(self.db.update_password, entry['id'], service, username, password, notes,
+                                  name="Saving", on_success=saved, on_error=failed)
+            else:
+                self.tasks.submit(self.db.add_password, service, username, password, notes,
+                                  name="Saving", on_success=saved, on_error=failed)
         
         ttk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side='right', padx=(10, 0))
         ttk.Button(button_frame, text="Save", command=save_password, style='Accent.TButton').pack(side='right')
@@ -756,12 +898,13 @@ class PasswordManagerGUI:
                                    f"Are you sure you want to delete the password for {entry['service']}?\n\nThis action cannot be undone.")
         
         if result:
-            try:
-                self.db.delete_password(entry['id'])
+            def deleted(_):
                 messagebox.showinfo("Success", "Password deleted successfully!")
-                self.refresh_password_list()
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to delete password: {str(e)}")
+                self.apply_entry_change(entry['id'])
+            
+            self.tasks.submit(self.db.delete_password, entry['id'], name="Deleting", on_success=deleted,
+                              on_error=lambda e: messagebox.showerror(
+                                  "Error", f"Failed to delete password: {str(e)}"))
     
     def show_password_generator(self):
         """Show password generator dialog"""
@@ -890,12 +1033,13 @@ class PasswordManagerGUI:
     
     def generate_passphrase(self, password_var, strength_indicator, strength_progress):
         """Generate a passphrase"""
-        passphrase = self.password_gen.generate_passphrase()
+        passphrase, entropy_bits = self.password_gen.generate_passphrase_with_entropy()
         password_var.set(passphrase)
         
         # Update strength indicator
         strength = self.password_gen.check_password_strength(passphrase)
-        strength_indicator.config(text=strength['strength'], foreground=strength['color'])
+        strength_indicator.config(text=f"{strength['strength']} ({entropy_bits:.0f} bits)",
+                                  foreground=strength['color'])
         strength_progress['value'] = (strength['score'] / strength['max_score']) * 100
     
     def export_data(self):
@@ -907,11 +1051,11 @@ class PasswordManagerGUI:
         )
         
         if file_path:
-            try:
-                self.db.export_data(file_path)
-                messagebox.showinfo("Success", f"Data exported successfully to {file_path}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to export data: {str(e)}")
+            self.tasks.submit(self.db.export_data, file_path, name="Exporting",
+                              on_success=lambda _: messagebox.showinfo(
+                                  "Success", f"Data exported successfully to {file_path}"),
+                              on_error=lambda e: messagebox.showerror(
+                                  "Error", f"Failed to export data: {str(e)}"))
     
     def import_data(self):
         """Import encrypted data"""
@@ -924,12 +1068,102 @@ class PasswordManagerGUI:
             result = messagebox.askyesno("Confirm Import", 
                                        "This will add imported passwords to your existing data. Continue?")
             if result:
-                try:
-                    count = self.db.import_data(file_path)
+                def imported(count):
+                    progress_dialog.destroy()
                     messagebox.showinfo("Success", f"Successfully imported {count} passwords")
                     self.refresh_password_list()
-                except Exception as e:
-                    messagebox.showerror("Error", f"Failed to import data: {str(e)}")
+                
+                def report_stopped(show, title, message):
+                    # Streaming imports keep committed chunks and leave a
+                    # checkpoint; legacy imports roll back completely
+                    def report(checkpoint):
+                        text = message
+                        if checkpoint:
+                            text += (f"\n\n{checkpoint['entries_done']} entries were saved. "
+                                     "Import the same file again to resume.")
+                        else:
+                            text += "\n\nNo entries from this file were saved."
+                        show(title, text)
+                        self.refresh_password_list()
+                    
+                    # Queued behind the import, so it sees the final state
+                    self.tasks.submit(self.db.get_import_checkpoint, file_path, name="Checking import",
+                                      on_success=report, on_error=lambda _: report(None))
+                
+                def failed(e):
+                    progress_dialog.destroy()
+                    report_stopped(messagebox.showerror, "Error", f"Failed to import data: {str(e)}")
+                
+                def cancel():
+                    task.cancel()
+                    progress_dialog.destroy()
+                    report_stopped(messagebox.showinfo, "Import Cancelled", "The import was cancelled.")
+                
+                progress_dialog, update_progress = self.create_progress_dialog("Importing Passwords",
+                                                                               on_cancel=cancel)
+                task = self.tasks.submit(self.db.import_data, file_path, name="Importing",
+                                         on_success=imported, on_error=failed, on_progress=update_progress)
+    
+    def backup_database(self):
+        """Snapshot the vault database file into the backups directory"""
+        backup_dir = os.path.join(os.path.dirname(os.path.abspath(self.db.db_path)), BACKUP_DIRECTORY)
+        try:
+            os.makedirs(backup_dir, exist_ok=True)
+        except OSError as e:
+            messagebox.showerror("Backup Failed", f"Failed to create backup directory: {str(e)}")
+            return
+        backup_path = backup_utility.backup_path_for(backup_dir)
+        
+        progress_dialog, update_progress = self.create_progress_dialog(
+            "Backing Up Database", on_cancel=lambda: cancel(), unit="pages")
+        
+        def backed_up(path):
+            progress_dialog.destroy()
+            messagebox.showinfo("Backup Created", f"Database backup created:\n{path}")
+        
+        def failed(e):
+            progress_dialog.destroy()
+            messagebox.showerror("Backup Failed", f"Failed to create backup: {str(e)}")
+        
+        def cancel():
+            task.cancel()
+            progress_dialog.destroy()
+        
+        # The backup opens its own connection, so it runs beside the task
+        # worker without holding the connection lock and GUI writes go on
+        task = self.tasks.start(backup_utility.backup_database, self.db.db_path, backup_path,
+                                name="Backing up database", on_success=backed_up, on_error=failed,
+                                on_progress=update_progress)
+    
+    def create_progress_dialog(self, title, on_cancel=None, unit="entries"):
+        """Create a small progress dialog and return it with an update callback"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title(title)
+        dialog.geometry("350x160" if on_cancel else "350x120")
+        dialog.resizable(False, False)
+        dialog.transient(self.root)
+        
+        main_frame = ttk.Frame(dialog, padding=20)
+        main_frame.pack(fill='both', expand=True)
+        
+        status_label = ttk.Label(main_frame, text="Preparing...")
+        status_label.pack(anchor='w', pady=(0, 10))
+        
+        progress = ttk.Progressbar(main_frame, length=300, mode='determinate')
+        progress.pack(fill='x')
+        
+        if on_cancel:
+            ttk.Button(main_frame, text="Cancel", command=on_cancel).pack(anchor='e', pady=(10, 0))
+            dialog.protocol("WM_DELETE_WINDOW", on_cancel)
+        
+        def update_progress(done, total):
+            if not dialog.winfo_exists():
+                return
+            progress['value'] = (done / total) * 100 if total else 100
+            status_label.config(text=f"{done} of {total} {unit}")
+        
+        dialog.update_idletasks()
+        return dialog, update_progress
     
     def show_activity_log(self):
         """Show activity log dialog"""
@@ -970,21 +1204,232 @@ class PasswordManagerGUI:
         log_scrollbar.pack(side='right', fill='y')
         
         # Load log data
-        try:
-            log_data = self.db.get_activity_log()
+        def loaded(log_data):
+            if not log_tree.winfo_exists():
+                return
             for action, details, timestamp in log_data:
                 log_tree.insert('', 'end', values=(action, details, timestamp))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load activity log: {str(e)}")
+        
+        self.tasks.submit(self.db.get_activity_log, name="Loading activity log", on_success=loaded,
+                          on_error=lambda e: messagebox.showerror(
+                              "Error", f"Failed to load activity log: {str(e)}"))
         
         # Close button
         ttk.Button(main_frame, text="Close", command=dialog.destroy).pack(pady=(20, 0))
     
+    def show_vault_health(self):
+        """Audit every entry and show the report as it fills in"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Vault Health")
+        dialog.geometry("700x480")
+        dialog.transient(self.root)
+        
+        main_frame = ttk.Frame(dialog, padding=20)
+        main_frame.pack(fill='both', expand=True)
+        
+        summary_label = ttk.Label(main_frame, text="Auditing vault...", font=('Segoe UI', 11, 'bold'))
+        summary_label.pack(anchor='w')
+        issues_label = ttk.Label(main_frame, text="")
+        issues_label.pack(anchor='w', pady=(5, 10))
+        progress = ttk.Progressbar(main_frame, mode='determinate')
+        progress.pack(fill='x', pady=(0, 10))
+        
+        columns = ('Username', 'Strength', 'Issues')
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(fill='both', expand=True)
+        health_tree = ttk.Treeview(tree_frame, columns=columns, show='tree headings')
+        health_tree.heading('#0', text='Service')
+        health_tree.column('#0', width=200)
+        for col in columns:
+            health_tree.heading(col, text=col)
+            health_tree.column(col, width=100 if col == 'Strength' else 180)
+        
+        health_scrollbar = ttk.Scrollbar(tree_frame, orient='vertical', command=health_tree.yview)
+        health_tree.configure(yscrollcommand=health_scrollbar.set)
+        health_tree.pack(side='left', fill='both', expand=True)
+        health_scrollbar.pack(side='right', fill='y')
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill='x', pady=(20, 0))
+        export_button = ttk.Button(button_frame, text="📤 Export JSON", state='disabled')
+        export_button.pack(side='left')
+        ttk.Button(button_frame, text="Close", command=lambda: close()).pack(side='right')
+        
+        tally = {'total': 0, 'healthy': 0, 'issues': dict.fromkeys(vault_health.ISSUES, 0)}
+        
+        def show_summary(summary, final):
+            health_score = round(100 * summary['healthy'] / summary['total']) if summary['total'] else 100
+            summary_label.config(text=f"Health score: {health_score}% "
+                                      f"({summary['healthy']} of {summary['total']} entries healthy)"
+                                      + ("" if final else " ..."))
+            issues = summary['issues']
+            text = (f"Weak: {issues['weak']}   Reused: {issues['reused']}   "
+                    f"Old: {issues['old']}   Breached: {issues['breached']}")
+            if final and not summary['breach_database']:
+                text += "   (breach database missing or unreadable, not checked)"
+            issues_label.config(text=text)
+        
+        def batch_done(done, total, batch_rows):
+            if not dialog.winfo_exists():
+                return
+            progress['value'] = (done / total) * 100 if total else 100
+            tally['total'] = done
+            for row in batch_rows:
+                if not row['issues']:
+                    tally['healthy'] += 1
+                    continue
+                for issue in row['issues']:
+                    tally['issues'][issue] += 1
+                health_tree.insert('', 'end', text=row['service'],
+                                   values=(row['username'], row['strength'], ", ".join(row['issues'])))
+            show_summary(tally, False)
+        
+        def audited(report):
+            if not dialog.winfo_exists():
+                return
+            progress['value'] = 100
+            show_summary(report['summary'], True)
+            export_button.config(state='normal', command=lambda: export(report))
+        
+        def failed(e):
+            if dialog.winfo_exists():
+                dialog.destroy()
+            messagebox.showerror("Error", f"Vault health audit failed: {str(e)}")
+        
+        def export(report):
+            file_path = filedialog.asksaveasfilename(
+                parent=dialog,
+                title="Export Health Report",
+                defaultextension=".json",
+                filetypes=[("JSON Report", "*.json"), ("All Files", "*.*")]
+            )
+            if file_path:
+                try:
+                    vault_health.export_report(report, file_path)
+                    messagebox.showinfo("Success", f"Health report exported to {file_path}", parent=dialog)
+                except Exception as e:
+                    messagebox.showerror("Error", f"Failed to export report: {str(e)}", parent=dialog)
+        
+        task = self.tasks.submit(vault_health.audit_vault, self.db, name="Auditing vault",
+                                 on_success=audited, on_error=failed, on_progress=batch_done)
+        
+        def close():
+            task.cancel()
+            dialog.destroy()
+        
+        dialog.protocol("WM_DELETE_WINDOW", close)
+    
+    def check_breached_passwords(self):
+        """Check all stored passwords against the offline breach database"""
+        try:
+            breach_db = get_breach_database(BREACH_DATABASE)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open breach database: {str(e)}")
+            return
+        if breach_db is None:
+            messagebox.showinfo("Breach Check",
+                              f"No breach database found at {BREACH_DATABASE}.\n\n"
+                              "Build one from a breach dump with build_breach_db.py.")
+            return
+        
+        progress_dialog, update_progress = self.create_progress_dialog("Checking for Breaches")
+        
+        def checked(breached):
+            progress_dialog.destroy()
+            if not breached:
+                messagebox.showinfo("Breach Check", "None of your passwords appear in the breach database.")
+                return
+            self.show_breach_results(breached)
+        
+        def failed(e):
+            progress_dialog.destroy()
+            messagebox.showerror("Error", f"Breach check failed: {str(e)}")
+        
+        self.tasks.submit(self.db.find_breached_passwords, breach_db, name="Checking for breaches",
+                          on_success=checked, on_error=failed, on_progress=update_progress)
+    
+    def show_breach_results(self, breached):
+        """List entries whose passwords were found in the breach database"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Breached Passwords")
+        dialog.geometry("600x400")
+        dialog.transient(self.root)
+        
+        main_frame = ttk.Frame(dialog, padding=20)
+        main_frame.pack(fill='both', expand=True)
+        
+        ttk.Label(main_frame, text=f"⚠️ {len(breached)} passwords appear in known data breaches. "
+                                   "Change them as soon as possible.",
+                  wraplength=540).pack(anchor='w', pady=(0, 10))
+        
+        columns = ('Service', 'Username', 'Breaches')
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(fill='both', expand=True)
+        breach_tree = ttk.Treeview(tree_frame, columns=columns, show='headings')
+        for col in columns:
+            breach_tree.heading(col, text=col)
+            breach_tree.column(col, width=120 if col == 'Breaches' else 200)
+        
+        breach_scrollbar = ttk.Scrollbar(tree_frame, orient='vertical', command=breach_tree.yview)
+        breach_tree.configure(yscrollcommand=breach_scrollbar.set)
+        breach_tree.pack(side='left', fill='both', expand=True)
+        breach_scrollbar.pack(side='right', fill='y')
+        
+        for entry in sorted(breached, key=lambda entry: -entry['breach_count']):
+            breach_tree.insert('', 'end', values=(entry['service'], entry['username'],
+                                                  f"{entry['breach_count']:,}"))
+        
+        ttk.Button(main_frame, text="Close", command=dialog.destroy).pack(pady=(20, 0))
+    
+    def show_reused_passwords(self):
+        """Show groups of entries that share the same password"""
+        def loaded(clusters):
+            if not clusters:
+                messagebox.showinfo("Reused Passwords", "No password is used by more than one entry.")
+                return
+            
+            dialog = tk.Toplevel(self.root)
+            dialog.title("Reused Passwords")
+            dialog.geometry("600x400")
+            dialog.transient(self.root)
+            
+            main_frame = ttk.Frame(dialog, padding=20)
+            main_frame.pack(fill='both', expand=True)
+            
+            reused = sum(len(cluster) for cluster in clusters)
+            ttk.Label(main_frame, text=f"⚠️ {reused} entries share {len(clusters)} passwords. "
+                                       "Give each account its own password.",
+                      wraplength=540).pack(anchor='w', pady=(0, 10))
+            
+            tree_frame = ttk.Frame(main_frame)
+            tree_frame.pack(fill='both', expand=True)
+            reuse_tree = ttk.Treeview(tree_frame, columns=('Username',), show='tree headings')
+            reuse_tree.heading('#0', text='Service')
+            reuse_tree.heading('Username', text='Username')
+            reuse_tree.column('#0', width=300)
+            reuse_tree.column('Username', width=220)
+            
+            reuse_scrollbar = ttk.Scrollbar(tree_frame, orient='vertical', command=reuse_tree.yview)
+            reuse_tree.configure(yscrollcommand=reuse_scrollbar.set)
+            reuse_tree.pack(side='left', fill='both', expand=True)
+            reuse_scrollbar.pack(side='right', fill='y')
+            
+            for cluster in clusters:
+                group = reuse_tree.insert('', 'end', text=f"🔁 Shared by {len(cluster)} entries", open=True)
+                for entry in cluster:
+                    reuse_tree.insert(group, 'end', text=entry['service'], values=(entry['username'],))
+            
+            ttk.Button(main_frame, text="Close", command=dialog.destroy).pack(pady=(20, 0))
+        
+        self.tasks.submit(self.db.find_reused_passwords, name="Finding reused passwords", on_success=loaded,
+                          on_error=lambda e: messagebox.showerror(
+                              "Error", f"Failed to check for reused passwords: {str(e)}"))
+    
     def show_settings(self):
         """Show settings dialog"""
         dialog = tk.Toplevel(self.root)
         dialog.title("Settings")
-        dialog.geometry("400x300")
+        dialog.geometry("400x440")
         dialog.resizable(False, False)
         dialog.transient(self.root)
         dialog.grab_set()
@@ -1020,18 +1465,57 @@ class PasswordManagerGUI:
         ttk.Radiobutton(theme_frame, text="Light", variable=theme_var, value='light').pack(side='left')
         ttk.Radiobutton(theme_frame, text="Dark", variable=theme_var, value='dark').pack(side='left', padx=(20, 0))
         
+        # Storage profile setting (stored per vault)
+        ttk.Label(main_frame, text="Storage profile:", font=('Segoe UI', 10, 'bold')).pack(anchor='w')
+        
+        storage_frame = ttk.Frame(main_frame)
+        storage_frame.pack(fill='x', pady=(5, 0))
+        
+        # The profile is kept on the manager, so reading it needs no database access
+        storage_var = tk.StringVar(value=self.db.get_storage_profile())
+        storage_combo = ttk.Combobox(storage_frame, textvariable=storage_var, state='readonly',
+                                     values=list(STORAGE_PROFILES), width=12)
+        storage_combo.pack(side='left')
+        
+        storage_description = ttk.Label(storage_frame, foreground=self.style.current_theme['text_light'],
+                                        text=STORAGE_PROFILES[storage_var.get()]['description'])
+        storage_description.pack(side='left', padx=(10, 0))
+        storage_combo.bind('<<ComboboxSelected>>', lambda e: storage_description.config(
+            text=STORAGE_PROFILES[storage_var.get()]['description']))
+        
+        def apply_storage_profile():
+            """Queue the storage profile change if it changed; returns True when queued"""
+            if storage_var.get() == self.db.get_storage_profile():
+                return False
+            self.tasks.submit(self.db.set_storage_profile, storage_var.get(), name="Changing storage profile",
+                              on_error=lambda e: messagebox.showerror(
+                                  "Error", f"Failed to change storage profile: {str(e)}"))
+            return True
+        
         # Change master password
         ttk.Separator(main_frame, orient='horizontal').pack(fill='x', pady=20)
         
         ttk.Label(main_frame, text="Security:", font=('Segoe UI', 10, 'bold')).pack(anchor='w')
-        
-        ttk.Button(main_frame, text="Change Master Password", 
-                  command=lambda: [dialog.destroy(), self.change_master_password()]).pack(anchor='w', pady=(10, 0))
+        kdf_label = ttk.Label(main_frame, text="Unlock KDF: ...",
+                              foreground=self.style.current_theme['text_light'])
+        kdf_label.pack(anchor='w', pady=(5, 0))
+        self.tasks.submit(self.db.get_kdf_settings, name="Reading settings",
+                          on_success=lambda settings: kdf_label.winfo_exists() and kdf_label.config(
+                              text=f"Unlock KDF: {kdf.describe(*settings)}"))
+        
+        security_buttons = ttk.Frame(main_frame)
+        security_buttons.pack(fill='x', pady=(10, 0))
+        
+        ttk.Button(security_buttons, text="Change Master Password", 
+                  command=lambda: [dialog.destroy(), self.change_master_password()]).pack(side='left')
+        ttk.Button(security_buttons, text="Rotate Data Key", 
+                  command=lambda: [dialog.destroy(), self.rotate_data_key()]).pack(side='left', padx=(10, 0))
           # Save settings
         def save_settings():
             # Save auto-lock timeout
             old_auto_lock = self.auto_lock_time
             self.auto_lock_time = timeout_var.get() * 60
+            storage_changed = apply_storage_profile()
             
             # Apply theme immediately if changed
             if theme_var.get() != self.current_theme:
@@ -1045,7 +1529,7 @@ class PasswordManagerGUI:
                 messagebox.showinfo("Settings", f"Theme changed to {self.current_theme} mode successfully!")
             else:
                 # Save other settings if theme didn't change
-                if old_auto_lock != self.auto_lock_time:
+                if old_auto_lock != self.auto_lock_time or storage_changed:
                     self.save_user_preferences()
                     messagebox.showinfo("Settings", "Settings saved successfully!")
                 else:
@@ -1057,6 +1541,7 @@ class PasswordManagerGUI:
             """Apply settings without closing dialog"""
             # Save auto-lock timeout
             self.auto_lock_time = timeout_var.get() * 60
+            apply_storage_profile()
             
             # Apply theme immediately if changed
             if theme_var.get() != self.current_theme:
@@ -1093,10 +1578,6 @@ class PasswordManagerGUI:
         main_frame = ttk.Frame(dialog, padding=20)
         main_frame.pack(fill='both', expand=True)
         
-        messagebox.showwarning("Important", 
-                             "Changing your master password will require you to re-enter all stored passwords. "
-                             "Make sure you have a backup of your data.")
-        
         # Current password
         ttk.Label(main_frame, text="Current Master Password:", font=('Segoe UI', 10, 'bold')).pack(anchor='w')
         current_var = tk.StringVar()
@@ -1133,19 +1614,17 @@ class PasswordManagerGUI:
                 messagebox.showerror("Error", "New password must be at least 8 characters long")
                 return
             
-            if not self.db.verify_master_password(current):
-                messagebox.showerror("Error", "Current password is incorrect")
-                return
-            
-            try:
-                # This is a simplified implementation
-                # In a real scenario, you'd need to re-encrypt all data with the new password
-                messagebox.showinfo("Notice", 
-                                  "Master password change is not fully implemented in this demo. "
-                                  "In a production version, this would re-encrypt all stored data.")
+            def changed(valid):
+                if not valid:
+                    messagebox.showerror("Error", "Current password is incorrect")
+                    return
+                messagebox.showinfo("Success", "Master password changed successfully!")
                 dialog.destroy()
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to change master password: {str(e)}")
+            
+            self.tasks.submit(self.db.change_master_password, current, new_password,
+                              name="Changing master password", on_success=changed,
+                              on_error=lambda e: messagebox.showerror(
+                                  "Error", f"Failed to change master password: {str(e)}"))
           # Buttons
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill='x')
@@ -1154,6 +1633,31 @@ class PasswordManagerGUI:
         ttk.Button(button_frame, text="Change Password", command=change_password, 
                   style='Accent.TButton').pack(side='right')
     
+    def rotate_data_key(self):
+        """Re-encrypt all entries under a new data key"""
+        result = messagebox.askyesno("Rotate Data Key",
+                                   "This re-encrypts every stored password with a new key.\n\n"
+                                   "Backups exported before the rotation will no longer be importable. "
+                                   "Continue?")
+        if not result:
+            return
+        
+        progress_dialog, update_progress = self.create_progress_dialog("Rotating Data Key")
+        
+        def rotated(count):
+            progress_dialog.destroy()
+            messagebox.showinfo("Success", f"Data key rotated. {count} entries re-encrypted.")
+        
+        def failed(e):
+            progress_dialog.destroy()
+            # The vault locked itself; entries on the new key are unreadable until it is unlocked again
+            self.lock_application(message=None)
+            messagebox.showerror("Error", f"Data key rotation did not finish: {str(e)}\n\n"
+                                          "It will resume the next time you unlock.")
+        
+        self.tasks.submit(self.db.rotate_data_key, name="Rotating data key", on_success=rotated,
+                          on_error=failed, on_progress=update_progress)
+    
     def toggle_theme(self):
         """Toggle between light and dark theme with immediate effect"""
         self.current_theme = 'dark' if self.current_theme == 'light' else 'light'
@@ -1165,19 +1669,26 @@ class PasswordManagerGUI:
     def on_closing(self):
         """Handle application closing with automatic export"""
         if messagebox.askokcancel("Quit", "Do you want to quit SecurePass?"):
-            try:
-                # Perform automatic export before closing
-                self.auto_export_on_logout()
-                
-                # Close database connection
-                self.db.close()
-            except Exception as e:
-                print(f"Error during closing: {e}")
-            finally:
+            def close_vault():
+                try:
+                    # Perform automatic export before closing
+                    self.auto_export_on_logout()
+                finally:
+                    # Close database connection
+                    self.db.close()
+            
+            def closed(error=None):
+                if error:
+                    print(f"Error during closing: {error}")
+                self.tasks.shutdown()
                 self.root.destroy()
+            
+            self.tasks.cancel_all()
+            self.tasks.submit(close_vault, name="Saving backup",
+                              on_success=lambda _: closed(), on_error=closed)
     
     def auto_export_on_logout(self):
-        """Automatically export password data to a backup file on logout"""
+        """Automatically export password data to a backup file on logout (task thread)"""
         try:
             import os
             from datetime import datetime
@@ -1188,7 +1699,7 @@ class PasswordManagerGUI:
             
             # Check if we have any passwords to export
             if not self.is_locked and hasattr(self, 'db'):
-                passwords = self.db.get_all_passwords()
+                passwords = self.db.list_entries()
                 
                 if passwords:  # Only export if there are passwords
                     # Export data (this will overwrite the existing file)
@@ -1197,17 +1708,7 @@ class PasswordManagerGUI:
                     # Log the auto-export
                     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                     print(f"[{timestamp}] Auto-backup created: {backup_path}")
-                    
-                    # Show brief notification (non-blocking)
-                    try:
-                        self.root.after(100, lambda: messagebox.showinfo(
-                            "Auto Backup", 
-                            f"Passwords automatically backed up to:\n{backup_filename}", 
-                            parent=self.root
-                        ))
-                    except:
-                        # If window is already destroyed, skip notification
-                        pass
+                    return backup_path
                         
         except Exception as e:
             print(f"Auto-export failed: {e}")
@@ -1225,10 +1726,11 @@ class PasswordManagerGUI:
             backup_path = os.path.join(os.path.dirname(__file__), backup_filename)
             
             # Export data to timestamped file
-            self.db.export_data(backup_path)
-            
-            messagebox.showinfo("Backup Created", 
-                              f"Timestamped backup created:\n{backup_filename}")
+            self.tasks.submit(self.db.export_data, backup_path, name="Creating backup",
+                              on_success=lambda _: messagebox.showinfo(
+                                  "Backup Created", f"Timestamped backup created:\n{backup_filename}"),
+                              on_error=lambda e: messagebox.showerror(
+                                  "Backup Failed", f"Failed to create backup: {str(e)}"))
             return backup_path
             
         except Exception as e:
@@ -1258,5 +1760,8 @@ except ImportError:
     import pyperclip
 
 if __name__ == "__main__":
+    # Vault health workers are spawned processes; in the frozen build they
+    # re-run this executable and must stop here instead of opening a window
+    multiprocessing.freeze_support()
     app = PasswordManagerGUI()
     app.run()
@@ -1,118 +1,148 @@
+import math
 import random
 import string
 import secrets
 
+from breach_check import BreachFormatError, get_breach_database
+from config import BREACH_DATABASE
+from strength_estimator import estimate
+from wordlist import load_wordlist, bits_per_word
+
+# Characters dropped by exclude_ambiguous, per class
+AMBIGUOUS = {'lowercase': 'lo', 'uppercase': 'IO', 'digits': '01'}
+
+# Random bytes fetched from the OS per refill when sampling in bulk
+SAMPLE_BUFFER_SIZE = 4096
+
+DEFAULT_POLICY = {
+    'length': 12,
+    'use_lowercase': True,
+    'use_uppercase': True,
+    'use_digits': True,
+    'use_symbols': True,
+    'exclude_ambiguous': True
+}
+
+
+class ByteSampler:
+    """Unbiased random indices drawn from bulk secrets.token_bytes"""
+    
+    def __init__(self, buffer_size=SAMPLE_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._buffer = b""
+        self._offset = 0
+    
+    def index(self, n: int) -> int:
+        """Random integer in [0, n) for n <= 256, by rejection sampling"""
+        # Bytes at or above limit would make lower indices more likely
+        limit = 256 - 256 % n
+        while True:
+            if self._offset >= len(self._buffer):
+                self._buffer = secrets.token_bytes(self.buffer_size)
+                self._offset = 0
+            value = self._buffer[self._offset]
+            self._offset += 1
+            if value < limit:
+                return value % n
+    
+    def choices(self, pool: str, k: int) -> list:
+        """k characters drawn uniformly from pool"""
+        return [pool[self.index(len(pool))] for _ in range(k)]
+    
+    def shuffle(self, items: list):
+        """Fisher-Yates shuffle in place"""
+        for i in range(len(items) - 1, 0, -1):
+            j = self.index(i + 1) if i < 256 else secrets.randbelow(i + 1)
+            items[i], items[j] = items[j], items[i]
+
+
 class PasswordGenerator:
-    def __init__(self):
+    def __init__(self, breach_database=BREACH_DATABASE):
+        self.breach_database = breach_database
         self.lowercase = string.ascii_lowercase
         self.uppercase = string.ascii_uppercase
         self.digits = string.digits
         self.symbols = "!@#$%^&*()_+-=[]{}|;:,.<>?"
     
-    def generate_password(self, length=12, use_lowercase=True, use_uppercase=True, 
-                         use_digits=True, use_symbols=True, exclude_ambiguous=True):
-        """Generate a secure password with specified criteria"""
-        if length < 4:
-            length = 4
-        
-        character_pool = ""
-        required_chars = []
-        
-        if use_lowercase:
-            character_pool += self.lowercase
+    def build_pool(self, use_lowercase=True, use_uppercase=True, use_digits=True,
+                   use_symbols=True, exclude_ambiguous=True):
+        """Return (character pool, required character classes) for a policy"""
+        classes = []
+        for enabled, name, chars in ((use_lowercase, 'lowercase', self.lowercase),
+                                     (use_uppercase, 'uppercase', self.uppercase),
+                                     (use_digits, 'digits', self.digits),
+                                     (use_symbols, 'symbols', self.symbols)):
+            if not enabled:
+                continue
             if exclude_ambiguous:
-                character_pool = character_pool.replace('l', '').replace('o', '')
-            required_chars.append(secrets.choice(self.lowercase))
-        
-        if use_uppercase:
-            character_pool += self.uppercase
-            if exclude_ambiguous:
-                character_pool = character_pool.replace('I', '').replace('O', '')
-            required_chars.append(secrets.choice(self.uppercase))
-        
-        if use_digits:
-            character_pool += self.digits
-            if exclude_ambiguous:
-                character_pool = character_pool.replace('0', '').replace('1', '')
-            required_chars.append(secrets.choice(self.digits))
-        
-        if use_symbols:
-            character_pool += self.symbols
-            required_chars.append(secrets.choice(self.symbols))
+                chars = ''.join(c for c in chars if c not in AMBIGUOUS.get(name, ''))
+            classes.append(chars)
         
-        if not character_pool:
+        if not classes:
             # Fallback to alphanumeric if no options selected
-            character_pool = self.lowercase + self.uppercase + self.digits
-            required_chars = [
-                secrets.choice(self.lowercase),
-                secrets.choice(self.uppercase),
-                secrets.choice(self.digits)
-            ]
+            classes = [self.lowercase, self.uppercase, self.digits]
         
-        # Generate remaining characters
-        remaining_length = length - len(required_chars)
-        password_chars = required_chars + [secrets.choice(character_pool) 
-                                         for _ in range(remaining_length)]
-        
-        # Shuffle the password characters
-        secrets.SystemRandom().shuffle(password_chars)
-        
-        return ''.join(password_chars)
+        return ''.join(classes), classes
     
-    def check_password_strength(self, password):
-        """Check password strength and return score and feedback"""
-        score = 0
-        feedback = []
-        
-        # Length check
-        if len(password) >= 12:
-            score += 2
-        elif len(password) >= 8:
-            score += 1
-        else:
-            feedback.append("Password should be at least 8 characters long")
-        
-        # Character variety checks
-        has_lower = any(c.islower() for c in password)
-        has_upper = any(c.isupper() for c in password)
-        has_digit = any(c.isdigit() for c in password)
-        has_symbol = any(c in self.symbols for c in password)
-        
-        variety_count = sum([has_lower, has_upper, has_digit, has_symbol])
-        score += variety_count
-        
-        if not has_lower:
-            feedback.append("Add lowercase letters")
-        if not has_upper:
-            feedback.append("Add uppercase letters")
-        if not has_digit:
-            feedback.append("Add numbers")
-        if not has_symbol:
-            feedback.append("Add special characters")
-        
-        # Common pattern checks
-        if password.lower() in ['password', '123456', 'qwerty', 'admin', 'letmein']:
+    def generate_many(self, n, policy=None):
+        """Yield n passwords for a policy (a dict of generate_password options)
+        
+        The character pool is built once and characters are drawn from
+        bulk OS randomness, so large batches are cheap. Every password
+        contains at least one character from each enabled class.
+        """
+        options = {**DEFAULT_POLICY, **(policy or {})}
+        length = max(4, options.pop('length'))
+        pool, classes = self.build_pool(**options)
+        sampler = ByteSampler()
+        
+        for _ in range(n):
+            password_chars = ([chars[sampler.index(len(chars))] for chars in classes] +
+                              sampler.choices(pool, length - len(classes)))
+            sampler.shuffle(password_chars)
+            yield ''.join(password_chars)
+    
+    def generate_password(self, length=12, use_lowercase=True, use_uppercase=True, 
+                         use_digits=True, use_symbols=True, exclude_ambiguous=True):
+        """Generate a secure password with specified criteria"""
+        return next(self.generate_many(1, {
+            'length': length,
+            'use_lowercase': use_lowercase,
+            'use_uppercase': use_uppercase,
+            'use_digits': use_digits,
+            'use_symbols': use_symbols,
+            'exclude_ambiguous': exclude_ambiguous
+        }))
+    
+    def check_password_strength(self, password, cached=True):
+        """Check password strength and return score and feedback
+        
+        Pass cached=False when rating stored passwords in bulk, so they
+        are not kept in the estimator's memo.
+        """
+        result = estimate(password, cached)
+        score = result['score']
+        feedback = list(result['feedback'])
+        
+        # A password from a breach corpus is tried first, whatever its patterns
+        breach_count = self.check_breached(password)
+        if breach_count:
             score = 0
-            feedback.append("Avoid common passwords")
-        
-        # Sequential characters check
-        if self._has_sequential_chars(password):
-            score -= 1
-            feedback.append("Avoid sequential characters")
-        
-        # Repeated characters check
-        if self._has_repeated_chars(password):
-            score -= 1
-            feedback.append("Avoid repeated characters")
+            feedback.insert(0, f"This password appears in known data breaches ({breach_count:,} times)")
+        elif breach_count is None:
+            feedback.append("Not checked against the breach database (it could not be read)")
         
         # Determine strength level
-        if score >= 6:
+        if breach_count:
+            strength = "Breached"
+            color = "red"
+        elif score >= 4:
             strength = "Very Strong"
             color = "green"
-        elif score >= 4:
+        elif score == 3:
             strength = "Strong"
             color = "blue"
-        elif score >= 2:
+        elif score == 2:
             strength = "Medium"
             color = "orange"
         else:
@@ -120,50 +150,45 @@ class PasswordGenerator:
             color = "red"
         
         return {
-            'score': max(0, score),
-            'max_score': 6,
+            'score': score,
+            'max_score': 4,
             'strength': strength,
             'color': color,
-            'feedback': feedback
+            'feedback': feedback,
+            'guesses': result['guesses'],
+            'entropy_bits': result['entropy_bits'],
+            'breached': breach_count
         }
     
-    def _has_sequential_chars(self, password, min_length=3):
-        """Check for sequential characters"""
-        password = password.lower()
-        for i in range(len(password) - min_length + 1):
-            substring = password[i:i + min_length]
-            if (substring in self.lowercase or 
-                substring in self.digits or
-                substring == substring[::-1]):  # reversed sequence
-                return True
-        return False
-    
-    def _has_repeated_chars(self, password, min_length=3):
-        """Check for repeated characters"""
-        for i in range(len(password) - min_length + 1):
-            char = password[i]
-            if password[i:i + min_length] == char * min_length:
-                return True
-        return False
+    def check_breached(self, password):
+        """Return how often a password appears in the offline breach database
+        
+        0 if it is not found or no database is installed, None (not
+        checked) if the installed database cannot be read.
+        """
+        try:
+            breach_db = get_breach_database(self.breach_database) if self.breach_database else None
+        except BreachFormatError:
+            return None
+        return breach_db.check(password) if breach_db and password else 0
     
-    def generate_passphrase(self, word_count=4, separator="-"):
+    def generate_passphrase(self, word_count=4, separator="-", wordlist=None):
         """Generate a passphrase using random words"""
-        # Simple word list for passphrases
-        words = [
-            'apple', 'banana', 'cherry', 'dragon', 'elephant', 'forest', 'garden', 'harbor',
-            'island', 'jungle', 'kitchen', 'lemon', 'mountain', 'ocean', 'planet', 'quiet',
-            'river', 'sunset', 'thunder', 'umbrella', 'village', 'winter', 'yellow', 'zebra',
-            'bridge', 'castle', 'dream', 'energy', 'freedom', 'galaxy', 'harmony', 'journey',
-            'knight', 'liberty', 'melody', 'nature', 'orange', 'phoenix', 'rainbow', 'spirit',
-            'treasure', 'universe', 'victory', 'wisdom', 'crystal', 'adventure', 'butterfly',
-            'compass', 'discovery', 'emerald', 'falcon', 'golden', 'horizon', 'infinite'
-        ]
-        
-        selected_words = [secrets.choice(words) for _ in range(word_count)]
+        return self.generate_passphrase_with_entropy(word_count, separator, wordlist)[0]
+    
+    def generate_passphrase_with_entropy(self, word_count=4, separator="-", wordlist=None):
+        """Generate a passphrase and return it with its entropy in bits
+        
+        Words come from the packed wordlist (PASSPHRASE_WORDLIST), loaded
+        on first use, or from the built-in list when none is installed.
+        """
+        words = wordlist if wordlist is not None else load_wordlist()
+        selected_words = [words[secrets.randbelow(len(words))] for _ in range(word_count)]
         # Capitalize first letter of each word
         selected_words = [word.capitalize() for word in selected_words]
         
         # Add some numbers for extra security
         selected_words.append(str(secrets.randbelow(100)))
         
-        return separator.join(selected_words)
+        entropy_bits = word_count * bits_per_word(words) + math.log2(100)
+        return separator.join(selected_words), entropy_bits
@@ -0,0 +1,103 @@
+"""
+Debounced, incremental search for the SecurePass GUI
+
+Keystrokes restart a short debounce timer, so a burst of typing issues
+one search. A query that contains the last completed query as a
+substring can only match a subset of that query's results, so it is
+answered by filtering those results in memory instead of searching the
+vault again. Only queries that are not a refinement go to the database,
+on the background task runner. A newer query cancels an in-flight one
+unless that one is a prefix it can narrow from. Typing "git", "gith",
+"github" costs one database search at most.
+"""
+
+
+class SearchController:
+    def __init__(self, root, tasks, search, filter_entries, on_results, delay_ms=150, can_narrow=None):
+        self.root = root
+        self.tasks = tasks
+        self.search = search  # search(query) -> entries, run on the task thread
+        self.filter_entries = filter_entries  # filter_entries(entries, query) -> entries
+        # on_results(entries) on the main thread; None means "no query, show everything"
+        self.on_results = on_results
+        self.delay_ms = delay_ms
+        # can_narrow() -> False when the search is ranked or fuzzy, whose
+        # results for a longer query are not a subset of the shorter one's
+        self.can_narrow = can_narrow or (lambda: True)
+        self.query = ""
+        self._timer = None
+        self._task = None
+        self._task_query = None
+        self._basis = None  # (query, results) of the last completed database search
+        self.full_searches = 0
+        self.narrowed_searches = 0
+
+    def set_query(self, query: str):
+        """Record a new query and (re)start the debounce timer"""
+        self.query = query.strip()
+        if self._timer:
+            self.root.after_cancel(self._timer)
+        self._timer = self.root.after(self.delay_ms, self._run)
+
+    def invalidate(self):
+        """Forget cached results after the vault changed and re-run the current query"""
+        self._basis = None
+        self._cancel_task()
+        if self._timer:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+        self._run()
+
+    def reset(self):
+        """Stop any pending or in-flight search and drop cached results (on lock)"""
+        if self._timer:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+        self._cancel_task()
+        self._basis = None
+        self.query = ""
+
+    def _cancel_task(self):
+        if self._task:
+            self._task.cancel()
+        self._task = None
+        self._task_query = None
+
+    def _run(self):
+        """Answer the current query from the previous results or the database"""
+        self._timer = None
+        query = self.query
+        if not query:
+            self._cancel_task()
+            self.on_results(None)
+            return
+
+        if not self.can_narrow():
+            self._basis = None
+
+        if self._basis and self._basis[0].lower() in query.lower():
+            self._cancel_task()
+            self.narrowed_searches += 1
+            self.on_results(self.filter_entries(self._basis[1], query))
+            return
+
+        if self._task_query and self._task_query.lower() in query.lower() and self.can_narrow():
+            # The in-flight search will be narrowed once it completes
+            return
+
+        self._cancel_task()
+        self.full_searches += 1
+        self._task_query = query
+        self._task = self.tasks.submit(self.search, query, name="Searching",
+                                       on_success=lambda results: self._completed(query, results))
+
+    def _completed(self, query, results):
+        """Keep a finished search as the narrowing basis and show the latest query"""
+        self._task = None
+        self._task_query = None
+        self._basis = (query, results)
+        if self.query == query:
+            self.on_results(results)
+        elif self.query and not self._timer:
+            # A pending debounce timer runs the newer query itself
+            self._run()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Storage profile benchmark for SecurePass
+Measures write and read latency of each SQLite storage profile
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from database import DatabaseManager, SecurityManager, STORAGE_PROFILES
+
+
+def _percentile(samples, fraction):
+    """Return the sample at the given fraction of a sorted list"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def benchmark_profile(profile, entries=500, reads=200):
+    """Benchmark one storage profile against a fresh temporary vault"""
+    work_dir = tempfile.mkdtemp(prefix="securepass-bench-")
+    db_path = os.path.join(work_dir, "bench.db")
+    db = None
+
+    try:
+        db = DatabaseManager(db_path, SecurityManager(db_path))
+        db.set_storage_profile(profile)
+        db.set_master_password("benchmark-password")
+
+        # Writes: one committed add_password per entry
+        write_times = []
+        for i in range(entries):
+            start = time.perf_counter()
+            db.add_password(f"service-{i}", f"user-{i}@example.com", f"password-{i}", "")
+            write_times.append(time.perf_counter() - start)
+
+        # Reads: single-row secret fetches, then a cold full listing
+        ids = [entry['id'] for entry in db.list_entries()]
+        read_times = []
+        for i in range(reads):
+            start = time.perf_counter()
+            db.get_secret(ids[i % len(ids)])
+            read_times.append(time.perf_counter() - start)
+
+        db.clear_cache()
+        start = time.perf_counter()
+        db.list_entries()
+        listing_time = time.perf_counter() - start
+
+        return {
+            'write_mean': statistics.mean(write_times),
+            'write_p95': _percentile(write_times, 0.95),
+            'read_mean': statistics.mean(read_times),
+            'read_p95': _percentile(read_times, 0.95),
+            'listing': listing_time
+        }
+    finally:
+        if db:
+            db.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SecurePass Storage Profile Benchmark")
+    parser.add_argument("--entries", type=int, default=500,
+                       help="Entries written per profile (default: 500)")
+    parser.add_argument("--reads", type=int, default=200,
+                       help="Single-entry reads per profile (default: 200)")
+    parser.add_argument("--profile", choices=list(STORAGE_PROFILES),
+                       help="Benchmark only this profile")
+
+    args = parser.parse_args()
+    profiles = [args.profile] if args.profile else list(STORAGE_PROFILES)
+
+    print("🔐 SecurePass Storage Benchmark")
+    print("=" * 72)
+    print(f"{'Profile':<10} {'write mean':>12} {'write p95':>12} {'read mean':>12} "
+          f"{'read p95':>12} {'listing':>10}")
+
+    for profile in profiles:
+        result = benchmark_profile(profile, args.entries, args.reads)
+        print(f"{profile:<10} "
+              f"{result['write_mean'] * 1000:>10.3f}ms {result['write_p95'] * 1000:>10.3f}ms "
+              f"{result['read_mean'] * 1000:>10.3f}ms {result['read_p95'] * 1000:>10.3f}ms "
+              f"{result['listing'] * 1000:>8.1f}ms")
+
+    print()
+    print(f"Entries written: {args.entries}, single-entry reads: {args.reads}")
+
+
+if __name__ == "__main__":
+    main()
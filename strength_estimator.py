@@ -0,0 +1,385 @@
+"""
+Pattern-based password strength estimation for SecurePass
+
+A zxcvbn-style estimator: the password is scanned for guessable patterns
+(common passwords and words, including reversed and l33t spellings,
+keyboard walks, alphabetic/numeric sequences, repeats and years), each
+match is assigned a number of guesses, and dynamic programming finds
+the cheapest way to cover the whole password with matches and
+brute-forced gaps. The result is reported as guesses, entropy bits and
+a 0-4 score.
+
+estimate() is memoized per password, so re-rating the same text on
+every keystroke (or typing back over it) costs a dictionary lookup. The
+memo holds plaintext, so it is bounded, cleared with clear_cache() when
+the vault locks, and bypassed (cached=False) for bulk rating such as
+the vault health audit.
+"""
+
+import math
+import re
+from datetime import date
+from functools import lru_cache
+
+MAX_LENGTH = 100  # Longer input is only analysed up to this length
+BRUTEFORCE_CARDINALITY = 10
+MIN_SUBMATCH_GUESSES_SINGLE_CHAR = 10
+MIN_SUBMATCH_GUESSES_MULTI_CHAR = 50
+MIN_YEAR_SPACE = 20
+
+# Guess counts separating scores 0/1/2/3/4
+SCORE_THRESHOLDS = (1e3, 1e6, 1e8, 1e10)
+
+COMMON_PASSWORDS = (
+    "123456 password 12345678 qwerty 123456789 12345 1234 111111 1234567 dragon "
+    "123123 baseball abc123 football monkey letmein 696969 shadow master 666666 "
+    "qwertyuiop 123321 mustang 1234567890 michael 654321 superman 1qaz2wsx 7777777 "
+    "121212 000000 qazwsx 123qwe killer trustno1 jordan jennifer zxcvbnm asdfgh "
+    "hunter buster soccer harley batman andrew tigger sunshine iloveyou 2000 charlie "
+    "robert thomas hockey ranger daniel starwars klaster 112233 george computer "
+    "michelle jessica pepper 1111 zxcvbn 555555 11111111 131313 freedom 777777 pass "
+    "maggie 159753 aaaaaa ginger princess joshua cheese amanda summer love ashley "
+    "nicole chelsea biteme matthew access yankees 987654321 dallas austin thunder "
+    "taylor matrix admin welcome login passw0rd p@ssw0rd qwerty123 letmein1 "
+    "password1 password123 abc12345 secret whatever dragon1 monkey1 football1"
+).split()
+
+COMMON_WORDS = (
+    "the be to of and a in that have it for not on with he as you do at this but "
+    "his by from they we say her she or an will my one all would there their what "
+    "so up out if about who get which go me when make can like time no just him "
+    "know take people into year your good some could them see other than then now "
+    "look only come its over think also back after use two how our work first well "
+    "way even new want because any these give day most us apple orange banana "
+    "summer winter spring autumn monday friday sunday january june july december "
+    "red blue green black white yellow purple silver golden money angel blessed "
+    "family forever happy lucky flower heart secret shadow silver sparkle tiger "
+    "eagle falcon wolf lion bear dog cat horse bird fish mountain river ocean "
+    "forest garden house home school office company server admin user guest test "
+    "welcome hello world google apple microsoft github facebook twitter amazon"
+).split()
+
+# Ranked dictionary: earlier entries are guessed first
+_RANKED = {}
+for _word in COMMON_PASSWORDS + COMMON_WORDS:
+    _RANKED.setdefault(_word, len(_RANKED) + 1)
+
+L33T_TABLE = str.maketrans({'4': 'a', '@': 'a', '8': 'b', '(': 'c', '3': 'e', '6': 'g',
+                            '1': 'i', '!': 'i', '|': 'l', '0': 'o', '$': 's', '5': 's',
+                            '7': 't', '+': 't', '2': 'z'})
+
+KEYBOARD_ROWS = (
+    ("`1234567890-=", "~!@#$%^&*()_+", 0.0),
+    ("qwertyuiop[]\\", "QWERTYUIOP{}|", 1.5),
+    ("asdfghjkl;'", 'ASDFGHJKL:"', 1.75),
+    ("zxcvbnm,./", "ZXCVBNM<>?", 2.25),
+)
+
+YEAR_PATTERN = re.compile(r"19\d\d|20\d\d")
+REPEAT_PATTERN = re.compile(r"(.+?)\1+")
+
+
+def _build_trie(words):
+    """Character trie mapping each complete word to its rank under the '' key"""
+    root = {}
+    for word, rank in words.items():
+        node = root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = rank
+    return root
+
+
+def _build_keyboard():
+    """Map each key (shifted or not) to its slanted-grid position and shift state"""
+    positions = {}
+    for row, (plain, shifted, offset) in enumerate(KEYBOARD_ROWS):
+        for col, (key, shifted_key) in enumerate(zip(plain, shifted)):
+            positions[key] = (offset + col, row, False)
+            positions[shifted_key] = (offset + col, row, True)
+    return positions
+
+
+TRIE = _build_trie(_RANKED)
+KEY_POSITIONS = _build_keyboard()
+KEY_COUNT = len({(x, y) for x, y, _ in KEY_POSITIONS.values()})
+KEY_AVERAGE_DEGREE = 6 * (1 - 4 / KEY_COUNT)  # Interior keys have six neighbours
+
+
+def _key_direction(a, b):
+    """Direction of a keyboard step from a to b, or None if not adjacent"""
+    if a not in KEY_POSITIONS or b not in KEY_POSITIONS:
+        return None
+    ax, ay, _ = KEY_POSITIONS[a]
+    bx, by, _ = KEY_POSITIONS[b]
+    dx, dy = bx - ax, by - ay
+    if dy == 0 and abs(dx) == 1:
+        return (1 if dx > 0 else -1, 0)
+    if abs(dy) == 1 and abs(dx) < 1:
+        return (1 if dx > 0 else -1, dy)
+    return None
+
+
+def _nck(n, k):
+    """Binomial coefficient"""
+    if k > n:
+        return 0
+    return math.comb(n, k)
+
+
+# Matchers: each returns dicts with i, j (inclusive), pattern, token and guesses
+
+def _dictionary_matches(password):
+    matches = []
+    lowered = password.lower()
+    variants = (('dictionary', lowered, 1), ('reversed', lowered[::-1], 2),
+                ('l33t', lowered.translate(L33T_TABLE), 2))
+    n = len(password)
+    for pattern, text, multiplier in variants:
+        if pattern == 'l33t' and text == lowered:
+            continue
+        for start in range(n):
+            node = TRIE
+            for end in range(start, n):
+                node = node.get(text[end])
+                if node is None:
+                    break
+                if '' in node:
+                    i, j = (n - 1 - end, n - 1 - start) if pattern == 'reversed' else (start, end)
+                    token = password[i:j + 1]
+                    guesses = node[''] * multiplier * _uppercase_variations(token)
+                    matches.append({'i': i, 'j': j, 'pattern': pattern, 'token': token,
+                                    'guesses': guesses})
+    return matches
+
+
+def _uppercase_variations(token):
+    """Extra guesses for capitalization beyond all-lowercase"""
+    if token.islower() or not any(c.isalpha() for c in token):
+        return 1
+    if token[0].isupper() and token[1:].islower() or token.isupper():
+        return 2
+    upper = sum(1 for c in token if c.isupper())
+    lower = sum(1 for c in token if c.islower())
+    return sum(_nck(upper + lower, k) for k in range(1, min(upper, lower) + 1))
+
+
+def _sequence_matches(password):
+    matches = []
+    n = len(password)
+    i = 0
+    while i < n - 2:
+        delta = ord(password[i + 1]) - ord(password[i])
+        if delta not in (1, -1) or password[i].isalnum() != password[i + 1].isalnum():
+            i += 1
+            continue
+        j = i + 1
+        while j + 1 < n and ord(password[j + 1]) - ord(password[j]) == delta:
+            j += 1
+        if j - i >= 2:
+            token = password[i:j + 1]
+            first = token[0]
+            if first in 'aAzZ019':
+                base = 4
+            elif first.isdigit():
+                base = 10
+            else:
+                base = 26
+            guesses = base * len(token) * (1 if delta > 0 else 2)
+            matches.append({'i': i, 'j': j, 'pattern': 'sequence', 'token': token,
+                            'guesses': guesses})
+        i = j
+    return matches
+
+
+def _spatial_matches(password):
+    matches = []
+    n = len(password)
+    i = 0
+    while i < n - 2:
+        j = i
+        turns = 0
+        shifted = 1 if KEY_POSITIONS.get(password[i], (0, 0, False))[2] else 0
+        last_direction = None
+        while j + 1 < n:
+            direction = _key_direction(password[j], password[j + 1])
+            if direction is None:
+                break
+            if direction != last_direction:
+                turns += 1
+                last_direction = direction
+            if KEY_POSITIONS[password[j + 1]][2]:
+                shifted += 1
+            j += 1
+        if j - i >= 2:
+            token = password[i:j + 1]
+            length = len(token)
+            guesses = 0
+            for step in range(2, length + 1):
+                for turn in range(1, min(turns, step - 1) + 1):
+                    guesses += _nck(step - 1, turn - 1) * KEY_COUNT * KEY_AVERAGE_DEGREE ** turn
+            if shifted:
+                unshifted = length - shifted
+                if unshifted == 0 or shifted == 0:
+                    guesses *= 2
+                else:
+                    guesses *= sum(_nck(length, k) for k in range(1, min(shifted, unshifted) + 1))
+            matches.append({'i': i, 'j': j, 'pattern': 'spatial', 'token': token,
+                            'guesses': guesses})
+            i = j
+        else:
+            i += 1
+    return matches
+
+
+def _repeat_matches(password):
+    matches = []
+    for found in REPEAT_PATTERN.finditer(password):
+        token, base = found.group(0), found.group(1)
+        if len(token) < 3:
+            continue
+        base_guesses = _estimate(base)['guesses']
+        matches.append({'i': found.start(), 'j': found.end() - 1, 'pattern': 'repeat', 'token': token,
+                        'guesses': base_guesses * (len(token) // len(base))})
+    return matches
+
+
+def _year_matches(password):
+    # Years are guessed outward from the current one
+    reference_year = date.today().year
+    matches = []
+    for found in YEAR_PATTERN.finditer(password):
+        year = int(found.group(0))
+        matches.append({'i': found.start(), 'j': found.end() - 1, 'pattern': 'year',
+                        'token': found.group(0),
+                        'guesses': max(abs(year - reference_year), MIN_YEAR_SPACE)})
+    return matches
+
+
+def _bruteforce_guesses(length):
+    """Guesses for an unmatched run of characters"""
+    guesses = BRUTEFORCE_CARDINALITY ** length
+    minimum = MIN_SUBMATCH_GUESSES_SINGLE_CHAR if length == 1 else MIN_SUBMATCH_GUESSES_MULTI_CHAR
+    return max(guesses, minimum + 1)
+
+
+def _prune(states):
+    """Drop covers another cover beats on both piece count and guesses product
+
+    Such a cover can never lead to a cheaper total, which keeps the
+    number of states per position small on long repetitive input. A
+    cover ending in a brute-force run only replaces one that does too,
+    since it cannot be followed by another run.
+    """
+    kept = {}
+    lowest_any = lowest_match = None
+    for l in sorted(states):
+        product, sequence, total = states[l]
+        ends_in_run = sequence[-1]['pattern'] == 'bruteforce'
+        if lowest_match is not None and lowest_match <= product:
+            continue
+        if ends_in_run and lowest_any is not None and lowest_any <= product:
+            continue
+        kept[l] = states[l]
+        lowest_any = product if lowest_any is None else min(lowest_any, product)
+        if not ends_in_run:
+            lowest_match = product if lowest_match is None else min(lowest_match, product)
+    return kept
+
+
+def _most_guessable(password, matches):
+    """Minimum-guess cover of the password by matches and brute-force runs
+
+    best[k] maps a sequence length l to (guesses product, sequence) for
+    the best cover of password[:k + 1] using l pieces; the total is
+    l! * product + 10000^(l - 1), as in zxcvbn.
+    """
+    n = len(password)
+    by_end = [[] for _ in range(n)]
+    for match in matches:
+        by_end[match['j']].append(match)
+
+    best = [dict() for _ in range(n)]
+
+    def consider(k, match, l, product, sequence):
+        candidate = product * match['guesses']
+        total = math.factorial(l) * candidate + 10000 ** (l - 1)
+        current = best[k].get(l)
+        if current is None or total < current[2]:
+            best[k][l] = (candidate, sequence + [match], total)
+
+    for k in range(n):
+        for match in by_end[k]:
+            i = match['i']
+            if i == 0:
+                consider(k, match, 1, 1, [])
+            else:
+                for l, (product, sequence, _) in list(best[i - 1].items()):
+                    consider(k, match, l + 1, product, sequence)
+        # Brute-force runs ending at k, never directly after another brute-force run
+        for i in range(k + 1):
+            run = {'i': i, 'j': k, 'pattern': 'bruteforce', 'token': password[i:k + 1],
+                   'guesses': _bruteforce_guesses(k - i + 1)}
+            if i == 0:
+                consider(k, run, 1, 1, [])
+            else:
+                for l, (product, sequence, _) in list(best[i - 1].items()):
+                    if sequence[-1]['pattern'] != 'bruteforce':
+                        consider(k, run, l + 1, product, sequence)
+        best[k] = _prune(best[k])
+
+    _, sequence, guesses = min(best[n - 1].values(), key=lambda entry: entry[2])
+    return guesses, sequence
+
+
+def _feedback(sequence, length):
+    """Suggestions based on the weakest patterns found"""
+    feedback = []
+    patterns = {match['pattern'] for match in sequence}
+    if patterns & {'dictionary', 'reversed', 'l33t'}:
+        feedback.append("Avoid common words and passwords")
+    if 'l33t' in patterns:
+        feedback.append("Predictable substitutions like '@' for 'a' don't help much")
+    if 'spatial' in patterns:
+        feedback.append("Avoid keyboard patterns")
+    if 'sequence' in patterns:
+        feedback.append("Avoid sequences like abc or 123")
+    if 'repeat' in patterns:
+        feedback.append("Avoid repeated characters and words")
+    if 'year' in patterns:
+        feedback.append("Avoid years and dates")
+    if length < 12:
+        feedback.append("Use at least 12 characters")
+    return feedback
+
+
+def _estimate(password: str) -> dict:
+    analysed = password[:MAX_LENGTH]
+    if not analysed:
+        return {'guesses': 1, 'entropy_bits': 0.0, 'score': 0, 'sequence': (), 'feedback': ()}
+
+    matches = (_dictionary_matches(analysed) + _sequence_matches(analysed) +
+               _spatial_matches(analysed) + _repeat_matches(analysed) + _year_matches(analysed))
+    guesses, sequence = _most_guessable(analysed, matches)
+    score = sum(1 for threshold in SCORE_THRESHOLDS if guesses >= threshold)
+
+    return {
+        'guesses': guesses,
+        'entropy_bits': math.log2(guesses),
+        'score': score,
+        'sequence': tuple((match['pattern'], match['token']) for match in sequence),
+        'feedback': tuple(_feedback(sequence, len(password)))
+    }
+
+
+_cached_estimate = lru_cache(maxsize=256)(_estimate)
+
+
+def estimate(password: str, cached: bool = True) -> dict:
+    """Estimate guesses, entropy bits and a 0-4 score (results are shared; do not modify)"""
+    return _cached_estimate(password) if cached else _estimate(password)
+
+
+def clear_cache():
+    """Forget every memoized password"""
+    _cached_estimate.cache_clear()
@@ -0,0 +1,197 @@
+"""
+Background task runner for the SecurePass GUI
+
+Database and crypto work (unlock KDFs, listing decrypts, imports and
+exports) runs on a single worker thread so the Tk main loop never blocks.
+Using one worker serializes all GUI access to the shared SQLite
+connection; the worker also holds the database's connection lock while
+a task runs, so other threads using the connection wait for it. Long
+work that opens its own database connection (such as an online backup)
+is started with start() instead: it gets a thread of its own and does
+not take the lock, so it neither waits behind nor stalls the queued
+tasks.
+
+Tk widgets may only be touched from the main thread, so results,
+errors and progress updates are queued by the worker and delivered by a
+root.after poll on the main thread. An exception raised by one of those
+callbacks goes to the runner's fallback on_error handler, and is logged
+if there is none or the failing callback was that handler.
+"""
+
+import logging
+import queue
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task when it notices it has been cancelled"""
+
+
+class Task:
+    """Handle for a submitted task"""
+
+    def __init__(self, runner, name, func, args, kwargs, on_success, on_error, on_progress):
+        self.runner = runner
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Request cancellation; callbacks of a cancelled task never run"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check(self):
+        """Raise TaskCancelled if the task has been cancelled (worker thread)"""
+        if self.cancelled:
+            raise TaskCancelled(self.name)
+
+    def report_progress(self, *args):
+        """Progress callback for the task function: checks for cancellation and
+        forwards the update to on_progress on the main thread"""
+        self.check()
+        if self.on_progress:
+            self.runner._post(self, self.on_progress, args)
+
+
+class TaskRunner:
+    POLL_INTERVAL_MS = 50
+
+    def __init__(self, root, lock=None, on_busy=None, on_error=None):
+        self.root = root
+        self.lock = lock or threading.RLock()
+        # on_busy(busy, name) is called on the main thread when work starts or stops
+        self.on_busy = on_busy
+        # Fallback for tasks submitted without their own on_error
+        self.on_error = on_error
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="securepass-task")
+        self._results = queue.Queue()
+        self._tasks = []
+        self._polling = False
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._tasks)
+
+    def submit(self, func, *args, name="Working", on_success=None, on_error=None,
+               on_progress=None, **kwargs) -> Task:
+        """Run func(*args, **kwargs) on the worker thread (call from the main thread)
+
+        on_success(result) and on_error(exception) run on the main thread.
+        When on_progress is given, func receives progress_callback=..., which
+        forwards its arguments to on_progress and raises TaskCancelled once
+        the task is cancelled.
+        """
+        task = self._track(name, func, args, kwargs, on_success, on_error, on_progress)
+        self._executor.submit(self._execute, task)
+        return task
+
+    def start(self, func, *args, name="Working", on_success=None, on_error=None,
+              on_progress=None, **kwargs) -> Task:
+        """Like submit(), but run func on its own thread without the connection lock
+
+        Only for functions that do not use the shared connection.
+        """
+        task = self._track(name, func, args, kwargs, on_success, on_error, on_progress)
+        threading.Thread(target=self._execute, args=(task, False), name="securepass-task-unlocked",
+                         daemon=True).start()
+        return task
+
+    def _track(self, name, func, args, kwargs, on_success, on_error, on_progress) -> Task:
+        """Create a task and start polling for its outcome"""
+        task = Task(self, name, func, args, kwargs, on_success, on_error, on_progress)
+        if on_progress:
+            task.kwargs['progress_callback'] = task.report_progress
+
+        self._tasks.append(task)
+        if len(self._tasks) == 1:
+            self._notify_busy()
+        self._schedule_poll()
+        return task
+
+    def cancel_all(self):
+        """Cancel every queued or running task"""
+        for task in list(self._tasks):
+            task.cancel()
+
+    def shutdown(self):
+        """Cancel outstanding work and wait for the worker to finish"""
+        self.cancel_all()
+        self._executor.shutdown(wait=True)
+
+    def _execute(self, task, locked=True):
+        """Worker thread: run one task and queue its outcome"""
+        if task.cancelled:
+            self._results.put((task, None, None))
+            return
+        try:
+            with self.lock if locked else nullcontext():
+                task.check()
+                result = task.func(*task.args, **task.kwargs)
+        except TaskCancelled:
+            self._results.put((task, None, None))
+        except Exception as e:
+            self._results.put((task, task.on_error or self.on_error, (e,)))
+        else:
+            self._results.put((task, task.on_success, (result,)))
+
+    def _post(self, task, callback, args):
+        """Worker thread: queue a progress update for the main thread"""
+        self._results.put((None, lambda: None if task.cancelled else callback(*args), ()))
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        """Main thread: deliver queued progress updates and task results"""
+        while True:
+            try:
+                task, callback, args = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if task is not None:
+                self._tasks.remove(task)
+                if not self._tasks:
+                    self._notify_busy()
+                if task.cancelled:
+                    continue
+
+            if callback:
+                try:
+                    callback(*args)
+                except Exception as e:
+                    self._callback_failed(callback, e)
+
+        self._polling = False
+        if self._tasks:
+            self._schedule_poll()
+
+    def _callback_failed(self, callback, error):
+        """Main thread: pass a callback's exception to the fallback error handler, or log it"""
+        if self.on_error and callback is not self.on_error:
+            try:
+                self.on_error(error)
+                return
+            except Exception:
+                logger.exception("Task error handler failed")
+        logger.error("Task callback failed", exc_info=error)
+
+    def _notify_busy(self):
+        if self.on_busy:
+            name = self._tasks[0].name if self._tasks else None
+            self.on_busy(self.busy, name)
@@ -0,0 +1,42 @@
+import sqlite3
+
+import pytest
+
+from activity_log import ActivityLogWriter
+
+
+def make_log(path):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE activity_log (id INTEGER PRIMARY KEY AUTOINCREMENT, action TEXT NOT NULL, '
+                 'timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP, details TEXT)')
+    conn.commit()
+    return conn
+
+
+def test_events_are_written_in_one_batch_with_the_callers_commit(tmp_path):
+    conn = make_log(str(tmp_path / "log.db"))
+    writer = ActivityLogWriter(lambda timeout=5.0: sqlite3.connect(str(tmp_path / "log.db")), flush_size=100)
+    writer.append("Password added", "Service: GitHub")
+    writer.append("Password updated", "ID: 1")
+    assert conn.execute('SELECT COUNT(*) FROM activity_log').fetchone()[0] == 0
+
+    events = writer.drain_into(conn.cursor(), [("Password deleted", "ID: 1")])
+    conn.commit()
+    writer.record_flush(events)
+
+    assert [row[0] for row in conn.execute('SELECT action FROM activity_log ORDER BY id')] == \
+        ["Password added", "Password updated", "Password deleted"]
+    assert writer.get_stats()['flushes'] == 1 and writer.pending_count() == 0
+
+
+def test_failed_flush_keeps_events_queued(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "log.db"))
+    writer = ActivityLogWriter(lambda timeout=5.0: conn)
+    writer.append("Data exported")
+
+    with pytest.raises(sqlite3.OperationalError):
+        writer.flush(conn)
+    assert writer.pending_count() == 1
+
+    make_log(str(tmp_path / "log.db"))
+    assert writer.flush(conn) == 1
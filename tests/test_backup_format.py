@@ -0,0 +1,49 @@
+import io
+import os
+
+import pytest
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from backup_format import BackupFormatError, ChunkReader, ChunkWriter
+
+CIPHER = AESGCM(os.urandom(32))
+
+
+def write_backup(chunks):
+    f = io.BytesIO()
+    writer = ChunkWriter(f, CIPHER, {'count': sum(len(chunk) for chunk in chunks)})
+    for chunk in chunks:
+        writer.write_entries(chunk)
+    writer.finish()
+    return f.getvalue()
+
+
+def read_entries(data, start=1):
+    reader = ChunkReader(io.BytesIO(data), CIPHER)
+    entries = [entry for _, chunk in reader.iter_chunks(start) for entry in chunk]
+    return entries, reader.trailer
+
+
+def test_chunks_round_trip_and_resume_from_a_later_chunk():
+    data = write_backup([[{'service': 'a'}, {'service': 'b'}], [{'service': 'c'}]])
+
+    assert read_entries(data) == ([{'service': 'a'}, {'service': 'b'}, {'service': 'c'}], {'count': 3})
+    assert read_entries(data, start=2)[0] == [{'service': 'c'}]
+
+
+def test_backup_without_trailer_is_rejected():
+    # An export that stopped before finish() ends on a valid entry chunk
+    f = io.BytesIO()
+    writer = ChunkWriter(f, CIPHER, {'count': 2})
+    writer.write_entries([{'service': 'a'}])
+    writer.write_entries([{'service': 'b'}])
+
+    with pytest.raises(BackupFormatError, match="truncated"):
+        read_entries(f.getvalue())
+
+
+def test_tampered_chunk_fails_authentication():
+    data = bytearray(write_backup([[{'service': 'a'}]]))
+    data[-40] ^= 1
+    with pytest.raises(BackupFormatError, match="failed authentication"):
+        read_entries(bytes(data))
@@ -0,0 +1,56 @@
+import shutil
+import sqlite3
+
+import backup_utility
+
+
+def make_database(path, values):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('CREATE TABLE items (value TEXT)')
+    conn.executemany('INSERT INTO items VALUES (?)', [(value,) for value in values])
+    conn.commit()
+    return conn
+
+
+def read_values(path):
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+        return [row[0] for row in conn.execute('SELECT value FROM items ORDER BY value')]
+    finally:
+        conn.close()
+
+
+def test_restore_over_database_with_leftover_wal(tmp_path, monkeypatch):
+    # A vault whose last commits are still in its WAL, as left by a crash
+    live = make_database(str(tmp_path / "live.db"), ['current', 'in-wal'])
+    target = tmp_path / "passwords.db"
+    for suffix in ('', '-wal', '-shm'):
+        shutil.copyfile(str(tmp_path / "live.db") + suffix, str(target) + suffix)
+    live.close()
+
+    backup = tmp_path / "backup.db"
+    make_database(str(backup), ['from-backup']).close()
+
+    monkeypatch.setattr('builtins.input', lambda prompt: 'y')
+    assert backup_utility.restore_backup(str(backup), str(target))
+
+    assert read_values(str(target)) == ['from-backup']
+    pre_restore = [path for path in tmp_path.iterdir() if '.pre_restore_' in path.name]
+    assert len(pre_restore) == 1
+    assert read_values(str(pre_restore[0])) == ['current', 'in-wal']
+
+
+def test_restore_refuses_database_in_use(tmp_path, monkeypatch):
+    target = str(tmp_path / "passwords.db")
+    in_use = make_database(target, ['current'])
+    backup = str(tmp_path / "backup.db")
+    make_database(backup, ['from-backup']).close()
+
+    monkeypatch.setattr('builtins.input', lambda prompt: 'y')
+    try:
+        assert not backup_utility.restore_backup(backup, target)
+    finally:
+        in_use.close()
+    assert read_values(target) == ['current']
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from breach_check import BreachFormatError, BreachWriter, HASH_SHA1, get_breach_database, sha1_digest
+from password_generator import PasswordGenerator
+
+
+def write_breach_db(path, passwords):
+    with open(path, 'wb') as f:
+        writer = BreachWriter(f, HASH_SHA1)
+        for digest in sorted(sha1_digest(password) for password in passwords):
+            writer.add(digest, 3)
+        writer.close()
+
+
+def test_database_installed_later_is_picked_up(tmp_path):
+    path = str(tmp_path / "breach.bin")
+    generator = PasswordGenerator(path)
+    assert generator.check_breached("password") == 0
+
+    write_breach_db(path, ["password"])
+    assert generator.check_breached("password") == 3
+
+
+def test_malformed_database_is_reported_as_not_checked(tmp_path):
+    path = str(tmp_path / "breach.bin")
+    with open(path, 'wb') as f:
+        f.write(b"not a breach database")
+    generator = PasswordGenerator(path)
+
+    strength = generator.check_password_strength("password")
+    assert strength['breached'] is None
+    assert strength['strength'] != "Breached"
+    with pytest.raises(BreachFormatError):
+        get_breach_database(path)
+
+    # Replacing the file (new mtime) is noticed without a restart
+    write_breach_db(path, ["password"])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert generator.check_password_strength("password")['breached'] == 3
@@ -0,0 +1,320 @@
+import sqlite3
+
+import bcrypt
+import pytest
+from cryptography.exceptions import InvalidTag
+
+import kdf
+from database import ROW_FORMAT_V2, DatabaseManager, SecurityManager
+from task_runner import TaskCancelled
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "vault.db")
+    manager = DatabaseManager(path, SecurityManager(path))
+    manager.set_master_password('master-pass-1', 'pbkdf2-sha256', {'iterations': 1000})
+    yield manager
+    manager.close()
+
+
+def test_add_update_delete_round_trip(db):
+    added = db.add_password('GitHub', 'me', 'first-secret')
+    assert added['created_at'] and added['updated_at']
+
+    updated = db.update_password(added['id'], 'GitHub', 'me', 'second-secret')
+    assert updated['created_at'] == added['created_at']
+    assert db.get_secret(added['id'])['password'] == 'second-secret'
+
+    deleted = db.delete_password(added['id'])
+    assert deleted['service'] == 'GitHub'
+    assert db.list_entries() == []
+
+
+def test_missing_entries_are_reported_as_none(db):
+    assert db.update_password(999, 'Nope', 'me', 'secret') is None
+    assert db.delete_password(999) is None
+
+
+def logged_actions(db):
+    return [action for action, _, _ in db.get_activity_log(100)]
+
+
+def test_update_of_missing_entry_is_not_logged(db):
+    db.update_password(999, 'Nope', 'me', 'secret')
+    assert 'Password updated' not in logged_actions(db)
+
+
+def test_kdf_change_is_not_logged_as_password_change(db):
+    assert db.set_kdf_settings('master-pass-1', 'pbkdf2-sha256', {'iterations': 2000})
+    actions = logged_actions(db)
+    assert 'KDF settings changed' in actions
+    assert 'Master password changed' not in actions
+
+
+def test_failed_rotation_locks_vault_and_resumes_on_unlock(db):
+    ids = [db.add_password(f'service{i}', 'me', f'secret{i}')['id'] for i in range(5)]
+
+    def interrupt(done, total):
+        raise OSError("disk full")
+
+    with pytest.raises(RuntimeError, match="vault was locked"):
+        db.rotate_data_key(progress_callback=interrupt, batch_size=2)
+    assert db.security.row_cipher is None
+
+    assert db.verify_master_password('master-pass-1')
+    assert [db.get_secret(id_)['password'] for id_ in ids] == [f'secret{i}' for i in range(5)]
+    assert db.conn.execute('SELECT pending_wrapped_key FROM master_auth').fetchone()[0] is None
+
+
+def test_search_writes_no_index_tokens(db):
+    db.add_password('GitHub', 'me@example.com', 'secret')
+    db.add_password('GitLab', 'other', 'secret')
+
+    assert [entry['service'] for entry in db.search_passwords('git')] == ['GitHub', 'GitLab']
+    tables = {name for name, in db.conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert 'search_index' not in tables
+
+
+def test_listing_never_opens_the_secret_envelope(db):
+    for i in range(3):
+        db.add_password(f'Service{i}', f'user{i}', f'secret{i}', 'note')
+    db.clear_cache()
+    # Listings must still work when every secret envelope is unreadable
+    db.conn.execute('UPDATE passwords SET secret_envelope=zeroblob(64)')
+    db.conn.commit()
+
+    assert [entry['service'] for entry in db.list_entries()] == ['Service0', 'Service1', 'Service2']
+    assert 'password' not in db.list_entries()[0]
+    with pytest.raises(InvalidTag):
+        db.get_secret(db.list_entries()[0]['id'])
+
+
+def test_single_envelope_rows_migrate_to_split_envelopes(db):
+    envelope = db.security.encrypt_entry(('Legacy', 'me', 'old-secret', 'old-note'))
+    db.conn.execute("INSERT INTO passwords (service, username, password, notes, format_version, envelope) "
+                    "VALUES ('', '', '', '', ?, ?)", (ROW_FORMAT_V2, envelope))
+    db.conn.commit()
+    db.clear_cache()
+    id_ = db.list_entries()[0]['id']
+    assert db.get_secret(id_) == {'password': 'old-secret', 'notes': 'old-note'}
+
+    assert db.migrate_legacy_rows() == 1
+    assert db.count_legacy_rows() == 0
+    assert db.get_secret(id_) == {'password': 'old-secret', 'notes': 'old-note'}
+    assert db.get_all_passwords()[0]['service'] == 'Legacy'
+
+
+def test_chunked_decryption_matches_row_by_row(db):
+    db.decrypt_chunk_size = 3
+    ids = [db.add_password(f'Service{i}', f'user{i}', f'secret{i}', f'note{i}')['id'] for i in range(10)]
+
+    entries = db.get_all_passwords()
+    assert [entry['id'] for entry in entries] == ids
+    assert [(entry['password'], entry['notes']) for entry in entries] == \
+        [tuple(db.get_secret(id_).values()) for id_ in ids]
+    assert [len(chunk) for chunk in db.iter_password_chunks()] == [3, 3, 3, 1]
+
+
+def test_interrupted_stream_import_resumes_from_checkpoint(db, tmp_path):
+    db.decrypt_chunk_size = 2
+    for i in range(5):
+        db.add_password(f'Service{i}', f'user{i}', f'secret{i}')
+    backup = str(tmp_path / "backup.spx")
+    db.export_data(backup)
+    for entry in db.list_entries():
+        db.delete_password(entry['id'])
+
+    def interrupt(done, total):
+        raise TaskCancelled("Importing")
+    with pytest.raises(TaskCancelled):
+        db.import_data(backup, progress_callback=interrupt)
+    assert db.get_import_checkpoint(backup) == {'next_chunk': 2, 'entries_done': 2}
+    assert len(db.list_entries()) == 2
+
+    assert db.import_data(backup) == 3
+    assert db.get_import_checkpoint(backup) is None
+    assert sorted(db.get_secret(entry['id'])['password'] for entry in db.list_entries()) == \
+        [f'secret{i}' for i in range(5)]
+
+
+def test_background_migration_failure_is_raised_to_the_waiter(db):
+    db.conn.execute("INSERT INTO passwords (service, username, password, notes) VALUES (?, ?, ?, ?)",
+                    (db.security.encrypt_data('Legacy'), db.security.encrypt_data('me'), 'not-a-token', ''))
+    db.conn.commit()
+
+    assert db.start_background_migration()
+    with pytest.raises(RuntimeError, match="Row format migration failed"):
+        db.wait_for_migration()
+    assert db.count_legacy_rows() == 1
+
+
+def test_background_migration_converts_v1_rows(db):
+    for i in range(5):
+        db.conn.execute("INSERT INTO passwords (service, username, password, notes) VALUES (?, ?, ?, ?)",
+                        tuple(db.security.encrypt_data(value) for value in (f'Legacy{i}', 'me', f'secret{i}', '')))
+    db.conn.commit()
+    db.clear_cache()
+
+    assert db.start_background_migration(batch_size=2)
+    db.wait_for_migration()
+
+    assert db.count_legacy_rows() == 0
+    assert [(entry['service'], entry['password']) for entry in db.get_all_passwords()] == \
+        [(f'Legacy{i}', f'secret{i}') for i in range(5)]
+
+
+def test_failed_delete_keeps_the_cached_entry(db, monkeypatch):
+    entry = db.add_password('GitHub', 'me', 'secret')
+    db.list_entries()
+
+    def failing_commit(*args):
+        raise sqlite3.OperationalError("disk I/O error")
+    monkeypatch.setattr(db, '_commit', failing_commit)
+    with pytest.raises(sqlite3.OperationalError):
+        db.delete_password(entry['id'])
+    monkeypatch.undo()
+
+    assert [cached['id'] for cached in db.list_entries()] == [entry['id']]
+    assert db.get_secret(entry['id'])['password'] == 'secret'
+    assert db.delete_password(entry['id'])['service'] == 'GitHub'
+    assert db.list_entries() == []
+
+
+def test_session_cache_follows_writes_and_is_wiped_on_lock(db):
+    entry = db.add_password('GitHub', 'me', 'secret')
+    db.clear_cache()
+    db.list_entries()
+    db.list_entries()
+    assert db.get_cache_stats()['hits'] >= 1
+
+    db.update_password(entry['id'], 'GitHub', 'renamed', 'secret')
+    assert db.list_entries()[0]['username'] == 'renamed'
+
+    db.lock()
+    assert db.get_cache_stats()['entries'] == 0
+
+
+def test_bulk_import_caches_entries_under_their_real_ids(db):
+    db.add_password('Existing', 'me', 'secret')
+    db.list_entries()
+    # A hole in the id sequence must not shift the cached entries
+    db.conn.execute("UPDATE sqlite_sequence SET seq = seq + 10 WHERE name='passwords'")
+    db.conn.commit()
+
+    entries = [{'service': f'Imported{i}', 'username': 'me', 'password': f'secret{i}'} for i in range(3)]
+    assert db.bulk_add_passwords(entries, batch_size=2) == 3
+
+    cached = {entry['id']: entry['service'] for entry in db.list_entries()}
+    db.clear_cache()
+    assert cached == {entry['id']: entry['service'] for entry in db.list_entries()}
+    assert all(db.get_secret(id_)['password'] == f'secret{i}'
+               for i, id_ in enumerate(sorted(id_ for id_, service in cached.items() if service != 'Existing')))
+
+
+def test_bulk_import_is_one_transaction_with_one_log_row(db):
+    entries = [{'service': f'Imported{i}', 'username': 'me', 'password': f'secret{i}'} for i in range(5)]
+    entries[3] = {'service': 'Broken', 'username': 'me'}  # no password
+
+    with pytest.raises(KeyError):
+        db.bulk_add_passwords(entries, batch_size=2)
+    assert db.list_entries() == []
+
+    del entries[3]
+    assert db.bulk_add_passwords(entries, batch_size=2) == 4
+    actions = [action for action, _, _ in db.get_activity_log()]
+    assert actions.count("Data imported") == 1
+    assert "Password added" not in actions
+
+
+def test_master_password_change_leaves_entries_untouched(db):
+    db.add_password('GitHub', 'me', 'secret')
+    before = db.conn.execute('SELECT envelope, secret_envelope FROM passwords').fetchall()
+
+    assert not db.change_master_password('wrong-pass', 'master-pass-2')
+    assert db.change_master_password('master-pass-1', 'master-pass-2')
+
+    assert db.conn.execute('SELECT envelope, secret_envelope FROM passwords').fetchall() == before
+    db.lock()
+    assert not db.verify_master_password('master-pass-1')
+    assert db.verify_master_password('master-pass-2')
+    assert db.get_secret(db.list_entries()[0]['id'])['password'] == 'secret'
+
+
+def test_legacy_vault_moves_to_a_single_kdf_unlock(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    db = DatabaseManager(path, SecurityManager(path))
+    try:
+        salt = db.security.generate_salt()
+        db.conn.execute('INSERT INTO master_auth (password_hash, salt) VALUES (?, ?)',
+                        (bcrypt.hashpw(b'legacy-pass', bcrypt.gensalt(4)), salt))
+        # Pre-envelope vaults keyed their rows directly by the password-derived key
+        db.security.setup_encryption('legacy-pass', salt)
+        db.conn.execute("INSERT INTO passwords (service, username, password, notes) VALUES (?, ?, ?, ?)",
+                        tuple(db.security.encrypt_data(value) for value in ('GitHub', 'me', 'secret', '')))
+        db.conn.commit()
+        db.security.clear_keys()
+
+        assert db.verify_master_password('legacy-pass')
+        password_hash, verifier = db.conn.execute('SELECT password_hash, auth_verifier FROM master_auth').fetchone()
+        assert password_hash is None and verifier is not None
+
+        db.lock()
+        calls = []
+        derive = kdf.derive
+        monkeypatch.setattr(kdf, 'derive', lambda *args: calls.append(args[0]) or derive(*args))
+        assert not db.verify_master_password('wrong-pass')
+        assert db.verify_master_password('legacy-pass')
+        assert len(calls) == 2
+        assert db.get_secret(db.list_entries()[0]['id'])['password'] == 'secret'
+    finally:
+        db.close()
+
+
+def test_reused_passwords_are_clustered_without_decrypting(db, monkeypatch):
+    db.add_password('Mail', 'me', 'shared')
+    db.add_password('bank', 'me', 'unique')
+    db.add_password('Forum', 'me', 'shared')
+    db.add_password('Shop', 'me', 'other')
+    db.add_password('Blog', 'me', 'other')
+    db.add_password('Chat', 'me', 'shared')
+
+    def no_decrypt(*args, **kwargs):
+        raise AssertionError("find_reused_passwords decrypted a row")
+
+    monkeypatch.setattr(db.security, 'decrypt_entry', no_decrypt)
+    clusters = db.find_reused_passwords()
+
+    assert [[entry['service'] for entry in cluster] for cluster in clusters] == [
+        ['Chat', 'Forum', 'Mail'], ['Blog', 'Shop']]
+
+
+def test_missing_fingerprints_are_backfilled_before_clustering(db):
+    db.add_password('Mail', 'me', 'shared')
+    db.add_password('Forum', 'me', 'shared')
+    db.conn.execute('UPDATE passwords SET fingerprint=NULL')
+    db.conn.commit()
+
+    clusters = db.find_reused_passwords()
+
+    assert [[entry['service'] for entry in cluster] for cluster in clusters] == [['Forum', 'Mail']]
+    assert db.ensure_fingerprints() == 0
+
+
+def test_storage_profile_switch_is_applied_and_persisted(db, tmp_path):
+    assert db.conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    db.set_storage_profile('durable')
+    assert db.conn.execute('PRAGMA synchronous').fetchone()[0] == 2  # FULL
+
+    reopened = DatabaseManager(db.db_path, SecurityManager(db.db_path))
+    try:
+        assert reopened.get_storage_profile() == 'durable'
+        extra = reopened.connect()
+        assert extra.execute('PRAGMA synchronous').fetchone()[0] == 2
+        extra.close()
+    finally:
+        reopened.close()
+
+    with pytest.raises(ValueError):
+        db.set_storage_profile('reckless')
@@ -0,0 +1,63 @@
+from fuzzy_index import FuzzyIndex, MAX_TYPO_RESULTS
+
+
+def build_index(services):
+    index = FuzzyIndex()
+    index.build([{'id': id_, 'service': service, 'username': 'me@example.com'}
+                 for id_, service in enumerate(services, 1)])
+    return index
+
+
+def matched_services(index, services, query):
+    return [services[entry_id - 1] for entry_id, _ in index.search(query)]
+
+
+def test_transposed_letters_still_match():
+    services = ['GitHub', 'GitLab', 'Gmail', 'Bank']
+    index = build_index(services)
+
+    assert matched_services(index, services, 'gihtub') == ['GitHub']
+
+
+def test_long_query_does_not_match_every_shared_stem():
+    services = [f'service{number}' for number in range(1, 1201)]
+    index = build_index(services)
+
+    results = matched_services(index, services, 'service12')
+
+    assert sorted(results) == sorted(service for service in services if 'service12' in service)
+    assert results[0] == 'service12'
+
+
+def test_typo_matches_are_capped():
+    services = [f'service{number}' for number in range(1, 1201)]
+    index = build_index(services)
+
+    results = matched_services(index, services, 'servcie12')
+
+    assert len(results) == MAX_TYPO_RESULTS
+    assert 'service12' in results
+
+
+def test_short_queries_match_substrings_only():
+    services = ['GitHub', 'Legit Bank', 'Gmail']
+    index = build_index(services)
+
+    assert matched_services(index, services, 'git') == ['GitHub', 'Legit Bank']
+    assert matched_services(index, services, 'gti') == []
+
+
+def test_build_finishing_after_clear_keeps_nothing():
+    index = FuzzyIndex()
+
+    def entries_locked_midway():
+        yield {'id': 1, 'service': 'GitHub', 'username': 'me'}
+        # The vault locks while the background build is still reading
+        index.clear()
+        yield {'id': 2, 'service': 'GitLab', 'username': 'me'}
+
+    index.build(entries_locked_midway())
+
+    assert not index.ready
+    assert len(index) == 0
+    assert index.search('github') == []
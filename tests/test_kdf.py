@@ -0,0 +1,35 @@
+import kdf
+from database import DatabaseManager, SecurityManager
+
+
+def test_calibration_scales_the_probe_cost_to_the_target(monkeypatch):
+    # Every probe takes 10 ms, so a 0.5 s target allows 50 times its cost
+    monkeypatch.setattr(kdf, 'time_derivation', lambda algorithm, params: 0.01)
+
+    assert kdf.calibrate('pbkdf2-sha256', 0.5) == {'iterations': 1000000}
+    assert kdf.calibrate('scrypt', 0.5) == {'n': 2 ** 17, 'r': 8, 'p': 1}
+    assert kdf.calibrate('bcrypt', 0.5) == {'rounds': 400}
+
+
+def test_calibration_never_goes_below_the_minimum(monkeypatch):
+    monkeypatch.setattr(kdf, 'time_derivation', lambda algorithm, params: 10.0)
+
+    for algorithm in kdf.KDF_ALGORITHMS:
+        assert kdf.calibrate(algorithm, 0.5) == kdf.MIN_PARAMS[algorithm]
+
+
+def test_calibrated_setting_round_trips_through_a_vault(tmp_path):
+    path = str(tmp_path / "vault.db")
+    db = DatabaseManager(path, SecurityManager(path))
+    try:
+        db.set_master_password('master-pass-1', 'pbkdf2-sha256', {'iterations': 1000})
+        db.add_password('GitHub', 'me', 'secret')
+        params = kdf.calibrate('scrypt', 0.01)
+
+        assert db.set_kdf_settings('master-pass-1', 'scrypt', params)
+        assert db.get_kdf_settings() == ('scrypt', params)
+        db.lock()
+        assert db.verify_master_password('master-pass-1')
+        assert db.get_secret(db.list_entries()[0]['id'])['password'] == 'secret'
+    finally:
+        db.close()
@@ -0,0 +1,35 @@
+import string
+
+from password_generator import AMBIGUOUS, ByteSampler, PasswordGenerator
+
+
+def test_every_password_has_each_enabled_class_and_no_ambiguous_characters():
+    generator = PasswordGenerator(breach_database=None)
+    ambiguous = set(''.join(AMBIGUOUS.values()))
+
+    passwords = list(generator.generate_many(500, {'length': 8}))
+
+    assert len(passwords) == 500 and all(len(password) == 8 for password in passwords)
+    for password in passwords:
+        assert any(c in string.ascii_lowercase for c in password)
+        assert any(c in string.ascii_uppercase for c in password)
+        assert any(c in string.digits for c in password)
+        assert any(c in generator.symbols for c in password)
+        assert not ambiguous & set(password)
+
+
+def test_disabled_classes_are_left_out():
+    generator = PasswordGenerator(breach_database=None)
+    policy = {'length': 16, 'use_uppercase': False, 'use_symbols': False}
+
+    for password in generator.generate_many(100, policy):
+        assert set(password) <= set(string.ascii_lowercase + string.digits)
+
+
+def test_sampler_rejects_bytes_that_would_bias_low_indices():
+    sampler = ByteSampler()
+    # 256 is not a multiple of 3; byte 255 would make index 0 more likely
+    sampler._buffer, sampler._offset = bytes([255, 4]), 0
+
+    assert sampler.index(3) == 1
+    assert sampler._offset == 2
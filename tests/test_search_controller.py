@@ -0,0 +1,129 @@
+from search_controller import SearchController
+
+
+class FakeRoot:
+    """Collects after() callbacks so a test can fire the debounce timer by hand"""
+
+    def __init__(self):
+        self.timers = {}
+        self._next = 0
+
+    def after(self, delay, callback):
+        self._next += 1
+        self.timers[self._next] = callback
+        return self._next
+
+    def after_cancel(self, timer):
+        self.timers.pop(timer, None)
+
+    def fire(self):
+        timers, self.timers = self.timers, {}
+        for callback in timers.values():
+            callback()
+
+
+class FakeTask:
+    def cancel(self):
+        pass
+
+
+class SyncTasks:
+    """Runs submitted searches immediately, like a TaskRunner that never queues"""
+
+    def submit(self, func, *args, name=None, on_success=None, **kwargs):
+        result = func(*args)
+        if on_success:
+            on_success(result)
+        return FakeTask()
+
+
+ENTRIES = [{'id': 1, 'service': 'GitHub', 'username': 'me'},
+           {'id': 2, 'service': 'GitLab', 'username': 'me'},
+           {'id': 3, 'service': 'Bank', 'username': 'me'}]
+
+
+def substring_filter(entries, query):
+    query = query.lower()
+    return [entry for entry in entries
+            if query in entry['service'].lower() or query in entry['username'].lower()]
+
+
+def make_controller(fuzzy_ready, search):
+    shown = []
+    # Same wiring as PasswordManagerGUI: only substring results may be narrowed
+    controller = SearchController(FakeRoot(), SyncTasks(), search, substring_filter, shown.append,
+                                  can_narrow=lambda: not fuzzy_ready)
+    return controller, shown
+
+
+def type_query(controller, text):
+    for end in range(1, len(text) + 1):
+        controller.set_query(text[:end])
+        controller.root.fire()
+
+
+def test_substring_search_narrows_from_previous_results():
+    calls = []
+
+    def search(query):
+        calls.append(query)
+        return substring_filter(ENTRIES, query)
+
+    controller, shown = make_controller(False, search)
+    type_query(controller, "github")
+
+    assert calls == ["g"]
+    assert controller.narrowed_searches == 5
+    assert [entry['id'] for entry in shown[-1]] == [1]
+
+
+def test_fuzzy_search_is_not_narrowed_with_substring_filter():
+    calls = []
+
+    def fuzzy_search(query):
+        # A typo-tolerant search still finds GitHub for the misspelled query
+        calls.append(query)
+        return [ENTRIES[0]] if query.startswith("gi") else []
+
+    controller, shown = make_controller(True, fuzzy_search)
+    type_query(controller, "giht")
+
+    assert calls == ["g", "gi", "gih", "giht"]
+    assert controller.narrowed_searches == 0
+    assert [entry['id'] for entry in shown[-1]] == [1]
+
+
+class DeferredTasks:
+    """Holds submitted searches until the test completes them"""
+
+    def __init__(self):
+        self.pending = []
+
+    def submit(self, func, *args, name=None, on_success=None, **kwargs):
+        self.pending.append((func, args, on_success))
+        return FakeTask()
+
+    def complete(self):
+        func, args, on_success = self.pending.pop(0)
+        on_success(func(*args))
+
+
+def test_completion_leaves_pending_query_to_its_debounce_timer():
+    calls = []
+
+    def fuzzy_search(query):
+        calls.append(query)
+        return [ENTRIES[0]]
+
+    tasks = DeferredTasks()
+    controller = SearchController(FakeRoot(), tasks, fuzzy_search, substring_filter, lambda results: None,
+                                  can_narrow=lambda: False)
+    controller.set_query("g")
+    controller.root.fire()
+    controller.set_query("gi")
+    tasks.complete()
+    controller.root.fire()
+    while tasks.pending:
+        tasks.complete()
+
+    assert calls == ["g", "gi"]
@@ -0,0 +1,40 @@
+import strength_estimator
+from strength_estimator import estimate
+
+
+def cached_passwords():
+    return strength_estimator._cached_estimate.cache_info().currsize
+
+
+def test_uncached_estimates_keep_no_plaintext():
+    strength_estimator.clear_cache()
+    estimate('correct horse battery', cached=False)
+    estimate('a' * 40 + 'b' * 40, cached=False)
+    assert cached_passwords() == 0
+
+
+def test_clear_cache_forgets_typed_passwords():
+    estimate('hunter2')
+    assert cached_passwords() > 0
+    strength_estimator.clear_cache()
+    assert cached_passwords() == 0
+
+
+def test_long_repeat_is_a_single_repeat_match():
+    result = estimate('a' * 100, cached=False)
+    assert result['sequence'] == (('repeat', 'a' * 100),)
+    assert result['score'] <= 1
+
+
+def test_year_guesses_follow_the_current_year(monkeypatch):
+    class FixedDate:
+        @staticmethod
+        def today():
+            return FixedDate
+
+        year = 2040
+
+    monkeypatch.setattr(strength_estimator, 'date', FixedDate)
+    # Years are scored by their distance from the current one
+    assert strength_estimator._year_matches('2039')[0]['guesses'] == strength_estimator.MIN_YEAR_SPACE
+    assert strength_estimator._year_matches('2000')[0]['guesses'] == 40
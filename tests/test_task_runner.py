@@ -0,0 +1,99 @@
+import threading
+
+from task_runner import TaskRunner
+
+
+class PollingRoot:
+    """Stands in for the Tk root: after() callbacks run when poll() is called"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, delay, callback):
+        self.callbacks.append(callback)
+
+    def poll(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+def run_until(root, condition, timeout=5):
+    finished = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        root.poll()
+        if condition():
+            return
+        finished.wait(0.01)
+    raise AssertionError("task did not finish")
+
+
+def test_start_does_not_wait_for_the_connection_lock():
+    root = PollingRoot()
+    runner = TaskRunner(root)
+    results, progress = [], []
+
+    def work(progress_callback=None):
+        progress_callback(1, 2)
+        return 'done'
+
+    with runner.lock:
+        # A long task on the worker holds the lock; start() must not block on it
+        runner.start(work, on_success=results.append, on_progress=lambda *args: progress.append(args))
+        run_until(root, lambda: results)
+
+    assert results == ['done']
+    assert progress == [(1, 2)]
+    assert not runner.busy
+    runner.shutdown()
+
+
+def test_cancelled_start_task_runs_no_callbacks():
+    root = PollingRoot()
+    runner = TaskRunner(root)
+    release = threading.Event()
+    outcomes = []
+
+    def work(progress_callback=None):
+        release.wait(5)
+        progress_callback(1, 1)
+        return 'done'
+
+    task = runner.start(work, on_success=outcomes.append, on_error=outcomes.append,
+                        on_progress=lambda *args: outcomes.append(args))
+    task.cancel()
+    release.set()
+    run_until(root, lambda: not runner.busy)
+
+    assert outcomes == []
+    runner.shutdown()
+
+
+def test_callback_exceptions_go_to_the_fallback_error_handler():
+    root = PollingRoot()
+    errors = []
+    runner = TaskRunner(root, on_error=errors.append)
+
+    def broken_callback(result):
+        raise ValueError(f"cannot show {result}")
+
+    runner.submit(lambda: 'done', on_success=broken_callback)
+    run_until(root, lambda: not runner.busy)
+
+    assert [str(error) for error in errors] == ["cannot show done"]
+    runner.shutdown()
+
+
+def test_failing_error_handler_is_logged(caplog):
+    root = PollingRoot()
+
+    def broken_handler(error):
+        raise ValueError("handler broke")
+
+    runner = TaskRunner(root, on_error=broken_handler)
+    runner.submit(lambda: 1 / 0)
+    run_until(root, lambda: not runner.busy)
+
+    assert "Task callback failed" in caplog.text
+    assert "handler broke" in caplog.text
+    runner.shutdown()
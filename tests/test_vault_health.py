@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+import strength_estimator
+import vault_health
+from database import DatabaseManager, SecurityManager
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+ENTRY = {'id': 1, 'service': 'mail', 'username': 'me', 'updated_at': '2025-12-01 00:00:00'}
+
+
+def test_breached_password_is_not_also_counted_as_weak():
+    row = vault_health._report_row(ENTRY, (1, 0, 'Breached', 20.0, 12), {}, NOW, 365)
+    assert row['issues'] == ['breached']
+
+    summary = vault_health.summarize([row])
+    assert summary['issues']['weak'] == 0
+    assert summary['issues']['breached'] == 1
+
+
+def test_weak_password_is_flagged():
+    row = vault_health._report_row(ENTRY, (1, 1, 'Weak', 12.0, 0), {}, NOW, 365)
+    assert row['issues'] == ['weak']
+
+
+def test_in_process_audit_leaves_no_memoized_passwords(tmp_path):
+    path = str(tmp_path / "vault.db")
+    db = DatabaseManager(path, SecurityManager(path))
+    try:
+        db.set_master_password('master-pass-1', 'pbkdf2-sha256', {'iterations': 1000})
+        db.add_password('a', 'u', 'password')
+        db.add_password('b', 'u', 'xK9#mP2$vL7!qR4@z')
+        strength_estimator.clear_cache()
+
+        report = vault_health.audit_vault(db, breach_database=None, workers=1)
+    finally:
+        db.close()
+
+    assert report['summary']['total'] == 2
+    assert strength_estimator._cached_estimate.cache_info().currsize == 0
+
+
+def test_old_entries_are_flagged_by_utc_age():
+    entry = dict(ENTRY, updated_at='2024-12-01 00:00:00')
+    row = vault_health._report_row(entry, (1, 4, 'Very Strong', 80.0, 0), {}, NOW, 365)
+    assert row['age_days'] == 396
+    assert row['issues'] == ['old']
+
+
+def test_pooled_audit_reports_every_entry_in_id_order(tmp_path, monkeypatch):
+    path = str(tmp_path / "vault.db")
+    db = DatabaseManager(path, SecurityManager(path))
+    batches = []
+    try:
+        db.set_master_password('master-pass-1', 'pbkdf2-sha256', {'iterations': 1000})
+        for i in range(7):
+            db.add_password(f'service{i}', 'u', f'unique-{i}-xK9#mP2$vL7')
+        monkeypatch.setattr(vault_health.os, 'cpu_count', lambda: 2)
+
+        report = vault_health.audit_vault(db, lambda done, total, rows: batches.append(len(rows)),
+                                          breach_database=None, workers=2, batch_size=2)
+    finally:
+        db.close()
+
+    assert sorted(batches) == [1, 2, 2, 2]
+    assert [row['id'] for row in report['entries']] == list(range(1, 8))
+    assert report['summary']['total'] == 7
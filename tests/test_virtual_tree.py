@@ -0,0 +1,89 @@
+from virtual_tree import VirtualTreeView
+
+
+class FakeTree:
+    """Records Treeview calls and keeps item order like a flat ttk.Treeview"""
+
+    def __init__(self):
+        self.items = []
+        self.values = {}
+        self.calls = []
+
+    def configure(self, **options):
+        pass
+
+    def insert(self, parent, index, iid, text, values):
+        self.calls.append(('insert', iid))
+        self.items.insert(index, iid)
+        self.values[iid] = (text, tuple(values))
+
+    def delete(self, *iids):
+        self.calls.append(('delete',) + iids)
+        for iid in iids:
+            self.items.remove(iid)
+            del self.values[iid]
+
+    def move(self, iid, parent, index):
+        self.calls.append(('move', iid))
+        self.items.remove(iid)
+        self.items.insert(index, iid)
+
+    def item(self, iid, text, values):
+        self.calls.append(('item', iid))
+        self.values[iid] = (text, tuple(values))
+
+    def after_idle(self, callback):
+        callback()
+
+
+class FakeScrollbar:
+    def set(self, first, last):
+        pass
+
+
+def entry(id_, service):
+    return {'id': id_, 'service': service, 'username': 'me'}
+
+
+def make_view(window_size=500):
+    tree = FakeTree()
+    view = VirtualTreeView(tree, FakeScrollbar(), lambda e: (e['service'], (e['username'],)), window_size)
+    return view, tree
+
+
+def test_refresh_only_touches_changed_rows():
+    view, tree = make_view()
+    view.set_rows([entry(1, 'A'), entry(2, 'B'), entry(3, 'C'), entry(4, 'D')])
+    tree.calls.clear()
+
+    view.set_rows([entry(1, 'A'), entry(3, 'C2'), entry(4, 'D'), entry(5, 'E')])
+
+    assert tree.items == ['1', '3', '4', '5']
+    assert tree.values['3'] == ('C2', ('me',))
+    assert tree.calls == [('delete', '2'), ('item', '3'), ('insert', '5')]
+
+
+def test_reordered_rows_end_up_in_display_order():
+    view, tree = make_view()
+    rows = [entry(i, f's{i}') for i in range(1, 7)]
+    view.set_rows(rows)
+
+    reordered = [rows[i] for i in (5, 0, 2, 1, 4, 3)]
+    view.set_rows(reordered)
+
+    assert tree.items == [str(e['id']) for e in reordered]
+    assert not any(call[0] in ('insert', 'delete') for call in tree.calls[6:])
+
+
+def test_rows_are_materialized_one_window_at_a_time():
+    view, tree = make_view(window_size=10)
+    view.set_rows([entry(i, f's{i}') for i in range(25)])
+    assert view.materialized == 10
+
+    view._on_scroll('0.5', '0.99')
+    assert view.materialized == 20
+    assert tree.items == [str(i) for i in range(20)]
+
+    # A refresh keeps the grown window instead of shrinking back
+    view.set_rows([entry(i, f's{i}') for i in range(25)])
+    assert view.materialized == 20
@@ -0,0 +1,45 @@
+import pytest
+
+from wordlist import (BUILTIN_WORDS, PackedWordlist, WordlistFormatError, load_wordlist,
+                      pack_wordlist, read_words)
+
+
+def test_packed_words_round_trip(tmp_path):
+    words = ['abacus', 'äpfel', 'zebra', 'x']
+    path = str(tmp_path / "words.spw")
+    pack_wordlist(words, path)
+
+    packed = PackedWordlist(path)
+    try:
+        assert len(packed) == 4
+        assert [packed[i] for i in range(len(packed))] == words
+        with pytest.raises(IndexError):
+            packed[4]
+    finally:
+        packed.close()
+
+
+def test_eff_dice_format_is_read_without_duplicates(tmp_path):
+    path = tmp_path / "eff.txt"
+    path.write_text("11111\tabacus\n11112\tabdomen\n\n11113\tabacus\n", encoding='utf-8')
+    assert read_words(str(path)) == ['abacus', 'abdomen']
+
+
+@pytest.mark.parametrize('content', [b'SPW', b'NOTWORDS\x01\x00\x00\x00', b'SPWORDS1\x00\x00\x00\x00'])
+def test_malformed_wordlist_is_rejected(tmp_path, content):
+    path = tmp_path / "bad.spw"
+    path.write_bytes(content)
+    with pytest.raises(WordlistFormatError):
+        PackedWordlist(str(path))
+
+
+def test_wordlist_with_wrong_size_is_rejected(tmp_path):
+    path = tmp_path / "words.spw"
+    pack_wordlist(['abacus', 'zebra'], str(path))
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(WordlistFormatError):
+        PackedWordlist(str(path))
+
+
+def test_missing_wordlist_falls_back_to_builtin_words(tmp_path):
+    assert load_wordlist(str(tmp_path / "missing.spw")) is BUILTIN_WORDS
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Vault health audit for SecurePass
+
+Rates every stored password with PasswordGenerator.check_password_strength
+and flags entries that are weak, reused, old (by updated_at) or found in
+the offline breach database. Stored passwords bypass the estimator's
+memo, so an in-process audit leaves no plaintext behind in the GUI.
+Reuse comes from the stored fingerprints, so it costs no decryption.
+
+Strength estimation is pure Python and CPU bound, so large vaults are
+rated on a process pool: rows are decrypted in the calling process and
+sent to the workers in batches of (id, password) pairs, with a bounded
+number of batches in flight. Batches are passed to progress_callback in
+the order they finish, so the report fills in while the audit runs; the
+final report lists entries by id. Small vaults are rated in-process to
+skip the pool startup.
+
+Run directly to write a JSON summary for compliance tooling.
+"""
+
+import argparse
+import getpass
+import json
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+
+from breach_check import BreachFormatError, get_breach_database
+from config import (DATABASE_NAME, BREACH_DATABASE, HEALTH_AUDIT_WORKERS, HEALTH_AUDIT_BATCH_SIZE,
+                    PASSWORD_MAX_AGE_DAYS)
+from database import DatabaseManager, SecurityManager
+from password_generator import PasswordGenerator
+
+WEAK_SCORE = 2  # Scores below this (Weak) are flagged
+ISSUES = ('weak', 'reused', 'old', 'breached')
+
+_generator = None
+
+
+def _init_worker(breach_database):
+    """Create the per-process generator (and breach database mapping) once"""
+    global _generator
+    _generator = PasswordGenerator(breach_database)
+
+
+def _rate_batch(batch):
+    """Rate [(id, password)] pairs; runs in a worker process"""
+    ratings = []
+    for id_, password in batch:
+        strength = _generator.check_password_strength(password, cached=False)
+        ratings.append((id_, strength['score'], strength['strength'],
+                        round(strength['entropy_bits'], 1), strength['breached']))
+    return ratings
+
+
+def _age_days(timestamp, now):
+    """Days since a SQLite (UTC) timestamp, or None if it cannot be parsed"""
+    try:
+        return (now - datetime.fromisoformat(timestamp[:19]).replace(tzinfo=timezone.utc)).days
+    except (TypeError, ValueError):
+        return None
+
+
+def _report_row(entry, rating, reused, now, max_age_days):
+    """Combine an entry's listing fields, rating and flags into a report row"""
+    _, score, strength, entropy_bits, breached = rating
+    age = _age_days(entry['updated_at'], now)
+    flags = {
+        # A breached password is scored 0; report it as breached, not also weak
+        'weak': score < WEAK_SCORE and not breached,
+        'reused': reused.get(entry['id'], 0) > 1,
+        'old': age is not None and age > max_age_days,
+        'breached': bool(breached)
+    }
+    return {
+        'id': entry['id'],
+        'service': entry['service'],
+        'username': entry['username'],
+        'score': score,
+        'strength': strength,
+        'entropy_bits': entropy_bits,
+        'breached': breached,
+        'reused_by': reused.get(entry['id'], 1),
+        'age_days': age,
+        'issues': [issue for issue in ISSUES if flags[issue]]
+    }
+
+
+def _batches(db, batch_size):
+    """Yield (listing entries by id, [(id, password)]) batches from the vault"""
+    entries, pairs = {}, []
+    for chunk in db.iter_password_chunks():
+        for entry in chunk:
+            entries[entry['id']] = {key: entry[key] for key in ('id', 'service', 'username', 'updated_at')}
+            pairs.append((entry['id'], entry['password']))
+            if len(pairs) >= batch_size:
+                yield entries, pairs
+                entries, pairs = {}, []
+    if pairs:
+        yield entries, pairs
+
+
+def audit_vault(db, progress_callback=None, breach_database=BREACH_DATABASE, workers=HEALTH_AUDIT_WORKERS,
+                batch_size=HEALTH_AUDIT_BATCH_SIZE, max_age_days=PASSWORD_MAX_AGE_DAYS, now=None):
+    """Rate and flag every entry of an unlocked vault
+
+    progress_callback(done, total, rows) receives the report rows of each
+    finished batch. now is an aware datetime (naive values are taken as
+    UTC). Returns {'generated_at', 'summary', 'entries'}.
+    """
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    reused = {entry['id']: len(cluster)
+              for cluster in db.find_reused_passwords() for entry in cluster}
+    total = len(db.list_entries())
+    if breach_database:
+        try:
+            # Missing or unreadable: skip the check and report it as not checked
+            if get_breach_database(breach_database) is None:
+                breach_database = None
+        except BreachFormatError:
+            breach_database = None
+
+    rows = []
+
+    def finished(entries, ratings):
+        batch_rows = [_report_row(entries[rating[0]], rating, reused, now, max_age_days) for rating in ratings]
+        rows.extend(batch_rows)
+        if progress_callback:
+            progress_callback(len(rows), total, batch_rows)
+
+    workers = min(workers, os.cpu_count() or 1)
+    if workers <= 1 or total <= batch_size:
+        _init_worker(breach_database)
+        for entries, pairs in _batches(db, batch_size):
+            finished(entries, _rate_batch(pairs))
+    else:
+        # Spawned workers do not inherit the GUI's threads or open vault
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=_init_worker, initargs=(breach_database,))
+        pending = {}
+
+        def collect():
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished(pending.pop(future), future.result())
+
+        try:
+            for entries, pairs in _batches(db, batch_size):
+                pending[pool.submit(_rate_batch, pairs)] = entries
+                if len(pending) >= workers * 2:
+                    collect()
+            while pending:
+                collect()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    rows.sort(key=lambda row: row['id'])
+    return {
+        'generated_at': now.strftime('%Y-%m-%d %H:%M:%S'),
+        'summary': summarize(rows, breach_database is not None, max_age_days),
+        'entries': rows
+    }
+
+
+def summarize(rows, breach_checked=True, max_age_days=PASSWORD_MAX_AGE_DAYS) -> dict:
+    """Aggregate counts over report rows"""
+    strengths = {}
+    for row in rows:
+        strengths[row['strength']] = strengths.get(row['strength'], 0) + 1
+    healthy = sum(1 for row in rows if not row['issues'])
+    return {
+        'total': len(rows),
+        'healthy': healthy,
+        'health_score': round(100 * healthy / len(rows)) if rows else 100,
+        'strength': strengths,
+        'issues': {issue: sum(1 for row in rows if issue in row['issues']) for issue in ISSUES},
+        'average_entropy_bits': round(sum(row['entropy_bits'] for row in rows) / len(rows), 1) if rows else 0,
+        'breach_database': breach_checked,
+        'max_age_days': max_age_days
+    }
+
+
+def export_report(report: dict, file_path: str):
+    """Write the summary and per-entry flags as JSON
+
+    Entries are identified by id only; service and username names stay
+    in the vault so the file can be handed to compliance tooling.
+    """
+    data = {
+        'generated_at': report['generated_at'],
+        'summary': report['summary'],
+        'entries': [{key: row[key] for key in ('id', 'score', 'strength', 'entropy_bits', 'breached',
+                                               'reused_by', 'age_days', 'issues')}
+                    for row in report['entries']]
+    }
+    with open(file_path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SecurePass Vault Health Audit")
+    parser.add_argument("--vault", default=DATABASE_NAME, help=f"Vault to audit (default: {DATABASE_NAME})")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this file")
+    parser.add_argument("--workers", type=int, default=HEALTH_AUDIT_WORKERS,
+                       help=f"Worker processes (default: {HEALTH_AUDIT_WORKERS})")
+
+    args = parser.parse_args()
+    if not os.path.exists(args.vault):
+        print(f"❌ Vault not found: {args.vault}")
+        return
+
+    db = DatabaseManager(args.vault, SecurityManager(args.vault))
+    try:
+        if not db.verify_master_password(getpass.getpass("Master password: ")):
+            print("❌ Invalid master password")
+            return
+        report = audit_vault(db, workers=args.workers)
+    finally:
+        db.close()
+
+    summary = report['summary']
+    print("🩺 SecurePass Vault Health")
+    print("=" * 50)
+    print(f"Health score: {summary['health_score']}% ({summary['healthy']} of {summary['total']} entries healthy)")
+    for issue, count in summary['issues'].items():
+        print(f"  {issue.capitalize():<10} {count}")
+    if not summary['breach_database']:
+        print("ℹ️ No readable breach database found; breached passwords were not checked")
+    if args.output:
+        export_report(report, args.output)
+        print(f"✅ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
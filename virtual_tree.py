@@ -0,0 +1,94 @@
+"""
+Incremental, windowed rendering for the SecurePass password list
+
+Instead of deleting and reinserting every Treeview item on each refresh,
+VirtualTreeView keys items by entry id and diffs the new result set
+against what is on screen: rows that disappeared are deleted, new rows
+are inserted, rows that changed position are moved and rows whose text
+changed are updated in place. Unchanged rows are not touched, and the
+selection survives refreshes.
+
+Only the first window of a large result set is materialized. More rows
+are added one window at a time as the user scrolls towards the end, so
+render cost follows what has been viewed rather than vault size.
+"""
+
+
+class VirtualTreeView:
+    def __init__(self, tree, scrollbar, row_values, window_size=500):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        # row_values(entry) -> (text, values) for the Treeview item
+        self.row_values = row_values
+        self.window_size = max(1, window_size)
+        self.rows = []
+        self.limit = self.window_size
+        self._rendered = []  # item ids on screen, in display order
+        self._values = {}  # item id -> (text, values) last rendered
+        self._extend_pending = False
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+    def set_rows(self, rows):
+        """Show a new ordered result set, keeping the materialized window size"""
+        self.rows = rows
+        self.limit = max(self.window_size, min(self.limit, len(rows)))
+        self._render()
+
+    @property
+    def materialized(self) -> int:
+        """Number of rows currently inserted in the Treeview"""
+        return len(self._rendered)
+
+    def _render(self):
+        """Diff the visible window of rows against the Treeview and patch it"""
+        target = self.rows[:self.limit]
+        target_ids = [str(entry['id']) for entry in target]
+        target_set = set(target_ids)
+
+        removed = [iid for iid in self._rendered if iid not in target_set]
+        if removed:
+            self.tree.delete(*removed)
+            for iid in removed:
+                del self._values[iid]
+
+        # Items still on screen, in their current order. Walking the target
+        # in order, the next unplaced survivor is the item sitting at the
+        # current index, so it only needs a move if it is not the one wanted.
+        survivors = [iid for iid in self._rendered if iid in target_set]
+        placed = set()
+        next_survivor = 0
+
+        for index, (iid, entry) in enumerate(zip(target_ids, target)):
+            while next_survivor < len(survivors) and survivors[next_survivor] in placed:
+                next_survivor += 1
+
+            text, values = self.row_values(entry)
+            row = (text, tuple(values))
+            if iid in self._values:
+                if next_survivor < len(survivors) and survivors[next_survivor] == iid:
+                    next_survivor += 1
+                else:
+                    self.tree.move(iid, '', index)
+                placed.add(iid)
+                if self._values[iid] != row:
+                    self.tree.item(iid, text=text, values=values)
+            else:
+                self.tree.insert('', index, iid=iid, text=text, values=values)
+            self._values[iid] = row
+
+        self._rendered = target_ids
+
+    def _on_scroll(self, first, last):
+        """Forward the scroll position and grow the window near the end"""
+        self.scrollbar.set(first, last)
+        if float(last) >= 0.95 and self.limit < len(self.rows) and not self._extend_pending:
+            # Extend after the current redraw rather than from inside it
+            self._extend_pending = True
+            self.tree.after_idle(self._extend)
+
+    def _extend(self):
+        """Materialize the next window of rows"""
+        self._extend_pending = False
+        if self.limit < len(self.rows):
+            self.limit += self.window_size
+            self._render()
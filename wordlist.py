@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Packed passphrase wordlists for SecurePass
+
+A wordlist is stored as an offset-indexed file:
+
+    MAGIC (8) | word count (4)
+    offsets: (count + 1) x uint32, byte offset of each word in the data
+    data: the UTF-8 words back to back
+
+The file is memory-mapped the first time a passphrase is generated, so
+word i is read with two offset lookups and one slice. Nothing is parsed
+or copied up front, whatever the size of the list.
+
+Run directly to pack a text list, either one word per line or the EFF
+dice format ("11111<TAB>abacus"), e.g. the EFF large wordlist:
+
+    python wordlist.py eff_large_wordlist.txt -o wordlist.spw
+"""
+
+import argparse
+import math
+import mmap
+import os
+import struct
+import threading
+
+from config import PASSPHRASE_WORDLIST
+
+MAGIC = b"SPWORDS1"
+HEADER = struct.Struct('<8sI')
+OFFSET = struct.Struct('<I')
+
+
+class WordlistFormatError(Exception):
+    """Raised when a packed wordlist file is malformed"""
+
+
+# Used when no packed wordlist is installed (about 5.8 bits per word)
+BUILTIN_WORDS = (
+    'apple', 'banana', 'cherry', 'dragon', 'elephant', 'forest', 'garden', 'harbor',
+    'island', 'jungle', 'kitchen', 'lemon', 'mountain', 'ocean', 'planet', 'quiet',
+    'river', 'sunset', 'thunder', 'umbrella', 'village', 'winter', 'yellow', 'zebra',
+    'bridge', 'castle', 'dream', 'energy', 'freedom', 'galaxy', 'harmony', 'journey',
+    'knight', 'liberty', 'melody', 'nature', 'orange', 'phoenix', 'rainbow', 'spirit',
+    'treasure', 'universe', 'victory', 'wisdom', 'crystal', 'adventure', 'butterfly',
+    'compass', 'discovery', 'emerald', 'falcon', 'golden', 'horizon', 'infinite'
+)
+
+
+class PackedWordlist:
+    """Read-only, memory-mapped view of a packed wordlist"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            self._map.close()
+            raise WordlistFormatError("Wordlist file is truncated")
+        magic, self._count = HEADER.unpack_from(self._map, 0)
+        self._data_offset = HEADER.size + (self._count + 1) * OFFSET.size
+        if magic != MAGIC or self._count == 0 or len(self._map) < self._data_offset:
+            self._map.close()
+            raise WordlistFormatError("Not a SecurePass wordlist")
+        if self._data_offset + self._offset(self._count) != len(self._map):
+            self._map.close()
+            raise WordlistFormatError("Wordlist size does not match its offsets")
+
+    def __len__(self):
+        return self._count
+
+    def _offset(self, index: int) -> int:
+        return OFFSET.unpack_from(self._map, HEADER.size + index * OFFSET.size)[0]
+
+    def __getitem__(self, index: int) -> str:
+        if not 0 <= index < self._count:
+            raise IndexError("Wordlist index out of range")
+        start, end = struct.unpack_from('<2I', self._map, HEADER.size + index * OFFSET.size)
+        return self._map[self._data_offset + start:self._data_offset + end].decode('utf-8')
+
+    def close(self):
+        self._map.close()
+
+
+def bits_per_word(words) -> float:
+    """Entropy contributed by one uniformly chosen word"""
+    return math.log2(len(words))
+
+
+def read_words(path: str) -> list:
+    """Read a text wordlist, one word per line or EFF dice format, dropping duplicates"""
+    words, seen = [], set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            fields = line.split()
+            if not fields:
+                continue
+            word = fields[-1]
+            if word not in seen:
+                seen.add(word)
+                words.append(word)
+    return words
+
+
+def pack_wordlist(words, output_path: str):
+    """Write words to a packed wordlist file"""
+    encoded = [word.encode('utf-8') for word in words]
+    if not encoded:
+        raise WordlistFormatError("Wordlist is empty")
+    offsets = [0]
+    for word in encoded:
+        offsets.append(offsets[-1] + len(word))
+
+    partial_path = output_path + ".partial"
+    with open(partial_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(encoded)))
+        f.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        f.write(b''.join(encoded))
+    os.replace(partial_path, output_path)
+
+
+_loaded = {}
+_load_lock = threading.Lock()
+
+
+def load_wordlist(path: str = PASSPHRASE_WORDLIST):
+    """Map the packed wordlist at path on first use, or fall back to BUILTIN_WORDS"""
+    with _load_lock:
+        if path not in _loaded:
+            _loaded[path] = PackedWordlist(path) if path and os.path.exists(path) else BUILTIN_WORDS
+        return _loaded[path]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SecurePass Wordlist Packer")
+    parser.add_argument("wordlist", help="Text wordlist, one word per line or EFF dice format")
+    parser.add_argument("--output", "-o", default=PASSPHRASE_WORDLIST,
+                       help=f"Packed output file (default: {PASSPHRASE_WORDLIST})")
+
+    args = parser.parse_args()
+    try:
+        words = read_words(args.wordlist)
+        pack_wordlist(words, args.output)
+    except (OSError, UnicodeDecodeError, WordlistFormatError) as e:
+        print(f"❌ Packing failed: {e}")
+        raise SystemExit(1)
+
+    print(f"✅ Packed {len(words)} words into {args.output}")
+    print(f"   {bits_per_word(words):.2f} bits of entropy per word")
+
+
+if __name__ == "__main__":
+    main()